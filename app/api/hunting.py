@@ -43,13 +43,12 @@ def step_hunting():
         impala_action = current_hunt_request.impala_sequence[seq_idx]
 
     # Lion Decision
-    # Use the trained agent
-    state_key = training_manager.agent.get_state_key(
+    # Greedy action of the trained policy (no exploration, read-only)
+    lion_action = training_manager.policy.action(
         current_hunt_state.lion.position, 
         impala_action, 
         current_hunt_state.lion.state
     )
-    lion_action = training_manager.agent.choose_action(state_key)
     
     # Execute Step
     # Note: We need to pass the engine instance
@@ -66,8 +65,8 @@ def step_hunting():
     actual_lion_action = last_step_info["lion_action"]
     
     return HuntingStepResponse(
-        lion=current_hunt_state.lion,
-        impala=current_hunt_state.impala,
+        lion=current_hunt_state.lion.to_model(),
+        impala=current_hunt_state.impala.to_model(),
         time_step=current_hunt_state.time_step,
         status=current_hunt_state.status,
         impala_action=actual_impala_action,
@@ -95,11 +94,7 @@ def explain_decision(request: HuntingExplainRequest):
     target_step = request.time_step if request.time_step is not None else current_hunt_state.time_step
     
     # Find in history
-    step_data = None
-    for item in current_hunt_state.history:
-        if item["time_step"] == target_step:
-            step_data = item
-            break
+    step_data = current_hunt_state.history.find(target_step)
             
     if not step_data:
         # If not found, maybe it's the current step before action?
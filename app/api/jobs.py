@@ -0,0 +1,76 @@
+from typing import List
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from app.models.requests import TrainingStartRequest
+from app.models.responses import TrainingJobResponse
+from app.learning.jobs import JobScheduler
+
+router = APIRouter()
+
+# Independent training runs, each with its own Knowledge Base; one process per job, at most one per core
+job_scheduler = JobScheduler()
+
+
+def _job_response(job_id: str) -> TrainingJobResponse:
+    try:
+        return TrainingJobResponse(**job_scheduler.snapshot(job_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+@router.post("", response_model=TrainingJobResponse)
+def create_job(request: TrainingStartRequest):
+    try:
+        job = job_scheduler.submit(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _job_response(job.job_id)
+
+@router.get("", response_model=List[TrainingJobResponse])
+def list_jobs():
+    return [TrainingJobResponse(**job) for job in job_scheduler.list_jobs()]
+
+@router.get("/{job_id}", response_model=TrainingJobResponse)
+def get_job(job_id: str):
+    return _job_response(job_id)
+
+@router.post("/{job_id}/stop", response_model=TrainingJobResponse)
+def stop_job(job_id: str):
+    try:
+        job_scheduler.stop(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _job_response(job_id)
+
+@router.post("/{job_id}/resume", response_model=TrainingJobResponse)
+def resume_job(job_id: str):
+    try:
+        job_scheduler.resume(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _job_response(job_id)
+
+@router.delete("/{job_id}")
+def delete_job(job_id: str):
+    try:
+        job_scheduler.delete(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Job deleted"}
+
+@router.get("/{job_id}/result")
+def download_job_result(job_id: str):
+    """Knowledge Base of a stopped or completed job, as a JSON file like /api/knowledge/download."""
+    try:
+        data = job_scheduler.result(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return JSONResponse(data, headers={"Content-Disposition": f'attachment; filename="knowledge_job_{job_id}.json"'})
@@ -1,19 +1,21 @@
 from fastapi import APIRouter, HTTPException
-from app.models.requests import KnowledgeSaveRequest, KnowledgeLoadRequest
+from app.models.requests import KnowledgeSaveRequest, KnowledgeLoadRequest, KnowledgeConvertRequest
 from app.models.responses import KnowledgeResponse, KnowledgeFilesResponse, KnowledgeQueryResponse
 from app.api.training import training_manager
+from app.learning.knowledge_base import KnowledgeBase, convert_knowledge
 
 router = APIRouter()
 
 @router.get("/base")
 def get_knowledge_base():
-    # Return the full KB content for inspection
-    return {
-        "q_table_size": len(training_manager.kb.q_table),
-        "abstractions_count": len(training_manager.kb.abstractions),
-        "q_table": training_manager.kb.q_table,
-        "abstractions": training_manager.kb.abstractions
-    }
+    # Return the full KB content for inspection (copied, training may be running)
+    with training_manager.lock:
+        return {
+            "q_table_size": len(training_manager.kb.q_table),
+            "abstractions_count": len(training_manager.kb.abstractions),
+            "q_table": {key: dict(row) for key, row in training_manager.kb.q_table.items()},
+            "abstractions": list(training_manager.kb.abstractions)
+        }
 
 @router.get("/download")
 def download_knowledge():
@@ -22,34 +24,58 @@ def download_knowledge():
     
     # Ensure final file exists
     filepath = "data/knowledge/knowledge_final.json"
-    if not os.path.exists(filepath):
-        # Try checkpoint
-        filepath = "data/knowledge/knowledge_checkpoint.json"
+    if not os.path.exists(filepath) and os.path.exists("data/knowledge/knowledge_checkpoint.json"):
+        # Try checkpoint: the snapshot plus the delta checkpoints written after it
+        kb = KnowledgeBase()
+        kb.load("knowledge_checkpoint")
+        kb.save("knowledge_download")
+        filepath = "data/knowledge/knowledge_download.json"
         
     if not os.path.exists(filepath):
         # Save current state to temp
-        training_manager.kb.save("knowledge_download")
+        with training_manager.lock:
+            training_manager.kb.save("knowledge_download")
         filepath = "data/knowledge/knowledge_download.json"
         
     return FileResponse(filepath, media_type='application/json', filename="knowledge_base.json")
 
 @router.get("/abstractions")
 def get_abstractions():
-    return training_manager.kb.abstractions
+    with training_manager.lock:
+        return list(training_manager.kb.abstractions)
 
 @router.post("/save")
 def save_knowledge(request: KnowledgeSaveRequest):
-    training_manager.kb.save(request.filename, request.format)
+    try:
+        with training_manager.lock:
+            training_manager.kb.save(request.filename, request.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"message": "Knowledge saved"}
 
 @router.post("/load")
 def load_knowledge(request: KnowledgeLoadRequest):
-    training_manager.kb.load(request.filename)
+    try:
+        with training_manager.lock:
+            training_manager.kb.load(request.filename, request.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"message": "Knowledge loaded"}
 
+@router.post("/convert")
+def convert_knowledge_file(request: KnowledgeConvertRequest):
+    try:
+        convert_knowledge(request.filename, request.to_format, request.from_format)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Knowledge file not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Knowledge converted"}
+
 @router.delete("/clear")
 def clear_knowledge():
-    training_manager.kb.clear()
+    with training_manager.lock:
+        training_manager.kb.clear()
     return {"message": "Knowledge cleared"}
 
 @router.post("/reset")
@@ -116,11 +142,10 @@ def query_knowledge(lion_position: int, impala_action: str):
     # Let's return for NORMAL.
     
     state_key = training_manager.agent.get_state_key(lion_pos, imp_act, LionState.NORMAL)
-    q_values = training_manager.kb.q_table.get(state_key, {})
+    q_values = dict(training_manager.kb.q_table.get(state_key, {}))
     
-    best_action = "unknown"
-    if q_values:
-        best_action = max(q_values, key=q_values.get)
+    best = training_manager.policy.best_action(lion_pos, imp_act, LionState.NORMAL)
+    best_action = best.value if best is not None else "unknown"
         
     # Find matching rules
     rules = []
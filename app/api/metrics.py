@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from app.api.training import training_manager
+from app.api.jobs import job_scheduler
+from app.learning.jobs import JOB_STATUSES
+from app.utils.metrics import registry, CONTENT_TYPE
+
+router = APIRouter()
+
+# Routers under /api/<name>; anything else is labelled "other" to keep label values bounded
+ROUTERS = ("simulation", "training", "hunting", "knowledge", "visualization", "logs")
+
+REQUESTS_TOTAL = registry.counter("http_requests_total", "HTTP requests handled", ["router", "method", "status"])
+REQUEST_SECONDS = registry.histogram("http_request_duration_seconds", "HTTP request latency", ["router"])
+
+
+def router_label(path: str) -> str:
+    parts = path.split("/")
+    if len(parts) > 2 and parts[1] == "api" and parts[2] in ROUTERS:
+        return parts[2]
+    return "other"
+
+
+async def track_requests(request: Request, call_next):
+    """HTTP middleware recording the latency and status of every request."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        router = router_label(request.url.path)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, router=router)
+        REQUESTS_TOTAL.inc(router=router, method=request.method, status=str(status))
+
+
+def _resident_memory_bytes() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs: fall back to the peak resident size
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _success_rate() -> float:
+    finished = training_manager.success_count + training_manager.fail_count
+    return training_manager.success_count / finished if finished else 0.0
+
+
+def _jobs_by_status() -> dict:
+    counts = {(status,): 0 for status in JOB_STATUSES}
+    for job in job_scheduler.list_jobs():
+        counts[(job["status"],)] += 1
+    return counts
+
+
+def _replay_fill() -> float:
+    agent = training_manager.agent
+    return agent.replay_buffer.size() / agent.replay_size if agent.replay_size else 0.0
+
+
+# Training gauges are read at scrape time without the training lock: they are single
+# counters, so a scrape never waits for an incursion to finish
+registry.gauge("training_running", "1 while a training run is active",
+               function=lambda: float(training_manager.is_running))
+registry.gauge("training_episodes_per_second", "Recent training throughput",
+               function=training_manager.episodes_per_second)
+registry.gauge("training_success_rate", "Success rate of the current training run", function=_success_rate)
+registry.gauge("training_epsilon", "Exploration rate of the agent", function=lambda: training_manager.agent.epsilon)
+registry.gauge("knowledge_q_table_states", "States in the Q-table", function=lambda: len(training_manager.kb.q_table))
+registry.gauge("replay_buffer_size", "Experiences in the replay buffer",
+               function=lambda: training_manager.agent.replay_buffer.size())
+registry.gauge("replay_buffer_fill_ratio", "Replay buffer size over its capacity", function=_replay_fill)
+registry.gauge("training_jobs", "Training jobs per status", ["status"], function=_jobs_by_status)
+registry.gauge("process_resident_memory_bytes", "Resident memory of the server process",
+               function=_resident_memory_bytes)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
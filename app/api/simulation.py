@@ -25,8 +25,8 @@ def get_simulation_state():
         raise HTTPException(status_code=404, detail="Simulation not initialized")
     
     return SimulationStateResponse(
-        lion=current_simulation_state.lion,
-        impala=current_simulation_state.impala,
+        lion=current_simulation_state.lion.to_model(),
+        impala=current_simulation_state.impala.to_model(),
         time_step=current_simulation_state.time_step,
         status=current_simulation_state.status
     )
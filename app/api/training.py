@@ -1,34 +1,74 @@
-import asyncio
+import json
 import random
+import threading
+import time
+from collections import deque
 from fastapi import APIRouter, BackgroundTasks, HTTPException
-from app.models.requests import TrainingStartRequest
-from app.models.responses import TrainingStatusResponse, TrainingStatisticsResponse
-from app.core.game_engine import GameEngine, GameState, GameMap, ImpalaState
-from app.core.entities import LionAction, ImpalaAction, Lion, Impala
+from fastapi.responses import StreamingResponse
+from app.models.requests import TrainingStartRequest, TrainingSolveRequest
+from app.models.responses import (
+    TrainingStatusResponse, TrainingStatisticsResponse, TrainingSolveResponse, WorkerStatusResponse, TrainingProfileResponse
+)
+from app.core.game_engine import GameEngine, GameState, GameMap, ImpalaState, TERMINATION_RULES
+from app.core.entities import LionAction, ImpalaAction
+from app.core.history import HistoryRecorder
 from app.learning.knowledge_base import KnowledgeBase
 from app.learning.reinforcement import QLearningAgent
 from app.learning.abstraction import AbstractionEngine
+from app.learning.planner import ValueIterationPlanner
+from app.learning.episode import EpisodeRunner, STEP_PHASES
+from app.utils.profiler import PhaseProfiler, BUCKET_BOUNDS
+from app.utils.metrics import registry
+from app.utils.broadcast import SnapshotBroadcaster
+from app.learning.policy import CompiledPolicy
+from app.learning.reward_system import RewardSystem
+from app.learning.parallel import run_worker_round, merge_q_tables, start_worker
+from app.learning.checkpoint import CheckpointPolicy, CheckpointWriter
 
 router = APIRouter()
 
+# Phases timed by the profiler: the steps of an incursion, then the work around incursions
+TRAINING_PHASES = STEP_PHASES + ("replay", "abstraction", "checkpoint", "log_save")
+
+EPISODES_TOTAL = registry.counter("training_episodes_total", "Finished training incursions", ["result"])
+CHECKPOINT_SECONDS = registry.histogram(
+    "knowledge_checkpoint_write_seconds", "Time to write a Knowledge Base file during training", ["file"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+# Incursions are counted over the last RATE_WINDOW progress marks for episodes/s
+RATE_WINDOW = 1000
+# The SSE progress snapshot is built at most every STREAM_TICK_SECONDS, whatever the number of clients
+STREAM_TICK_SECONDS = 0.25
+
 # Global Training State
 class TrainingManager:
+    """
+    Owns the shared KB/Agent and runs training in a dedicated thread so the event loop
+    stays responsive. The training thread holds `lock` while it plays an incursion and
+    updates the counters; readers take it to get a consistent snapshot of the KB and stats.
+    Stop and pause are cooperative and take effect between incursions.
+    """
     def __init__(self):
         self.is_running = False
-        self.stop_requested = False
+        self.lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self._thread = None
         self.progress = 0.0
         self.current_incursion = 0
         self.total_incursions = 0
         self.success_count = 0
         self.fail_count = 0
         
-        self.kb = KnowledgeBase()
+        self.kb = KnowledgeBase(backend="dense")
         self.agent = QLearningAgent(self.kb)
         self.engine = GameEngine()
         self.abstraction_engine = AbstractionEngine(self.kb)
+        # Frozen greedy policy for hunts and queries, rebuilt when the KB changes
+        self.policy = CompiledPolicy(self.kb, lock=self.lock)
         
-        # Import reward system for shaped rewards
-        from app.learning.reward_system import RewardSystem
+        # Reward system for shaped rewards
         self.reward_system = RewardSystem()
         
         # Initialize stats
@@ -36,13 +76,61 @@ class TrainingManager:
         self.position_attempts = {k: 0 for k in GameMap.valid_lion_positions.keys()}
         self.position_successes = {k: 0 for k in GameMap.valid_lion_positions.keys()}
         self.total_steps = 0
+        self.worker_progress = {}
+
+        # Checkpoints and logs are written by a background thread; the policy decides when
+        self.checkpoint_policy = CheckpointPolicy()
+        self.checkpoint_writer = CheckpointWriter(self._prepare_checkpoint, lock=self.lock)
+
+        # Per-phase timings of the current run
+        self.profiler = PhaseProfiler(TRAINING_PHASES)
+        # (perf_counter, current_incursion, success_count) after each incursion or parallel round
+        self._progress_marks = deque(maxlen=RATE_WINDOW)
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop_event.is_set()
+
+    @property
+    def is_paused(self) -> bool:
+        return self.is_running and not self._resume_event.is_set()
+
+    def _launch(self, request: TrainingStartRequest, start_index: int = 0):
+        self.is_running = True
+        self._stop_event.clear()
+        self._resume_event.set()
+        self._thread = threading.Thread(
+            target=self._training_loop, args=(request, start_index), name="training", daemon=True
+        )
+        self._thread.start()
 
     def start_training(self, request: TrainingStartRequest):
         if self.is_running:
             raise HTTPException(status_code=400, detail="Training already in progress")
+        try:
+            HistoryRecorder(request.history_mode, request.history_sample_every)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if request.termination not in TERMINATION_RULES:
+            raise HTTPException(status_code=400, detail="Invalid termination rule")
+        if request.num_workers < 1 or request.merge_every < 1:
+            raise HTTPException(status_code=400, detail="num_workers and merge_every must be at least 1")
+        if request.replay_size < 1 or request.replay_batch_size < 1:
+            raise HTTPException(status_code=400, detail="replay_size and replay_batch_size must be at least 1")
+        try:
+            checkpoint_policy = CheckpointPolicy(request.checkpoint_policy, request.checkpoint_every,
+                                                 request.checkpoint_seconds)
+            reward_system = RewardSystem(request.reward_shaping, discount_factor=self.agent.gamma)
+            self.agent.configure_replay(request.replay, request.replay_size)
+            self.agent.configure_dyna(request.dyna_steps)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if self.agent.model is not None and reward_system.shaping != self.reward_system.shaping:
+            # The model stores shaped rewards
+            self.agent.model.clear()
+        self.reward_system = reward_system
+        self.checkpoint_policy = checkpoint_policy
         
-        self.is_running = True
-        self.stop_requested = False
         self.total_incursions = request.num_incursions
         self.current_incursion = 0
         self.success_count = 0
@@ -52,20 +140,24 @@ class TrainingManager:
         self.position_attempts = {k: 0 for k in GameMap.valid_lion_positions.keys()}
         self.position_successes = {k: 0 for k in GameMap.valid_lion_positions.keys()}
         self.total_steps = 0
+        self.worker_progress = {}
+        self.profiler.enabled = request.profile
+        self.profiler.reset()
+        self._progress_marks.clear()
         
         # Run in background
-        asyncio.create_task(self._training_loop(request))
+        self._launch(request)
         
     def resume_training(self):
+        if self.is_paused:
+            self._resume_event.set()
+            return
         if self.is_running:
             raise HTTPException(status_code=400, detail="Training already in progress")
         
         remaining = self.total_incursions - self.current_incursion
         if remaining <= 0:
             raise HTTPException(status_code=400, detail="Training already completed")
-            
-        self.is_running = True
-        self.stop_requested = False
         
         # Reconstruct request from state? 
         # For simplicity, we assume same parameters as last run or defaults.
@@ -76,11 +168,93 @@ class TrainingManager:
         if not hasattr(self, 'last_request'):
              raise HTTPException(status_code=400, detail="No previous training to resume")
              
-        asyncio.create_task(self._training_loop(self.last_request, start_index=self.current_incursion))
+        self._launch(self.last_request, start_index=self.current_incursion)
+
+    def pause_training(self):
+        if not self.is_running:
+            raise HTTPException(status_code=400, detail="No training in progress")
+        self._resume_event.clear()
+
+    def solve(self, request: TrainingSolveRequest) -> TrainingSolveResponse:
+        """Replaces the Knowledge Base with the optimal Q-table computed by value iteration."""
+        if self.is_running:
+            raise HTTPException(status_code=400, detail="Training already in progress")
+        for pos in request.initial_positions:
+            if pos not in GameMap.valid_lion_positions:
+                raise HTTPException(status_code=400, detail="Invalid lion position")
+
+        if request.termination not in TERMINATION_RULES:
+            raise HTTPException(status_code=400, detail="Invalid termination rule")
+
+        planner = ValueIterationPlanner(
+            impala_mode=request.impala_mode,
+            impala_sequence=request.impala_sequence,
+            initial_positions=request.initial_positions,
+            discount_factor=request.discount_factor,
+            termination=request.termination
+        )
+        result = planner.solve(tolerance=request.tolerance, max_iterations=request.max_iterations)
+
+        with self.lock:
+            self.kb.clear()
+            planner.export(self.kb)
+            self.abstraction_engine.abstract_knowledge()
+            self.kb.save("knowledge_final")
+        # The table is already optimal, act greedily from now on
+        self.agent.epsilon = self.agent.epsilon_end
+
+        return TrainingSolveResponse(q_table_size=len(self.kb.q_table), **result)
 
     def stop_training(self):
         if self.is_running:
-            self.stop_requested = True
+            self._stop_event.set()
+            # Wake up a paused loop so it can see the stop request
+            self._resume_event.set()
+
+    @property
+    def status(self) -> str:
+        if self.is_paused:
+            return "paused"
+        return "running" if self.is_running else "stopped"
+
+    def progress_snapshot(self) -> dict:
+        """
+        Live progress for the SSE stream. Lock-free: it reads single counters, so building
+        it never waits for (or delays) an incursion.
+        """
+        return {
+            "status": self.status,
+            "current_incursion": self.current_incursion,
+            "total_incursions": self.total_incursions,
+            "success_count": self.success_count,
+            "fail_count": self.fail_count,
+            "rolling_success_rate": self.recent_success_rate(),
+            "epsilon": self.agent.epsilon,
+            "episodes_per_second": self.episodes_per_second(),
+            "q_table_size": len(self.kb.q_table),
+        }
+
+    def status_snapshot(self) -> dict:
+        """Consistent copy of the progress counters, safe to call while training runs."""
+        with self.lock:
+            return {
+                "status": self.status,
+                "progress": self.progress,
+                "current_incursion": self.current_incursion,
+                "total_incursions": self.total_incursions,
+                "success_count": self.success_count,
+                "fail_count": self.fail_count,
+                "total_steps": self.total_steps,
+                "success_rate_by_position": dict(self.success_rate_by_position),
+                "abstractions_count": len(self.kb.abstractions),
+                "q_table_size": len(self.kb.q_table),
+                "replay_size": self.agent.replay_buffer.size(),
+                "replay_memory_bytes": self.agent.replay_buffer.memory_bytes(),
+                "workers": [dict(w) for w in self.worker_progress.values()],
+            }
+
+    def _wait_if_paused(self):
+        self._resume_event.wait()
 
     def reset_learning(self):
         """Reset all learning data and statistics to initial state"""
@@ -102,107 +276,225 @@ class TrainingManager:
         self.success_rate_by_position = {k: 0.0 for k in GameMap.valid_lion_positions.keys()}
         self.position_attempts = {k: 0 for k in GameMap.valid_lion_positions.keys()}
         self.position_successes = {k: 0 for k in GameMap.valid_lion_positions.keys()}
+        self.worker_progress = {}
         
         # Clear last request if exists
         if hasattr(self, 'last_request'):
             delattr(self, 'last_request')
 
-    async def _training_loop(self, request: TrainingStartRequest, start_index: int = 0):
+    def _training_loop(self, request: TrainingStartRequest, start_index: int = 0):
         self.last_request = request
+        history_recorder = HistoryRecorder(request.history_mode, request.history_sample_every)
+        self.engine = GameEngine(termination=request.termination)
+        self.episode_runner = EpisodeRunner(self.agent, self.engine, self.reward_system, profiler=self.profiler)
         print(f"Starting training loop from {start_index}...")
         
+        try:
+            if request.num_workers > 1:
+                self._parallel_training_loop(request, start_index, history_recorder)
+            else:
+                self._serial_training_loop(request, start_index, history_recorder)
+                    
+            # Final Save, after the pending checkpoints and logs (the writer needs the lock)
+            self.checkpoint_writer.flush()
+            with self.lock:
+                self._save_knowledge("knowledge_final")
+        finally:
+            try:
+                self.episode_runner.flush_profile()
+            finally:
+                self.is_running = False
+        print("Training finished.")
+
+    def _serial_training_loop(self, request: TrainingStartRequest, start_index: int, history_recorder: HistoryRecorder):
         for i in range(start_index, request.num_incursions):
+            self._wait_if_paused()
             if self.stop_requested:
                 break
             
-            self.current_incursion = i + 1
-            self.progress = (i + 1) / request.num_incursions
-            
-            # Setup Episode
-            start_pos_idx = random.choice(request.initial_positions)
-            start_pos = GameMap.valid_lion_positions[start_pos_idx]
-            self.position_attempts[start_pos_idx] += 1
-            
-            state = GameState(lion_start_pos=start_pos)
-            done = False
-            steps = 0
-            
-            # Reset eligibility traces at episode start
-            self.agent.reset_eligibility()
-            
-            while not done:
-                steps += 1
-                # Determine Impala action
-                impala_action = ImpalaAction.LOOK_FRONT 
-                if request.impala_mode == "random":
-                    choices = [a for a in ImpalaAction if a != ImpalaAction.FLEE]
-                    impala_action = random.choice(choices)
-                elif request.impala_mode == "programmed" and request.impala_sequence:
-                    seq_idx = state.time_step % len(request.impala_sequence)
-                    impala_action = request.impala_sequence[seq_idx]
-                
-                # Get current state key
-                state_key = self.agent.get_state_key(state.lion.position, impala_action, state.lion.state)
-                
-                # Choose action
-                lion_action = self.agent.choose_action(state_key)
-                
-                # Store previous state for reward shaping
-                prev_state = GameState(lion_start_pos=state.lion.position)
-                prev_state.lion = Lion(position=state.lion.position, state=state.lion.state)
-                prev_state.impala = Impala(position=state.impala.position, state=state.impala.state)
-                
-                # Execute action
-                next_state, base_reward, done, info = self.engine.step(state, lion_action, impala_action)
-                
-                # Calculate shaped reward
-                reward = self.reward_system.calculate_reward(prev_state, lion_action, next_state, done, info)
-                
-                # Get next state key
-                next_impala_action = ImpalaAction.LOOK_FRONT
-                if request.impala_mode == "random":
-                    next_impala_action = random.choice([a for a in ImpalaAction if a != ImpalaAction.FLEE])
-                elif request.impala_mode == "programmed" and request.impala_sequence:
-                    next_seq_idx = next_state.time_step % len(request.impala_sequence)
-                    next_impala_action = request.impala_sequence[next_seq_idx]
-                
-                next_state_key = self.agent.get_state_key(next_state.lion.position, next_impala_action, next_state.lion.state)
-                
-                # Learn with eligibility traces for faster credit assignment
-                self.agent.learn_with_traces(state_key, lion_action, reward, next_state_key, done)
-                
-                state = next_state
-                
-                if done:
-                    self.total_steps += steps
-                    if state.status == "success": 
-                        self.success_count += 1
-                        self.position_successes[start_pos_idx] += 1
-                    else: 
-                        self.fail_count += 1
-
-            # Decay epsilon after each episode
-            self.agent.decay_epsilon()
-            
-            # Learn from replay buffer (batch learning)
-            self.agent.learn_batch(batch_size=32)
-            
-            # Update stats
-            for k in self.position_attempts:
-                if self.position_attempts[k] > 0:
-                    self.success_rate_by_position[k] = self.position_successes[k] / self.position_attempts[k]
+            with self.lock:
+                self._serial_incursion(request, i, history_recorder)
 
-            # Periodic Save (every 100 episodes)
-            if i % 100 == 0:
+    def _serial_incursion(self, request: TrainingStartRequest, i: int, history_recorder: HistoryRecorder):
+        self.current_incursion = i + 1
+        self.progress = (i + 1) / request.num_incursions
+        
+        # Setup Episode
+        start_pos_idx = random.choice(request.initial_positions)
+        self.position_attempts[start_pos_idx] += 1
+        
+        state, steps = self.episode_runner.run(request, start_pos_idx, history_recorder.records(i))
+        
+        self.total_steps += steps
+        if state.status == "success": 
+            self.success_count += 1
+            self.position_successes[start_pos_idx] += 1
+        else: 
+            self.fail_count += 1
+        EPISODES_TOTAL.inc(result=state.status)
+        self._progress_marks.append((time.perf_counter(), self.current_incursion, self.success_count))
+
+        # Decay epsilon after each episode
+        self.agent.decay_epsilon()
+        
+        # Learn from replay buffer (batch learning)
+        with self.profiler.time("replay"):
+            self.agent.learn_batch(batch_size=request.replay_batch_size)
+        
+        # Update stats
+        self._update_position_rates()
+
+        # Periodic abstraction (every 100 episodes) and checkpoint (as the policy says)
+        if i % 100 == 0:
+            with self.profiler.time("abstraction"):
                 self.abstraction_engine.abstract_knowledge()
-                self.kb.save("knowledge_checkpoint")
-                self._save_log(i, state.history)
-                print(f"Episode {i}: Success rate: {self.success_count/(i+1):.2%}, Epsilon: {self.agent.get_epsilon():.3f}")
-                
-        # Final Save
-        self.kb.save("knowledge_final")
-        self.is_running = False
-        print("Training finished.")
+        if self.checkpoint_policy.due(i, i + 1, self.recent_success_rate()):
+            with self.profiler.time("checkpoint"):
+                self.checkpoint_writer.request()
+        if state.history is not None and history_recorder.saves_log(i):
+            with self.profiler.time("log_save"):
+                self._save_log(i, state.history.to_list())
+        if i % 100 == 0:
+            print(f"Episode {i}: Success rate: {self.success_count/(i+1):.2%}, Epsilon: {self.agent.get_epsilon():.3f}")
+
+    def _parallel_training_loop(self, request: TrainingStartRequest, start_index: int, history_recorder: HistoryRecorder):
+        """Spreads incursions over worker processes and merges their Q-tables every round."""
+        from concurrent.futures import ProcessPoolExecutor
+        from contextlib import ExitStack
+        import multiprocessing
+
+        workers = request.num_workers
+        agent_params = {
+            "learning_rate": self.agent.alpha,
+            "discount_factor": self.agent.gamma,
+            "epsilon_end": self.agent.epsilon_end,
+            "epsilon_decay": self.agent.epsilon_decay,
+            "lambda_": self.agent.lambda_,
+            "replay": request.replay,
+            "replay_size": request.replay_size,
+            "dyna_steps": request.dyna_steps,
+        }
+        base_seed = random.randrange(2**31)
+        if start_index == 0 or not self.worker_progress:
+            self.worker_progress = {
+                w: {"worker_id": w, "incursions": 0, "success_count": 0, "fail_count": 0, "rounds": 0}
+                for w in range(workers)
+            }
+
+        # One single-process pool per worker, so worker w always runs in the same process and
+        # keeps its agent (replay buffer, Dyna-Q model) between rounds.
+        # Spawned workers do not inherit the server threads or sockets.
+        with ExitStack() as stack:
+            executors = [
+                stack.enter_context(ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=start_worker, initargs=(agent_params, request)
+                ))
+                for _ in range(workers)
+            ]
+            i = start_index
+            round_idx = 0
+            while i < request.num_incursions:
+                self._wait_if_paused()
+                if self.stop_requested:
+                    break
+                round_size = min(workers * request.merge_every, request.num_incursions - i)
+                with self.lock:
+                    values, visited = self.kb.q_table.values.copy(), self.kb.q_table.visited.copy()
+                tasks = []
+                for w in range(workers):
+                    indices = list(range(i + w, i + round_size, workers))
+                    if not indices:
+                        continue
+                    tasks.append({
+                        "worker_id": w,
+                        "seed": base_seed + 7919 * round_idx + w,
+                        "values": values,
+                        "visited": visited,
+                        "agent_params": agent_params,
+                        "epsilon": self.agent.epsilon,
+                        "request": request,
+                        "episode_indices": indices,
+                    })
+
+                futures = [executors[task["worker_id"]].submit(run_worker_round, task) for task in tasks]
+                results = [future.result() for future in futures]
+                with self.lock:
+                    merge_q_tables(self.kb.q_table, results)
+                    self.kb.mark_changed()
+
+                    for result in results:
+                        progress = self.worker_progress[result["worker_id"]]
+                        progress["incursions"] += result["incursions"]
+                        progress["success_count"] += result["success_count"]
+                        progress["fail_count"] += result["fail_count"]
+                        progress["rounds"] += 1
+
+                        self.success_count += result["success_count"]
+                        self.fail_count += result["fail_count"]
+                        EPISODES_TOTAL.inc(result["success_count"], result="success")
+                        EPISODES_TOTAL.inc(result["fail_count"], result="failed")
+                        self.total_steps += result["total_steps"]
+                        for k in self.position_attempts:
+                            self.position_attempts[k] += result["position_attempts"][k]
+                            self.position_successes[k] += result["position_successes"][k]
+                        for episode_idx, history in result["logs"]:
+                            if history_recorder.saves_log(episode_idx):
+                                self._save_log(episode_idx, history)
+
+                    # Keep the same exploration schedule as the serial loop
+                    for _ in range(round_size):
+                        self.agent.decay_epsilon()
+
+                    first, i = i, i + round_size
+                    round_idx += 1
+                    self.current_incursion = i
+                    self.progress = i / request.num_incursions
+                    self._progress_marks.append((time.perf_counter(), i, self.success_count))
+                    self._update_position_rates()
+
+                    # Periodic abstraction (every 100 episodes) and checkpoint (as the policy says)
+                    if first // 100 != i // 100 or first % 100 == 0:
+                        self.abstraction_engine.abstract_knowledge()
+                        print(f"Episode {i}: Success rate: {self.success_count/max(i, 1):.2%}, Epsilon: {self.agent.get_epsilon():.3f}")
+                    if self.checkpoint_policy.due(first, i, self.recent_success_rate()):
+                        self.checkpoint_writer.request()
+
+    def _save_knowledge(self, filename: str):
+        with CHECKPOINT_SECONDS.time(file=filename):
+            self.kb.save(filename)
+
+    def _prepare_checkpoint(self):
+        """Runs on the checkpoint writer thread, under the lock: copies the KB state to write."""
+        # Rows changed since the last checkpoint, with a periodic full snapshot
+        write = self.kb.prepare_checkpoint("knowledge_checkpoint")
+
+        def timed_write():
+            with CHECKPOINT_SECONDS.time(file="knowledge_checkpoint"):
+                return write()
+        return timed_write
+
+    def episodes_per_second(self) -> float:
+        """Recent training throughput; 0 when no incursion finished in the last few seconds."""
+        marks = list(self._progress_marks)
+        if len(marks) < 2 or time.perf_counter() - marks[-1][0] > 5.0:
+            return 0.0
+        (t0, n0, _), (t1, n1, _) = marks[0], marks[-1]
+        return (n1 - n0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def recent_success_rate(self) -> float:
+        """Success rate over the incursions covered by the last RATE_WINDOW progress marks."""
+        marks = list(self._progress_marks)
+        if not marks:
+            return 0.0
+        first = marks[0] if len(marks) > 1 else (0.0, 0, 0)
+        (_, n0, s0), (_, n1, s1) = first, marks[-1]
+        return (s1 - s0) / (n1 - n0) if n1 > n0 else 0.0
+
+    def _update_position_rates(self):
+        for k in self.position_attempts:
+            if self.position_attempts[k] > 0:
+                self.success_rate_by_position[k] = self.position_successes[k] / self.position_attempts[k]
 
     def _save_log(self, episode_idx: int, history: list):
         from app.storage.json_storage import JsonStorage
@@ -216,20 +508,31 @@ class TrainingManager:
             "timestamp": timestamp,
             "history": history
         }
-        JsonStorage.save(log_data, filename)
+        # Serialized and written by the checkpoint writer thread (the history is not reused)
+        self.checkpoint_writer.submit(lambda: JsonStorage.save(log_data, filename, atomic=True))
 
 training_manager = TrainingManager()
+progress_broadcaster = SnapshotBroadcaster(training_manager.progress_snapshot, tick=STREAM_TICK_SECONDS)
 
 @router.post("/start")
 async def start_training(request: TrainingStartRequest):
     training_manager.start_training(request)
     return {"message": "Training started"}
 
+@router.post("/solve", response_model=TrainingSolveResponse)
+def solve_training(request: TrainingSolveRequest):
+    return training_manager.solve(request)
+
 @router.post("/resume")
 async def resume_training():
     training_manager.resume_training()
     return {"message": "Training resumed"}
 
+@router.post("/pause")
+async def pause_training():
+    training_manager.pause_training()
+    return {"message": "Training paused"}
+
 @router.post("/stop")
 async def stop_training():
     training_manager.stop_training()
@@ -237,30 +540,62 @@ async def stop_training():
 
 @router.get("/status", response_model=TrainingStatusResponse)
 def get_training_status():
+    snapshot = training_manager.status_snapshot()
     return TrainingStatusResponse(
-        status="running" if training_manager.is_running else "stopped",
-        progress=training_manager.progress,
-        current_incursion=training_manager.current_incursion,
-        total_incursions=training_manager.total_incursions,
-        success_count=training_manager.success_count,
-        fail_count=training_manager.fail_count
+        status=snapshot["status"],
+        progress=snapshot["progress"],
+        current_incursion=snapshot["current_incursion"],
+        total_incursions=snapshot["total_incursions"],
+        success_count=snapshot["success_count"],
+        fail_count=snapshot["fail_count"],
+        workers=[WorkerStatusResponse(**w) for w in snapshot["workers"]]
+    )
+
+@router.get("/stream")
+async def stream_training_progress(interval: float = 1.0):
+    """
+    Server-Sent Events stream of training progress ("progress" events with a JSON snapshot),
+    at most one event every `interval` seconds. Slow clients skip to the latest snapshot.
+    """
+    if not STREAM_TICK_SECONDS <= interval <= 60:
+        raise HTTPException(status_code=400, detail=f"interval must be between {STREAM_TICK_SECONDS} and 60 seconds")
+
+    async def events():
+        async for snapshot in progress_broadcaster.subscribe(interval):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/profile", response_model=TrainingProfileResponse)
+def get_training_profile():
+    return TrainingProfileResponse(
+        enabled=training_manager.profiler.enabled,
+        bucket_bounds_seconds=list(BUCKET_BOUNDS),
+        phases=training_manager.profiler.summary()
     )
 
 @router.get("/statistics", response_model=TrainingStatisticsResponse)
 def get_training_statistics():
+    snapshot = training_manager.status_snapshot()
     avg_steps = 0
-    if training_manager.current_incursion > 0:
-        avg_steps = training_manager.total_steps / training_manager.current_incursion
+    if snapshot["current_incursion"] > 0:
+        avg_steps = snapshot["total_steps"] / snapshot["current_incursion"]
         
     success_rate = 0
-    if training_manager.current_incursion > 0:
-        success_rate = training_manager.success_count / training_manager.current_incursion
+    if snapshot["current_incursion"] > 0:
+        success_rate = snapshot["success_count"] / snapshot["current_incursion"]
 
     return TrainingStatisticsResponse(
-        total_incursions=training_manager.current_incursion,
+        total_incursions=snapshot["current_incursion"],
         success_rate=success_rate,
         avg_steps=avg_steps,
-        success_rate_by_position=training_manager.success_rate_by_position,
-        abstractions_count=len(training_manager.kb.abstractions),
-        q_table_size=len(training_manager.kb.q_table)
+        success_rate_by_position=snapshot["success_rate_by_position"],
+        abstractions_count=snapshot["abstractions_count"],
+        q_table_size=snapshot["q_table_size"],
+        replay_size=snapshot["replay_size"],
+        replay_memory_bytes=snapshot["replay_memory_bytes"]
     )
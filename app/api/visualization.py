@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
-from app.models.responses import VisualizationMapResponse, VisionAreasResponse, HistoryResponse
-from app.core.entities import GameMap, ImpalaAction
+from app.models.responses import VisualizationMapResponse, VisionAreasResponse, VisionCellsResponse, HistoryResponse
+from app.core.entities import GameMap, ImpalaAction, LionState
+from app.core.encoding import LION_STATE_CODE, IMPALA_ACTION_CODE, cell_position
 from app.core.vision_calculator import VisionCalculator
-from app.api.hunting import current_hunt_state # Access current hunt state
+from app.api import hunting # Access current hunt state
 
 router = APIRouter()
 
@@ -33,14 +34,34 @@ def get_vision_areas(direction: str):
         
     return VisionAreasResponse(triangle_points=points)
 
+VISION_DIRECTIONS = {
+    "front": ImpalaAction.LOOK_FRONT,
+    "left": ImpalaAction.LOOK_LEFT,
+    "right": ImpalaAction.LOOK_RIGHT,
+}
+
+@router.get("/vision-cells", response_model=VisionCellsResponse)
+def get_vision_cells(direction: str, lion_state: str = LionState.NORMAL.value):
+    # Same lookup table the engine uses, so the drawn area matches the game exactly
+    if direction not in VISION_DIRECTIONS:
+        raise HTTPException(status_code=400, detail="Invalid direction. Use 'front', 'left', or 'right'.")
+    try:
+        state = LionState(lion_state)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid lion state")
+
+    table = VisionCalculator().visibility_table
+    visible = table[:, LION_STATE_CODE[state], IMPALA_ACTION_CODE[VISION_DIRECTIONS[direction]]]
+    cells = [list(cell_position(int(c))) for c in visible.nonzero()[0]]
+
+    return VisionCellsResponse(direction=direction, lion_state=state.value, cells=cells)
+
 @router.get("/history", response_model=HistoryResponse)
 def get_history():
-    # We need to store history in GameState
-    # Current implementation of GameState has self.history = [] but it's not populated in GameEngine.step yet.
-    # We need to update GameEngine to populate history.
-    
+    # Read through the module, the hunt state is replaced on every /api/hunting/start
+    current_hunt_state = hunting.current_hunt_state
     if current_hunt_state is None:
         return HistoryResponse(history=[])
         
-    # Assuming GameEngine populates history now (need to update it)
-    return HistoryResponse(history=current_hunt_state.history)
+    # GameEngine records history in columns, the dicts are built here
+    return HistoryResponse(history=current_hunt_state.history.to_list())
@@ -0,0 +1,195 @@
+from typing import Sequence, Tuple, List
+import numpy as np
+from app.core.encoding import (
+    GRID_SIZE, IMPALA_START,
+    LION_STATE_CODE, IMPALA_STATE_CODE, IMPALA_ACTION_CODE, LION_ACTION_CODE,
+    LION_STATES, IMPALA_STATES,
+    STATUS_IN_PROGRESS, STATUS_SUCCESS, STATUS_FAILED, STATUS_CODE, STATUS_NAMES,
+)
+from app.core.entities import LionState, ImpalaState, ImpalaAction, LionAction
+from app.core.vision_calculator import VisionCalculator
+from app.core.pathing import MovementTable
+from app.core.capture_oracle import CaptureOracle
+from app.core.game_engine import TERMINATION_RULES
+
+LION_NORMAL = LION_STATE_CODE[LionState.NORMAL]
+LION_HIDDEN = LION_STATE_CODE[LionState.HIDDEN]
+LION_ATTACKING = LION_STATE_CODE[LionState.ATTACKING]
+
+IMPALA_NORMAL = IMPALA_STATE_CODE[ImpalaState.NORMAL]
+IMPALA_DRINKING = IMPALA_STATE_CODE[ImpalaState.DRINKING]
+IMPALA_FLEEING = IMPALA_STATE_CODE[ImpalaState.FLEEING]
+
+ACT_ADVANCE = LION_ACTION_CODE[LionAction.ADVANCE]
+ACT_HIDE = LION_ACTION_CODE[LionAction.HIDE]
+ACT_ATTACK = LION_ACTION_CODE[LionAction.ATTACK]
+
+DRINK = IMPALA_ACTION_CODE[ImpalaAction.DRINK]
+FLEE = IMPALA_ACTION_CODE[ImpalaAction.FLEE]
+
+
+class BatchGameEngine:
+    """
+    Runs N hunting episodes side by side as NumPy arrays.
+    Applies the same rules as GameEngine.step to every active episode in one call.
+    Episodes that already finished are left untouched and get a reward of 0.
+    """
+
+    def __init__(self, lion_start_positions: Sequence[Tuple[int, int]], termination: str = "exact"):
+        if termination not in TERMINATION_RULES:
+            raise ValueError(f"Invalid termination rule '{termination}'. Use one of {', '.join(TERMINATION_RULES)}.")
+        self.termination = termination
+        self.vision_calculator = VisionCalculator()
+        self.movement_table = MovementTable()
+        self.capture_oracle = CaptureOracle() if termination == "exact" else None
+        self.reset(lion_start_positions)
+
+    def reset(self, lion_start_positions: Sequence[Tuple[int, int]]):
+        starts = np.asarray(lion_start_positions, dtype=np.int16).reshape(-1, 2)
+        n = len(starts)
+        self.size = n
+        self.lion_pos = starts.copy()
+        self.lion_state = np.full(n, LION_NORMAL, dtype=np.int8)
+        self.impala_pos = np.tile(np.array(IMPALA_START, dtype=np.int16), (n, 1))
+        self.impala_state = np.full(n, IMPALA_NORMAL, dtype=np.int8)
+        self.flee_start_time = np.full(n, -1, dtype=np.int32)
+        self.time_step = np.zeros(n, dtype=np.int32)
+        self.status = np.full(n, STATUS_IN_PROGRESS, dtype=np.int8)
+
+    @classmethod
+    def from_game_states(cls, states: List["GameState"], termination: str = "exact") -> "BatchGameEngine":
+        """Builds a batch holding a copy of each scalar GameState."""
+        engine = cls([s.lion.position for s in states], termination=termination)
+        engine.lion_state[:] = [LION_STATE_CODE[s.lion.state] for s in states]
+        engine.impala_pos[:] = [s.impala.position for s in states]
+        engine.impala_state[:] = [IMPALA_STATE_CODE[s.impala.state] for s in states]
+        engine.flee_start_time[:] = [s.flee_start_time for s in states]
+        engine.time_step[:] = [s.time_step for s in states]
+        engine.status[:] = [STATUS_CODE[s.status] for s in states]
+        return engine
+
+    def episode(self, i: int) -> dict:
+        """Readable view of episode i, mainly for debugging and tests."""
+        return {
+            "lion_pos": tuple(int(v) for v in self.lion_pos[i]),
+            "lion_state": LION_STATES[self.lion_state[i]],
+            "impala_pos": tuple(int(v) for v in self.impala_pos[i]),
+            "impala_state": IMPALA_STATES[self.impala_state[i]],
+            "flee_start_time": int(self.flee_start_time[i]),
+            "time_step": int(self.time_step[i]),
+            "status": STATUS_NAMES[self.status[i]],
+        }
+
+    @property
+    def active(self) -> np.ndarray:
+        return self.status == STATUS_IN_PROGRESS
+
+    def step(self, lion_actions: np.ndarray, impala_actions: np.ndarray,
+             reward_system=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Executes one time step for every active episode.
+        lion_actions / impala_actions are integer codes (see app.core.encoding), one per episode.
+        With a reward_system (app.learning.reward_system.RewardSystem) the rewards are its shaped
+        training rewards instead of the engine rewards.
+        Returns: rewards (float array), done (bool array, True for every finished episode)
+        """
+        n = self.size
+        rewards = np.zeros(n, dtype=np.float64)
+        idx = np.flatnonzero(self.status == STATUS_IN_PROGRESS)
+        if len(idx) == 0:
+            return rewards, np.ones(n, dtype=bool)
+
+        lion_actions = np.asarray(lion_actions, dtype=np.int8)[idx]
+        impala_actions = np.asarray(impala_actions, dtype=np.int8)[idx]
+        if reward_system is not None:
+            requested_actions = lion_actions
+            prev_lion_pos = self.lion_pos[idx]
+            prev_impala_pos = self.impala_pos[idx]
+            prev_impala_state = self.impala_state[idx]
+
+        t = self.time_step[idx] + 1
+        self.time_step[idx] = t
+
+        lion_x = self.lion_pos[idx, 0]
+        lion_y = self.lion_pos[idx, 1]
+        imp_x = self.impala_pos[idx, 0]
+        imp_y = self.impala_pos[idx, 1]
+        lion_state = self.lion_state[idx]
+        impala_state = self.impala_state[idx]
+        flee_start = self.flee_start_time[idx]
+
+        # 1. Impala acts: fleeing impalas keep running, the rest drink or look around
+        was_fleeing = impala_state == IMPALA_FLEEING
+        impala_actions = np.where(was_fleeing, FLEE, impala_actions).astype(np.int8)
+        if was_fleeing.any():
+            speed = self._get_impala_speed(t - flee_start)
+            dy = lion_y - imp_y
+            direction = np.where(dy > 0, -1, np.where(dy < 0, 1, np.where(imp_y < 9, -1, 1)))
+            fled_y = np.clip(imp_y + direction * speed, 0, GRID_SIZE - 1)
+            imp_y = np.where(was_fleeing, fled_y, imp_y).astype(np.int16)
+        impala_state = np.where(
+            was_fleeing, IMPALA_FLEEING,
+            np.where(impala_actions == DRINK, IMPALA_DRINKING, IMPALA_NORMAL)
+        ).astype(np.int8)
+
+        # 2. Lion acts (attack persistence)
+        lion_actions = np.where(lion_state == LION_ATTACKING, ACT_ATTACK, lion_actions)
+        attack = lion_actions == ACT_ATTACK
+        advance = lion_actions == ACT_ADVANCE
+        hide = lion_actions == ACT_HIDE
+
+        lion_state = np.where(attack, LION_ATTACKING,
+                              np.where(hide, LION_HIDDEN,
+                                       np.where(advance, LION_NORMAL, lion_state))).astype(np.int8)
+
+        moving = attack | advance
+        mx, my = self.movement_table.step_towards_batch(lion_x, lion_y, imp_x, imp_y)
+        lion_x = np.where(moving, mx, lion_x)
+        lion_y = np.where(moving, my, lion_y)
+        mx, my = self.movement_table.step_towards_batch(lion_x, lion_y, imp_x, imp_y)
+        lion_x = np.where(attack, mx, lion_x)
+        lion_y = np.where(attack, my, lion_y)
+
+        # 3. Flee conditions
+        dist = np.sqrt((lion_x - imp_x).astype(np.float64) ** 2 + (lion_y - imp_y).astype(np.float64) ** 2)
+        visible = self.vision_calculator.are_lions_visible(lion_x, lion_y, lion_state, impala_actions)
+        trigger = (impala_state != IMPALA_FLEEING) & (visible | attack | (dist < 3))
+        impala_state = np.where(trigger, IMPALA_FLEEING, impala_state).astype(np.int8)
+        flee_start = np.where(trigger, t + 1, flee_start)
+
+        # 4. End conditions
+        success = dist <= 1.0
+        fleeing = impala_state == IMPALA_FLEEING
+        if self.termination == "exact":
+            catchable = self.capture_oracle.can_catch_batch(lion_x, lion_y, lion_state, imp_y, t + 1 - flee_start)
+            failed = fleeing & ~success & ~catchable
+        else:
+            impala_speed = self._get_impala_speed(t - flee_start)
+            failed = fleeing & ~success & (((impala_speed > 2) & (dist > 1)) | (dist > 10))
+
+        step_rewards = np.where(success, 100.0, np.where(failed, -100.0, -1.0))
+        status = np.where(success, STATUS_SUCCESS, np.where(failed, STATUS_FAILED, STATUS_IN_PROGRESS))
+
+        # Write back
+        self.lion_pos[idx, 0] = lion_x
+        self.lion_pos[idx, 1] = lion_y
+        self.lion_state[idx] = lion_state
+        self.impala_pos[idx, 0] = imp_x
+        self.impala_pos[idx, 1] = imp_y
+        self.impala_state[idx] = impala_state
+        self.flee_start_time[idx] = flee_start
+        self.status[idx] = status
+        if reward_system is None:
+            rewards[idx] = step_rewards
+        else:
+            rewards[idx] = reward_system.calculate_rewards(
+                prev_lion_pos, prev_impala_pos, prev_impala_state, requested_actions,
+                self.lion_pos[idx], self.impala_pos[idx], impala_state, status
+            )
+
+        return rewards, self.status != STATUS_IN_PROGRESS
+
+    @staticmethod
+    def _get_impala_speed(duration: np.ndarray) -> np.ndarray:
+        # Same acceleration as GameEngine._get_impala_speed
+        return duration + 1
@@ -0,0 +1,81 @@
+from typing import Tuple
+import numpy as np
+from app.core.entities import LionState
+from app.core.encoding import GRID_SIZE, NUM_CELLS, IMPALA_START, LION_STATE_CODE
+from app.core.pathing import MovementTable
+
+LION_ATTACKING = LION_STATE_CODE[LionState.ATTACKING]
+
+# From this flee duration on the impala covers the whole board in one step
+MAX_DURATION = GRID_SIZE - 1
+
+
+class CaptureOracle:
+    """
+    Exact answer to "can the lion still catch the fleeing impala?".
+
+    A fleeing impala runs along its row, away from the lion's column, one square faster
+    every step, and has escaped once it reaches the edge of the board. The lion moves
+    1 square when advancing and 2 when attacking, and an attacking lion cannot switch
+    back. Every fleeing configuration (lion cell, attacking or not, impala column,
+    flee duration of the coming step) is solved once by backward induction over the
+    duration: a configuration is catchable if some lion action catches the impala this
+    step, or leads to a catchable configuration without the impala reaching the edge.
+    """
+    _shared = None
+
+    def __init__(self):
+        if CaptureOracle._shared is None:
+            CaptureOracle._shared = self._build(MovementTable())
+        self.table = CaptureOracle._shared
+
+    def can_catch(self, lion_pos: Tuple[int, int], lion_state: LionState, impala_col: int, duration: int) -> bool:
+        """
+        duration: flee duration of the next step, i.e. time_step + 1 - flee_start_time.
+        """
+        attacking = 1 if lion_state == LionState.ATTACKING else 0
+        return bool(self.table[min(duration, MAX_DURATION), lion_pos[0] * GRID_SIZE + lion_pos[1], attacking, impala_col])
+
+    def can_catch_batch(self, lion_x: np.ndarray, lion_y: np.ndarray, lion_states: np.ndarray,
+                        impala_cols: np.ndarray, durations: np.ndarray) -> np.ndarray:
+        """Batched can_catch over arrays (lion states as integer codes)."""
+        cells = lion_x.astype(np.intp) * GRID_SIZE + lion_y
+        attacking = (lion_states == LION_ATTACKING).astype(np.intp)
+        return self.table[np.minimum(durations, MAX_DURATION), cells, attacking, impala_cols]
+
+    @staticmethod
+    def _build(movement: MovementTable) -> np.ndarray:
+        row = IMPALA_START[0]
+        cells = np.arange(NUM_CELLS)
+        cols = np.arange(GRID_SIZE)
+        # Grid over (cell, impala column)
+        cell = np.repeat(cells, GRID_SIZE)
+        col = np.tile(cols, NUM_CELLS)
+        lion_x, lion_y = np.divmod(cell, GRID_SIZE)
+
+        table = np.zeros((MAX_DURATION + 1, NUM_CELLS, 2, GRID_SIZE), dtype=bool)
+        for duration in range(MAX_DURATION, -1, -1):
+            nxt = table[min(duration + 1, MAX_DURATION)]
+
+            # Impala runs first (same rule as GameEngine._handle_flee_movement)
+            dy = lion_y - col
+            direction = np.where(dy > 0, -1, np.where(dy < 0, 1, np.where(col < 9, -1, 1)))
+            new_col = np.clip(col + direction * (duration + 1), 0, GRID_SIZE - 1)
+            at_edge = (new_col == 0) | (new_col == GRID_SIZE - 1)
+            target = row * GRID_SIZE + new_col
+
+            def outcome(moves: int, attacking: int) -> np.ndarray:
+                c = cell
+                for _ in range(moves):
+                    c = movement.next_hop[target, c].astype(np.intp)
+                cx, cy = np.divmod(c, GRID_SIZE)
+                caught = (cx - row) ** 2 + (cy - new_col) ** 2 <= 1
+                return caught | (~at_edge & nxt[c, attacking, new_col])
+
+            attack = outcome(2, 1)
+            free = attack | outcome(1, 0) | outcome(0, 0)
+            table[duration, :, 1, :] = attack.reshape(NUM_CELLS, GRID_SIZE)
+            table[duration, :, 0, :] = free.reshape(NUM_CELLS, GRID_SIZE)
+
+        table.setflags(write=False)
+        return table
@@ -0,0 +1,36 @@
+from typing import Tuple
+from app.core.entities import LionState, ImpalaState, ImpalaAction, LionAction
+
+# Integer codes shared by the array based components (batch engine, lookup tables).
+# The code of an enum member is its position in the enum declaration.
+
+GRID_SIZE = 19
+NUM_CELLS = GRID_SIZE * GRID_SIZE
+IMPALA_START = (9, 9)
+
+LION_STATES = tuple(LionState)
+IMPALA_STATES = tuple(ImpalaState)
+IMPALA_ACTIONS = tuple(ImpalaAction)
+LION_ACTIONS = tuple(LionAction)
+
+LION_STATE_CODE = {s: i for i, s in enumerate(LION_STATES)}
+IMPALA_STATE_CODE = {s: i for i, s in enumerate(IMPALA_STATES)}
+IMPALA_ACTION_CODE = {a: i for i, a in enumerate(IMPALA_ACTIONS)}
+LION_ACTION_CODE = {a: i for i, a in enumerate(LION_ACTIONS)}
+
+# Episode status
+STATUS_IN_PROGRESS = 0
+STATUS_SUCCESS = 1
+STATUS_FAILED = 2
+STATUS_NAMES = ("in_progress", "success", "failed")
+STATUS_CODE = {name: i for i, name in enumerate(STATUS_NAMES)}
+
+
+def cell_index(pos: Tuple[int, int]) -> int:
+    """Flattens a (row, col) position into a cell index of the 19x19 grid."""
+    return pos[0] * GRID_SIZE + pos[1]
+
+
+def cell_position(index: int) -> Tuple[int, int]:
+    """Inverse of cell_index."""
+    return divmod(index, GRID_SIZE)
@@ -39,49 +39,9 @@ class Lion(Entity):
     state: LionState = LionState.NORMAL
     
     def move_towards(self, target: Tuple[int, int]):
-        """Moves one step towards the target."""
-        x, y = self.position
-        tx, ty = target
-        
-        dx = tx - x
-        dy = ty - y
-        
-        # Normalize to 1 step
-        step_x = 0
-        step_y = 0
-        
-        if abs(dx) >= abs(dy):
-            if dx > 0: step_x = 1
-            elif dx < 0: step_x = -1
-            # If dy is also significant, we might move diagonally? 
-            # "El león siempre avanza 1 cuadro en línea recta hacia el impala"
-            # Usually implies Chebyshev distance or Euclidean rounded.
-            # Let's assume 8-way movement is allowed if it's "straight line".
-            # If strictly grid (Manhattan), it's different.
-            # Given "19x19 map" and "triangles", diagonal seems likely.
-            if dy > 0 and abs(dy) > abs(dx) * 0.5: step_y = 1
-            elif dy < 0 and abs(dy) > abs(dx) * 0.5: step_y = -1
-        else:
-            if dy > 0: step_y = 1
-            elif dy < 0: step_y = -1
-            if dx > 0 and abs(dx) > abs(dy) * 0.5: step_x = 1
-            elif dx < 0 and abs(dx) > abs(dy) * 0.5: step_x = -1
-
-        # Simple approach: move to the neighbor that is closest to target
-        # This is more robust
-        best_dist = float('inf')
-        best_pos = (x, y)
-        
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0: continue
-                nx, ny = x + dx, y + dy
-                dist = ((nx - tx)**2 + (ny - ty)**2)**0.5
-                if dist < best_dist:
-                    best_dist = dist
-                    best_pos = (nx, ny)
-        
-        self.position = best_pos
+        """Moves one step towards the target, going around the waterhole."""
+        from app.core.pathing import MovementTable
+        self.position = MovementTable().step_towards(self.position, target)
 
 class Impala(Entity):
     type: EntityType = EntityType.IMPALA
@@ -1,29 +1,57 @@
 from typing import Tuple, List, Optional
 from app.core.entities import Lion, Impala, GameMap, LionAction, ImpalaAction, LionState, ImpalaState
 from app.core.vision_calculator import VisionCalculator
+from app.core.sim_state import SimLion, SimImpala
+from app.core.history import EpisodeHistory
+from app.core.capture_oracle import CaptureOracle
 from app.utils.geometry import calculate_distance
 
 class GameState:
-    def __init__(self, lion_start_pos: Tuple[int, int]):
-        self.map = GameMap()
-        self.lion = Lion(position=lion_start_pos)
-        self.impala = Impala(position=(9, 9))
+    __slots__ = ("lion", "impala", "time_step", "history", "status", "flee_start_time")
+
+    # The map never changes, every state shares the same instance
+    map = GameMap()
+
+    def __init__(self, lion_start_pos: Tuple[int, int], record_history: bool = True):
+        self.lion = SimLion(lion_start_pos)
+        self.impala = SimImpala((9, 9))
         self.time_step = 0
-        self.history = []
+        self.history = EpisodeHistory() if record_history else None
         self.status = "in_progress" # in_progress, success, failed
         self.flee_start_time = -1
 
+    def snapshot(self) -> "GameState":
+        """Cheap copy of the current state without the history (e.g. prev_state for reward shaping)."""
+        snap = GameState.__new__(GameState)
+        snap.lion = self.lion.copy()
+        snap.impala = self.impala.copy()
+        snap.time_step = self.time_step
+        snap.history = None
+        snap.status = self.status
+        snap.flee_start_time = self.flee_start_time
+        return snap
+
     def to_dict(self):
         return {
-            "lion": self.lion.dict(),
-            "impala": self.impala.dict(),
+            "lion": self.lion.to_model().dict(),
+            "impala": self.impala.to_model().dict(),
             "time_step": self.time_step,
             "status": self.status
         }
 
+TERMINATION_RULES = ("exact", "heuristic")
+
 class GameEngine:
-    def __init__(self):
+    def __init__(self, termination: str = "exact"):
+        """
+        termination: "exact" ends a flee as soon as the CaptureOracle says the lion can no
+        longer catch the impala; "heuristic" keeps the original speed / distance cutoff.
+        """
+        if termination not in TERMINATION_RULES:
+            raise ValueError(f"Invalid termination rule '{termination}'. Use one of {', '.join(TERMINATION_RULES)}.")
+        self.termination = termination
         self.vision_calculator = VisionCalculator()
+        self.capture_oracle = CaptureOracle() if termination == "exact" else None
 
     def step(self, state: GameState, lion_action: LionAction, impala_action: ImpalaAction) -> Tuple[GameState, float, bool, str]:
         """
@@ -125,41 +153,48 @@ class GameEngine:
         # Impala speed increases: 1, 1, 2, 3...
         # Lion attack speed: 2.
         # If Impala is fleeing, it's likely game over unless Lion is VERY close.
-        if state.impala.state == ImpalaState.FLEEING:
+        if state.impala.state == ImpalaState.FLEEING and not done:
             # If Lion didn't catch it this turn, check if it's possible.
-            # For simplicity, if Impala is fleeing and not caught yet, we might count as fail soon.
-            # But let's let it run a few steps?
             # Prompt: "La incursión de cacería termina cuando el sistema detecta que: El león no podrá alcanzar al impala."
-            # If Impala speed > Lion speed and distance is increasing, fail.
-            
-            flee_duration = state.time_step - state.flee_start_time
-            impala_speed = self._get_impala_speed(flee_duration)
-            
-            if impala_speed > 2 and dist > 1:
-                state.status = "failed"
-                done = True
-                reward = -100.0
-                info += " Impala escaped."
-            elif dist > 10: # Arbitrary cutoff
-                state.status = "failed"
-                done = True
-                reward = -100.0
+            if self.termination == "exact":
+                next_duration = state.time_step + 1 - state.flee_start_time
+                if not self.capture_oracle.can_catch(state.lion.position, state.lion.state,
+                                                     state.impala.position[1], next_duration):
+                    state.status = "failed"
+                    done = True
+                    reward = -100.0
+                    info += " Impala escaped."
+            else:
+                # If Impala speed > Lion speed and distance is increasing, fail.
+                flee_duration = state.time_step - state.flee_start_time
+                impala_speed = self._get_impala_speed(flee_duration)
+
+                if impala_speed > 2 and dist > 1:
+                    state.status = "failed"
+                    done = True
+                    reward = -100.0
+                    info += " Impala escaped."
+                elif dist > 10: # Arbitrary cutoff
+                    state.status = "failed"
+                    done = True
+                    reward = -100.0
         
         # Step penalty
         if not done:
             reward -= 1.0
             
-        # Update History
-        state.history.append({
-            "time_step": state.time_step,
-            "lion_pos": state.lion.position,
-            "impala_pos": state.impala.position,
-            "lion_state": state.lion.state,
-            "impala_state": state.impala.state,
-            "lion_action": lion_action.value,
-            "impala_action": impala_action.value,
-            "info": info
-        })
+        # Update History (None when recording is off for this episode)
+        if state.history is not None:
+            state.history.record(
+                state.time_step,
+                state.lion.position,
+                state.impala.position,
+                state.lion.state,
+                state.impala.state,
+                lion_action,
+                impala_action,
+                info
+            )
             
         return state, reward, done, info
 
@@ -0,0 +1,150 @@
+import threading
+from collections.abc import Sequence
+from typing import Tuple, Optional
+import numpy as np
+from app.core.entities import LionState, ImpalaState, LionAction, ImpalaAction
+from app.core.encoding import (
+    LION_STATES, IMPALA_STATES, LION_ACTIONS, IMPALA_ACTIONS,
+    LION_STATE_CODE, IMPALA_STATE_CODE, LION_ACTION_CODE, IMPALA_ACTION_CODE,
+)
+
+HISTORY_MODES = ("off", "sampled", "full")
+# With full histories, the episodes whose log is saved
+LOG_EVERY = 100
+
+
+class EpisodeHistory(Sequence):
+    """
+    Per-step history of one episode stored in typed columns.
+    Reads return the same dicts GameEngine used to append, built on demand.
+    Once max_steps entries are stored the oldest ones are overwritten.
+    """
+    # Info strings repeat a lot ("Flee triggered: ...", " Lion caught Impala!"), keep one copy of each
+    # (shared by every history; new strings are added under the lock, histories are built on several threads)
+    _info_texts = [""]
+    _info_codes = {"": 0}
+    _info_lock = threading.Lock()
+
+    def __init__(self, capacity: int = 64, max_steps: int = 10000):
+        self.max_steps = max_steps
+        self._start = 0
+        self._len = 0
+        self._allocate(min(capacity, max_steps))
+
+    def _allocate(self, capacity: int):
+        old = self._columns() if hasattr(self, "time_step") else None
+        self.time_step = np.empty(capacity, dtype=np.int32)
+        self.lion_pos = np.empty((capacity, 2), dtype=np.int16)
+        self.impala_pos = np.empty((capacity, 2), dtype=np.int16)
+        self.lion_state = np.empty(capacity, dtype=np.int8)
+        self.impala_state = np.empty(capacity, dtype=np.int8)
+        self.lion_action = np.empty(capacity, dtype=np.int8)
+        self.impala_action = np.empty(capacity, dtype=np.int8)
+        self.info = np.empty(capacity, dtype=np.int16)
+        if old is not None:
+            for new_col, old_col in zip(self._columns(), old):
+                new_col[:self._len] = old_col[:self._len]
+
+    def _columns(self):
+        return (self.time_step, self.lion_pos, self.impala_pos, self.lion_state,
+                self.impala_state, self.lion_action, self.impala_action, self.info)
+
+    def record(self, time_step: int, lion_pos: Tuple[int, int], impala_pos: Tuple[int, int],
+               lion_state: LionState, impala_state: ImpalaState,
+               lion_action: LionAction, impala_action: ImpalaAction, info: str):
+        capacity = len(self.time_step)
+        if self._len < capacity:
+            i = self._len
+            self._len += 1
+        elif capacity < self.max_steps:
+            self._allocate(min(capacity * 2, self.max_steps))
+            i = self._len
+            self._len += 1
+        else:
+            # Full: overwrite the oldest entry
+            i = self._start
+            self._start = (self._start + 1) % capacity
+
+        code = self._info_codes.get(info)
+        if code is None:
+            code = self._add_info(info)
+
+        self.time_step[i] = time_step
+        self.lion_pos[i] = lion_pos
+        self.impala_pos[i] = impala_pos
+        self.lion_state[i] = LION_STATE_CODE[lion_state]
+        self.impala_state[i] = IMPALA_STATE_CODE[impala_state]
+        self.lion_action[i] = LION_ACTION_CODE[lion_action]
+        self.impala_action[i] = IMPALA_ACTION_CODE[impala_action]
+        self.info[i] = code
+
+    @classmethod
+    def _add_info(cls, info: str) -> int:
+        with cls._info_lock:
+            code = cls._info_codes.get(info)
+            if code is None:
+                # The text goes in before its code is published, so readers never miss it
+                code = len(cls._info_texts)
+                cls._info_texts.append(info)
+                cls._info_codes[info] = code
+            return code
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("history index out of range")
+        i = (self._start + index) % len(self.time_step)
+        return {
+            "time_step": int(self.time_step[i]),
+            "lion_pos": (int(self.lion_pos[i, 0]), int(self.lion_pos[i, 1])),
+            "impala_pos": (int(self.impala_pos[i, 0]), int(self.impala_pos[i, 1])),
+            "lion_state": LION_STATES[self.lion_state[i]],
+            "impala_state": IMPALA_STATES[self.impala_state[i]],
+            "lion_action": LION_ACTIONS[self.lion_action[i]].value,
+            "impala_action": IMPALA_ACTIONS[self.impala_action[i]].value,
+            "info": self._info_texts[self.info[i]]
+        }
+
+    def find(self, time_step: int) -> Optional[dict]:
+        """Entry recorded at the given time step, or None."""
+        hits = np.flatnonzero(self.time_step[:self._len] == time_step)
+        if len(hits) == 0:
+            return None
+        index = (int(hits[0]) - self._start) % len(self.time_step)
+        return self[index]
+
+    def to_list(self) -> list:
+        return self[:]
+
+
+class HistoryRecorder:
+    """
+    Decides which training episodes keep a history.
+    mode: "off" (none), "sampled" (every sample_every-th episode) or "full" (all of them).
+    Training saves the log of every sampled episode, or of every LOG_EVERY-th one with "full".
+    """
+    def __init__(self, mode: str = "sampled", sample_every: int = 100):
+        if mode not in HISTORY_MODES:
+            raise ValueError(f"Invalid history mode '{mode}'. Use one of {', '.join(HISTORY_MODES)}.")
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self.mode = mode
+        self.sample_every = sample_every
+
+    def records(self, episode_idx: int) -> bool:
+        if self.mode == "full":
+            return True
+        if self.mode == "sampled":
+            return episode_idx % self.sample_every == 0
+        return False
+
+    def saves_log(self, episode_idx: int) -> bool:
+        if self.mode == "full":
+            return episode_idx % LOG_EVERY == 0
+        return self.records(episode_idx)
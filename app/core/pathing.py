@@ -0,0 +1,98 @@
+from typing import Tuple, Optional
+import numpy as np
+from app.core.entities import GameMap
+from app.core.encoding import GRID_SIZE, NUM_CELLS
+
+# Neighbor offsets in the order the original Lion.move_towards scanned them.
+# Used as the last tie-breaker so open-field movement is unchanged.
+NEIGHBOR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)]
+
+UNREACHABLE = np.iinfo(np.int16).max
+
+
+def waterhole_mask(game_map: Optional[GameMap] = None) -> np.ndarray:
+    """Boolean (19, 19) grid, True on the waterhole cells."""
+    game_map = game_map or GameMap()
+    mask = np.zeros((game_map.height, game_map.width), dtype=bool)
+    (x1, y1), (x2, y2) = game_map.waterhole_top_left, game_map.waterhole_bottom_right
+    mask[x1:x2 + 1, y1:y2 + 1] = True
+    return mask
+
+
+class MovementTable:
+    """
+    Precomputed 8-way pathing over the board.
+
+    distance[target, cell] is the number of single-square moves from cell to target
+    going around blocked cells (the waterhole). next_hop[target, cell] is the cell the
+    lion moves to when it advances one square towards target: the neighbor with the
+    smallest distance, then the smallest straight-line distance, then scan order.
+    A lion standing on its target stays there.
+    """
+    _shared = None
+
+    def __init__(self, blocked: Optional[np.ndarray] = None):
+        if blocked is None:
+            if MovementTable._shared is None:
+                MovementTable._shared = self._build(waterhole_mask())
+            self.distance, self.next_hop = MovementTable._shared
+        else:
+            self.distance, self.next_hop = self._build(blocked)
+
+    def step_towards(self, pos: Tuple[int, int], target: Tuple[int, int]) -> Tuple[int, int]:
+        """Position after moving one square from pos towards target."""
+        nxt = int(self.next_hop[target[0] * GRID_SIZE + target[1], pos[0] * GRID_SIZE + pos[1]])
+        return divmod(nxt, GRID_SIZE)
+
+    def step_towards_batch(self, x: np.ndarray, y: np.ndarray, tx: np.ndarray, ty: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched step_towards over coordinate arrays."""
+        nxt = self.next_hop[tx.astype(np.intp) * GRID_SIZE + ty, x.astype(np.intp) * GRID_SIZE + y]
+        return (nxt // GRID_SIZE).astype(x.dtype), (nxt % GRID_SIZE).astype(y.dtype)
+
+    @staticmethod
+    def _build(blocked: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        size = GRID_SIZE
+        cells = np.arange(NUM_CELLS)
+        cx, cy = np.divmod(cells, size)
+        passable = ~blocked.reshape(-1)
+
+        # Distance fields for every target at once, relaxed until stable.
+        # The target itself is always enterable, even if it is blocked.
+        dist = np.full((NUM_CELLS, NUM_CELLS), UNREACHABLE, dtype=np.int32)
+        dist[cells, cells] = 0
+        enterable = passable[None, :] | np.eye(NUM_CELLS, dtype=bool)
+
+        neighbors = []
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nx, ny = cx + dx, cy + dy
+            valid = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+            neighbors.append((np.where(valid, nx * size + ny, 0), valid))
+
+        while True:
+            best = dist.copy()
+            for n, valid in neighbors:
+                through = np.where(valid[None, :] & enterable[:, n], dist[:, n] + 1, UNREACHABLE)
+                np.minimum(best, through, out=best)
+            best = np.where(passable[None, :], best, dist)
+            if np.array_equal(best, dist):
+                break
+            dist = best
+
+        # Next hop: lexicographic (distance, squared straight-line distance, scan order)
+        tx, ty = cx[:, None], cy[:, None]
+        keys = []
+        for (n, valid), (dx, dy) in zip(neighbors, NEIGHBOR_OFFSETS):
+            ok = valid[None, :] & enterable[:, n]
+            d = dist[:, n].astype(np.int64)
+            euclid = (cx[n] - tx) ** 2 + (cy[n] - ty) ** 2
+            keys.append(np.where(ok, d * 4 * NUM_CELLS + euclid, np.iinfo(np.int64).max))
+        choice = np.argmin(np.stack(keys), axis=0)
+        neighbor_cells = np.stack([n for n, _ in neighbors])
+        next_hop = neighbor_cells[choice, cells[None, :]]
+        next_hop[cells, cells] = cells
+
+        distance = np.minimum(dist, UNREACHABLE).astype(np.int16)
+        next_hop = next_hop.astype(np.int16)
+        distance.setflags(write=False)
+        next_hop.setflags(write=False)
+        return distance, next_hop
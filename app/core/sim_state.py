@@ -0,0 +1,48 @@
+from typing import Tuple
+from app.core.entities import Lion, Impala, LionState, ImpalaState
+from app.core.pathing import MovementTable
+
+# Plain slotted counterparts of the pydantic Lion / Impala models.
+# The simulation mutates these on every step; the pydantic models are only
+# built when a state leaves the engine through the API (see to_model).
+
+_movement = None
+
+def _movement_table() -> MovementTable:
+    global _movement
+    if _movement is None:
+        _movement = MovementTable()
+    return _movement
+
+
+class SimLion:
+    __slots__ = ("position", "state")
+
+    def __init__(self, position: Tuple[int, int], state: LionState = LionState.NORMAL):
+        self.position = position
+        self.state = state
+
+    def move_towards(self, target: Tuple[int, int]):
+        """Moves one step towards the target, going around the waterhole."""
+        self.position = _movement_table().step_towards(self.position, target)
+
+    def copy(self) -> "SimLion":
+        return SimLion(self.position, self.state)
+
+    def to_model(self) -> Lion:
+        return Lion(position=self.position, state=self.state)
+
+
+class SimImpala:
+    __slots__ = ("position", "state", "facing_direction")
+
+    def __init__(self, position: Tuple[int, int], state: ImpalaState = ImpalaState.NORMAL, facing_direction: str = "north"):
+        self.position = position
+        self.state = state
+        self.facing_direction = facing_direction
+
+    def copy(self) -> "SimImpala":
+        return SimImpala(self.position, self.state, self.facing_direction)
+
+    def to_model(self) -> Impala:
+        return Impala(position=self.position, state=self.state, facing_direction=self.facing_direction)
@@ -1,8 +1,15 @@
 from typing import Tuple
+import numpy as np
 from app.utils.geometry import is_point_in_triangle
 from app.core.entities import ImpalaAction, LionState
+from app.core.encoding import (
+    GRID_SIZE, NUM_CELLS, LION_STATES, IMPALA_ACTIONS, LION_STATE_CODE, IMPALA_ACTION_CODE, cell_position,
+)
 
 class VisionCalculator:
+    # Visibility lookup table shared by every instance: [lion cell, lion state, impala action] -> bool
+    _table = None
+
     def __init__(self):
         # Points definition
         # 1 : (0,9) , 2 : (0,18) , 3 : (9,18) , 4 : (18,18) , 5 : (18,9) , 6 : (18 , 0), 7 : (9,0)
@@ -13,30 +20,62 @@ class VisionCalculator:
         self.p8 = (0, 0)
         self.I = (9, 9)
 
+        if VisionCalculator._table is None:
+            VisionCalculator._table = self._build_table()
+
+    @property
+    def visibility_table(self) -> np.ndarray:
+        """Read-only boolean table indexed by (cell_index(lion_pos), lion state code, impala action code)."""
+        return VisionCalculator._table
+
+    def _build_table(self) -> np.ndarray:
+        table = np.zeros((NUM_CELLS, len(LION_STATES), len(IMPALA_ACTIONS)), dtype=bool)
+        for cell in range(NUM_CELLS):
+            pos = cell_position(cell)
+            for s, lion_state in enumerate(LION_STATES):
+                for a, impala_action in enumerate(IMPALA_ACTIONS):
+                    table[cell, s, a] = self._compute_visibility(pos, lion_state, impala_action)
+        table.setflags(write=False)
+        return table
+
     def is_lion_visible(self, lion_pos: Tuple[int, int], lion_state: LionState, impala_action: ImpalaAction) -> bool:
         """
         Determines if the lion is visible to the impala.
         """
+        x, y = lion_pos
+        if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE:
+            return bool(self._table[x * GRID_SIZE + y, LION_STATE_CODE[lion_state], IMPALA_ACTION_CODE[impala_action]])
+        return self._compute_visibility(lion_pos, lion_state, impala_action)
+
+    def are_lions_visible(self, lion_x: np.ndarray, lion_y: np.ndarray, lion_states: np.ndarray, impala_actions: np.ndarray) -> np.ndarray:
+        """
+        Batched is_lion_visible. Positions, lion state codes and impala action codes are
+        arrays of the same length; positions must be on the board.
+        """
+        cells = lion_x.astype(np.intp) * GRID_SIZE + lion_y
+        return self._table[cells, lion_states, impala_actions]
+
+    def _compute_visibility(self, lion_pos: Tuple[int, int], lion_state: LionState, impala_action: ImpalaAction) -> bool:
         if lion_state == LionState.HIDDEN:
             return False
-            
+
         if impala_action == ImpalaAction.LOOK_FRONT:
             # Triangle (8, I, 2) -> West
             return is_point_in_triangle(lion_pos, self.p8, self.I, self.p2)
-            
+
         elif impala_action == ImpalaAction.LOOK_LEFT:
             # Triangle (8, I, 6) -> North
             return is_point_in_triangle(lion_pos, self.p8, self.I, self.p6)
-            
+
         elif impala_action == ImpalaAction.LOOK_RIGHT:
             # Triangle (2, I, 4) -> South
             return is_point_in_triangle(lion_pos, self.p2, self.I, self.p4)
-            
+
         elif impala_action == ImpalaAction.DRINK:
             # Can only see reflection? Prompt says: "cuando está bebiendo sólo puede ver su reflejo en el agua"
             # Implies it cannot see the lion.
             return False
-            
+
         elif impala_action == ImpalaAction.FLEE:
             # When fleeing, does it see?
             # "Una vez que el impala comienza a huir no podrá realizar otra acción."
@@ -0,0 +1,131 @@
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Optional
+
+CHECKPOINT_POLICIES = ("every", "interval", "improvement")
+
+
+class CheckpointPolicy:
+    """
+    Decides when training asks for a checkpoint:
+    - "every": every `every` incursions (the original i % 100 schedule),
+    - "interval": once `seconds` have passed since the last checkpoint,
+    - "improvement": every `every` incursions, but only when the recent success rate beats
+      the best one checkpointed so far by at least `min_improvement`.
+    """
+
+    def __init__(self, mode: str = "every", every: int = 100, seconds: float = 60.0, min_improvement: float = 0.01):
+        if mode not in CHECKPOINT_POLICIES:
+            raise ValueError(f"Unknown checkpoint policy: {mode}")
+        if every < 1 or seconds <= 0:
+            raise ValueError("checkpoint_every must be at least 1 and checkpoint_seconds positive")
+        self.mode = mode
+        self.every = every
+        self.seconds = seconds
+        self.min_improvement = min_improvement
+        self._last_time: Optional[float] = None
+        self._best_rate: Optional[float] = None
+
+    def due(self, start: int, end: int, success_rate: float = 0.0, now: Optional[float] = None) -> bool:
+        """Whether to checkpoint after playing incursions [start, end) (zero-based)."""
+        now = time.monotonic() if now is None else now
+        if self.mode == "interval":
+            due = self._last_time is None or now - self._last_time >= self.seconds
+        else:
+            due = start % self.every == 0 or start // self.every != (end - 1) // self.every
+            if due and self.mode == "improvement":
+                due = self._best_rate is None or success_rate >= self._best_rate + self.min_improvement
+        if due:
+            self._last_time = now
+            if self._best_rate is None or success_rate > self._best_rate:
+                self._best_rate = success_rate
+        return due
+
+
+class CheckpointWriter:
+    """
+    Background thread that writes checkpoints and logs so that serialization and disk I/O
+    never run on the training thread.
+
+    request() only flags that a checkpoint is wanted. When the thread is free it calls
+    `prepare` under `lock` (a cheap copy of the Knowledge Base, see
+    KnowledgeBase.prepare_checkpoint) and runs the returned write function outside it, so
+    training continues while the copy is serialized. Requests made while a checkpoint is
+    still pending coalesce into it, so at most one checkpoint waits behind the one being
+    written and it captures the state at the time it is prepared.
+    submit() queues one-off writes (e.g. incursion logs); those are never coalesced.
+    Failures are counted and kept in `last_error`; the thread keeps going.
+    """
+
+    def __init__(self, prepare: Callable[[], Callable[[], object]], lock=None):
+        self.prepare = prepare
+        self.lock = lock if lock is not None else threading.RLock()
+        self.requested = 0
+        self.coalesced = 0  # Requests absorbed by an already pending checkpoint
+        self.written = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_write_seconds = 0.0
+        self._pending = False
+        self._busy = False
+        self._writes = deque()
+        self._changed = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def request(self):
+        with self._changed:
+            self.requested += 1
+            if self._pending:
+                self.coalesced += 1
+            self._pending = True
+            self._start()
+            self._changed.notify_all()
+
+    def submit(self, write: Callable[[], object]):
+        with self._changed:
+            self._writes.append(write)
+            self._start()
+            self._changed.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every requested checkpoint and queued write is on disk. False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: not (self._pending or self._writes or self._busy), timeout)
+
+    def _start(self):
+        # Caller holds self._changed
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._pending or self._writes)
+                self._busy = True
+                if self._writes:
+                    write, checkpoint = self._writes.popleft(), False
+                else:
+                    self._pending, checkpoint = False, True
+            try:
+                if checkpoint:
+                    with self.lock:
+                        write = self.prepare()
+                start = time.perf_counter()
+                write()
+                self.last_write_seconds = time.perf_counter() - start
+                failed = False
+            except Exception:
+                failed = True
+                self.last_error = traceback.format_exc()
+                print(f"Checkpoint writer failed:\n{self.last_error}")
+            with self._changed:
+                self._busy = False
+                if checkpoint:
+                    if failed:
+                        self.errors += 1
+                    else:
+                        self.written += 1
+                self._changed.notify_all()
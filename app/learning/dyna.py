@@ -0,0 +1,92 @@
+from typing import Tuple
+import numpy as np
+
+
+class DynaModel:
+    """
+    Learned model of the environment for Dyna-Q planning on the dense Q-table.
+
+    For every (state, action) pair the model keeps up to `max_outcomes` observed outcomes
+    (next state, done) with how often each was seen and the sum of their rewards, in fixed
+    (num_states * num_actions, max_outcomes) arrays. When a pair has more distinct outcomes
+    than slots, a new outcome replaces the least seen one. Simulated transitions are sampled
+    in batches: (state, action) uniformly among the observed pairs, then an outcome with its
+    empirical probability and mean reward.
+    """
+
+    def __init__(self, num_states: int, num_actions: int, max_outcomes: int = 8, seed: int = None):
+        self.num_actions = num_actions
+        self.max_outcomes = max_outcomes
+        pairs = num_states * num_actions
+        self.next_states = np.zeros(pairs * max_outcomes, dtype=np.int32)
+        self.dones = np.zeros(pairs * max_outcomes, dtype=bool)
+        self.counts = np.zeros(pairs * max_outcomes, dtype=np.int32)
+        self.reward_sums = np.zeros(pairs * max_outcomes, dtype=np.float64)
+        # Running totals of the counts along each pair's slots, used to sample an outcome
+        self.cumulative = np.zeros((pairs, max_outcomes), dtype=np.int64)
+
+        self._slots = {}  # (pair, next_state, done) -> flat slot
+        self._used = {}  # pair -> slots in use
+        self._observed = np.empty(pairs, dtype=np.int64)  # pairs seen so far, in order
+        self._num_observed = 0
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self._num_observed
+
+    def observe(self, state: int, action: int, reward: float, next_state: int, done: bool):
+        pair = state * self.num_actions + action
+        # Terminal outcomes have no next state to back up from
+        outcome = (pair, 0 if done else next_state, done)
+        slot = self._slots.get(outcome)
+        if slot is None:
+            slot = self._new_slot(outcome)
+
+        self.counts[slot] += 1
+        self.reward_sums[slot] += reward
+        self.cumulative[pair, slot - pair * self.max_outcomes:] += 1
+
+    def _new_slot(self, outcome: Tuple[int, int, bool]) -> int:
+        pair, next_state, done = outcome
+        base = pair * self.max_outcomes
+        used = self._used.get(pair, 0)
+        if not used:
+            self._observed[self._num_observed] = pair
+            self._num_observed += 1
+
+        if used < self.max_outcomes:
+            slot = base + used
+            self._used[pair] = used + 1
+        else:
+            # Replace the least seen outcome of the pair
+            slot = base + int(np.argmin(self.counts[base:base + self.max_outcomes]))
+            del self._slots[(pair, int(self.next_states[slot]), bool(self.dones[slot]))]
+            self.counts[slot] = 0
+            self.reward_sums[slot] = 0.0
+            self.cumulative[pair] = np.cumsum(self.counts[base:base + self.max_outcomes])
+
+        self.next_states[slot] = next_state
+        self.dones[slot] = done
+        self._slots[outcome] = slot
+        return slot
+
+    def sample(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Simulated transitions (states, actions, rewards, next_states, dones), like replay samples."""
+        u = self._rng.random(2 * batch_size)
+        pairs = self._observed[(u[:batch_size] * self._num_observed).astype(np.intp)]
+        cumulative = self.cumulative[pairs]
+        targets = u[batch_size:] * cumulative[:, -1]
+        slots = pairs * self.max_outcomes + (cumulative <= targets[:, None]).sum(axis=1)
+
+        states = pairs // self.num_actions
+        actions = pairs - states * self.num_actions
+        rewards = self.reward_sums[slots] / self.counts[slots]
+        return states, actions, rewards, self.next_states[slots], self.dones[slots]
+
+    def clear(self):
+        self.counts.fill(0)
+        self.reward_sums.fill(0.0)
+        self.cumulative.fill(0)
+        self._slots.clear()
+        self._used.clear()
+        self._num_observed = 0
@@ -0,0 +1,93 @@
+import numpy as np
+
+TRACE_MODES = ("accumulating", "replacing")
+
+
+class EligibilityTraces:
+    """
+    Sparse eligibility traces over a dense Q-table.
+
+    Active (state, action) pairs are kept as flat indices into the Q-value array
+    (row * num_actions + action) with their eligibilities in a parallel array, so a
+    learning step updates, decays and prunes every active trace with a few array operations.
+    Same semantics as the dict traces of QLearningAgent: traces above `threshold` get the TD
+    update and are decayed, the others are dropped without update.
+
+    Dropped traces are zeroed in place and their slots compacted away only when the arrays
+    are full, so the per-step cost does not depend on how many traces were dropped.
+    """
+
+    def __init__(self, num_actions: int, mode: str = "accumulating", threshold: float = 0.01, capacity: int = 64):
+        if mode not in TRACE_MODES:
+            raise ValueError(f"Unknown trace mode: {mode}")
+        self.num_actions = num_actions
+        self.mode = mode
+        self.threshold = threshold
+        self._indices = np.empty(capacity, dtype=np.int64)
+        self._eligibility = np.zeros(capacity, dtype=np.float64)
+        self._slots = {}  # flat index -> position in the arrays
+        self._size = 0
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._eligibility[:self._size]))
+
+    def reset(self):
+        self._slots.clear()
+        self._eligibility[:self._size] = 0.0
+        self._size = 0
+
+    def visit(self, state: int, action: int):
+        """Marks (state, action) as just taken: +1 (accumulating) or set to 1 (replacing)."""
+        flat = state * self.num_actions + action
+        slot = self._slots.get(flat)
+        if slot is not None:
+            # A dropped trace has eligibility 0, so it restarts at 1 like a new one
+            if self.mode == "replacing":
+                self._eligibility[slot] = 1.0
+            else:
+                self._eligibility[slot] += 1.0
+            return
+
+        if self._size == self._indices.size:
+            self._compact()
+        slot = self._size
+        self._indices[slot] = flat
+        self._eligibility[slot] = 1.0
+        self._slots[flat] = slot
+        self._size = slot + 1
+
+    def apply(self, values: np.ndarray, step: float, decay: float, dirty: np.ndarray = None):
+        """
+        values[active] += step * eligibility, then eligibility *= decay; prunes small traces.
+        With `dirty` (per-state marks), the states of the traces are marked as written.
+        """
+        n = self._size
+        eligibility = self._eligibility[:n]
+        eligibility[eligibility <= self.threshold] = 0.0
+
+        # Indices are unique, so the scatter has no duplicate writes (dropped slots add 0)
+        values.reshape(-1)[self._indices[:n]] += step * eligibility
+        eligibility *= decay
+        if dirty is not None:
+            dirty[self._indices[:n] // self.num_actions] = True
+
+    def _compact(self):
+        """Removes dropped slots, growing the arrays if more than half of them are live."""
+        n = self._size
+        live = np.flatnonzero(self._eligibility[:n])
+        capacity = self._indices.size * 2 if live.size > n // 2 else self._indices.size
+
+        indices = np.empty(capacity, dtype=np.int64)
+        eligibility = np.zeros(capacity, dtype=np.float64)
+        indices[:live.size] = self._indices[live]
+        eligibility[:live.size] = self._eligibility[live]
+        self._indices, self._eligibility = indices, eligibility
+        self._size = live.size
+        self._slots = {flat: slot for slot, flat in enumerate(indices[:live.size].tolist())}
+
+    def items(self):
+        """((state, action), eligibility) pairs of the active traces."""
+        n = self._size
+        for flat, e in zip(self._indices[:n].tolist(), self._eligibility[:n].tolist()):
+            if e > 0.0:
+                yield divmod(flat, self.num_actions), e
@@ -0,0 +1,115 @@
+import random
+from time import perf_counter
+from typing import Optional, Tuple, Dict
+from app.core.entities import GameMap, ImpalaAction
+from app.core.game_engine import GameEngine, GameState
+from app.learning.reinforcement import QLearningAgent
+from app.learning.reward_system import RewardSystem
+from app.utils.profiler import PhaseProfiler
+
+RANDOM_IMPALA_ACTIONS = [a for a in ImpalaAction if a != ImpalaAction.FLEE]
+# Agent method that learns from each step: Q-learning with eligibility traces or plain one-step
+UPDATE_METHODS = ("learn_with_traces", "learn")
+# Phases of a step timed by the profiler
+STEP_PHASES = ("choose_action", "engine_step", "reward", "update")
+# Steps whose timings are buffered before they are handed to the profiler
+PROFILE_FLUSH_STEPS = 1024
+
+
+def choose_impala_action(request, time_step: int) -> ImpalaAction:
+    """Impala behavior during training: random, programmed sequence, or always looking front."""
+    if request.impala_mode == "random":
+        return random.choice(RANDOM_IMPALA_ACTIONS)
+    elif request.impala_mode == "programmed" and request.impala_sequence:
+        return request.impala_sequence[time_step % len(request.impala_sequence)]
+    return ImpalaAction.LOOK_FRONT
+
+
+class EpisodeRunner:
+    """
+    Plays one training incursion and feeds every step to the agent.
+    Shared by the in-process training loop, the parallel training workers and the benchmarks.
+    With a profiler, every step records the STEP_PHASES durations; they reach the profiler
+    in blocks of PROFILE_FLUSH_STEPS steps (call flush_profile at the end of training).
+    """
+    def __init__(self, agent: QLearningAgent, engine: GameEngine, reward_system: RewardSystem,
+                 update: str = "learn_with_traces", profiler: Optional[PhaseProfiler] = None):
+        if update not in UPDATE_METHODS:
+            raise ValueError(f"Unknown update method: {update}")
+        self.agent = agent
+        self.engine = engine
+        self.reward_system = reward_system
+        self.update = update
+        self.profiler = profiler
+        self._marks = []
+
+    def run(self, request, start_pos_idx: int, record_history: bool = False,
+            visits: Optional[Dict[Tuple[str, str], int]] = None) -> Tuple[GameState, int]:
+        """
+        Runs the incursion to the end. Returns the final state and the number of steps.
+        If visits is given, it counts how many times each (state, action) pair was taken.
+        """
+        start_pos = GameMap.valid_lion_positions[start_pos_idx]
+        state = GameState(lion_start_pos=start_pos, record_history=record_history)
+        done = False
+        steps = 0
+
+        # Reset eligibility traces at episode start
+        self.agent.reset_eligibility()
+        learn = getattr(self.agent, self.update)
+        # perf_counter marks at the STEP_PHASES boundaries, recorded in bulk
+        mark = self._marks.append if self.profiler is not None and self.profiler.enabled else None
+
+        while not done:
+            steps += 1
+            # Determine Impala action
+            impala_action = choose_impala_action(request, state.time_step)
+
+            # Get current state key (integer row with a dense Knowledge Base)
+            state_key = self.agent.encode_state(state.lion.position, impala_action, state.lion.state)
+
+            # Choose action
+            if mark:
+                mark(perf_counter())
+            lion_action = self.agent.choose_action(state_key)
+            if mark:
+                mark(perf_counter())
+            if visits is not None:
+                visit = (state_key, lion_action.value)
+                visits[visit] = visits.get(visit, 0) + 1
+
+            # Keep what the reward shaping needs from the previous state (positions are immutable tuples)
+            prev_lion_pos = state.lion.position
+            prev_impala_pos = state.impala.position
+            prev_impala_state = state.impala.state
+
+            # Execute action
+            next_state, base_reward, done, info = self.engine.step(state, lion_action, impala_action)
+            if mark:
+                mark(perf_counter())
+
+            # Calculate shaped reward
+            reward = self.reward_system.step_reward(prev_lion_pos, prev_impala_pos, prev_impala_state, lion_action, next_state)
+            if mark:
+                mark(perf_counter())
+
+            # Get next state key
+            next_impala_action = choose_impala_action(request, next_state.time_step)
+            next_state_key = self.agent.encode_state(next_state.lion.position, next_impala_action, next_state.lion.state)
+
+            # Learn (by default with eligibility traces for faster credit assignment)
+            learn(state_key, lion_action, reward, next_state_key, done)
+            if mark:
+                mark(perf_counter())
+
+            state = next_state
+
+        if mark and len(self._marks) >= PROFILE_FLUSH_STEPS * (len(STEP_PHASES) + 1):
+            self.flush_profile()
+        return state, steps
+
+    def flush_profile(self):
+        """Hands the buffered step timings to the profiler."""
+        if self.profiler is not None and self._marks:
+            self.profiler.record_marks(STEP_PHASES, self._marks)
+        self._marks = []
@@ -1,6 +1,8 @@
 import random
 from collections import deque
 from typing import Tuple, List
+import numpy as np
+from app.learning.q_table import DenseQTable, ACTION_NAMES, action_index
 
 class ExperienceReplay:
     """Experience replay buffer for storing and sampling past experiences"""
@@ -21,7 +23,192 @@ class ExperienceReplay:
     def size(self) -> int:
         """Return current buffer size"""
         return len(self.buffer)
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the stored tuples and their keys"""
+        import sys
+        total = sys.getsizeof(self.buffer)
+        for experience in self.buffer:
+            total += sys.getsizeof(experience) + sys.getsizeof(experience[0]) + sys.getsizeof(experience[3])
+        return total
     
     def clear(self):
         """Clear all experiences"""
         self.buffer.clear()
+
+
+class ArrayExperienceReplay:
+    """
+    Preallocated ring buffer with one typed NumPy column per field, used with the dense
+    Q-table backend. States are Q-table rows and actions LionAction positions, so there
+    are no Python objects per experience and a million experiences take about 14 MB.
+    """
+
+    def __init__(self, max_size=10000, seed=None):
+        self.max_size = max_size
+        self.states = np.zeros(max_size, dtype=np.int32)
+        self.actions = np.zeros(max_size, dtype=np.int8)
+        self.rewards = np.zeros(max_size, dtype=np.float32)
+        self.next_states = np.zeros(max_size, dtype=np.int32)
+        self.dones = np.zeros(max_size, dtype=bool)
+        self._next = 0  # Slot written by the next add
+        self._size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, state, action, reward: float, next_state, done: bool):
+        """Add experience to buffer (states as rows or string keys, action as LionAction or its value)"""
+        if isinstance(state, str):
+            state = DenseQTable.index_of(state)
+        if isinstance(next_state, str):
+            next_state = DenseQTable.index_of(next_state)
+        i = self._next
+        self.states[i] = state
+        self.actions[i] = action_index(action)
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self._next = (i + 1) % self.max_size
+        self._size = min(self._size + 1, self.max_size)
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """Uniform slots (with replacement); the whole buffer if it holds fewer than batch_size."""
+        if self._size < batch_size:
+            return (self._next - self._size + np.arange(self._size)) % self.max_size
+        return self.rng.integers(0, self._size, size=batch_size)
+
+    def sample_arrays(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Random batch as column arrays (states, actions, rewards, next_states, dones)"""
+        idx = self.sample_indices(batch_size)
+        return self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.dones[idx]
+
+    def sample(self, batch_size: int) -> List[Tuple]:
+        """Random batch as (state, action, reward, next_state, done) tuples, like ExperienceReplay"""
+        states, actions, rewards, next_states, dones = self.sample_arrays(batch_size)
+        return [
+            (s, ACTION_NAMES[a], r, ns, d)
+            for s, a, r, ns, d in zip(states.tolist(), actions.tolist(), rewards.tolist(), next_states.tolist(), dones.tolist())
+        ]
+
+    def size(self) -> int:
+        """Return current buffer size"""
+        return self._size
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the preallocated columns"""
+        return sum(col.nbytes for col in (self.states, self.actions, self.rewards, self.next_states, self.dones))
+
+    def clear(self):
+        """Clear all experiences"""
+        self._next = 0
+        self._size = 0
+
+
+class SumTree:
+    """
+    Binary tree of priority sums over the slots of a replay buffer, stored as an array:
+    node 1 is the root, node i has children 2i and 2i+1, and slot j is the leaf `leaves + j`.
+    Updates and sampling touch one node per level (O(log n)), vectorized over a batch.
+    """
+
+    def __init__(self, capacity: int):
+        self.leaves = 1 << max(0, (capacity - 1).bit_length())
+        self.depth = self.leaves.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def priorities(self, slots: np.ndarray) -> np.ndarray:
+        return self.tree[self.leaves + slots]
+
+    def update(self, slots: np.ndarray, priorities: np.ndarray):
+        """Sets the priority of the given slots and recomputes the sums above them."""
+        nodes = self.leaves + np.asarray(slots, dtype=np.int64)
+        # With duplicate slots the last priority wins; duplicate parents just write the same sum twice
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes >>= 1
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, targets: np.ndarray) -> np.ndarray:
+        """Slots whose cumulative priority range contains each target (0 <= target < total)."""
+        nodes = np.ones(len(targets), dtype=np.int64)
+        targets = np.array(targets, dtype=np.float64)
+        for _ in range(self.depth):
+            nodes <<= 1
+            left_sum = self.tree[nodes]
+            go_right = targets >= left_sum
+            targets -= left_sum * go_right
+            nodes += go_right
+        return nodes - self.leaves
+
+
+class PrioritizedExperienceReplay(ArrayExperienceReplay):
+    """
+    Proportional prioritized replay (Schaul et al.): experiences are sampled with probability
+    p_i^alpha / sum_k p_k^alpha, where p_i is the last absolute TD error of the experience
+    (new experiences get the highest priority seen so far). Importance-sampling weights
+    (N * P(i))^-beta, normalized by their maximum, correct the bias; beta grows to 1 over
+    `beta_steps` sampled batches.
+    """
+
+    def __init__(self, max_size=10000, seed=None, alpha=0.6, beta=0.4, beta_steps=100000, epsilon=0.01):
+        super().__init__(max_size=max_size, seed=seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = (1.0 - beta) / beta_steps
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(max_size)
+        self._pending = []  # Slots added since the last sample, inserted into the tree in one batch
+
+    def add(self, state, action, reward: float, next_state, done: bool):
+        """Add experience to buffer with the maximum priority"""
+        self._pending.append(self._next)
+        super().add(state, action, reward, next_state, done)
+
+    def _flush(self):
+        if self._pending:
+            slots = np.array(self._pending, dtype=np.int64)
+            self.tree.update(slots, np.full(len(slots), self.max_priority))
+            self._pending = []
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """Slots drawn proportionally to priority, one per equal segment of the total."""
+        self._flush()
+        segment = self.tree.total() / batch_size
+        targets = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        slots = self.tree.find(targets)
+        # Rounding can land on an empty leaf past the end of the buffer
+        return np.minimum(slots, self._size - 1)
+
+    def sample_prioritized(self, batch_size: int):
+        """Returns (slots, importance-sampling weights, states, actions, rewards, next_states, dones)"""
+        slots = self.sample_indices(batch_size)
+        probabilities = self.tree.priorities(slots) / self.tree.total()
+        weights = (self._size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return (slots, weights, self.states[slots], self.actions[slots], self.rewards[slots],
+                self.next_states[slots], self.dones[slots])
+
+    def update_priorities(self, slots: np.ndarray, td_errors: np.ndarray):
+        """New priorities from the TD errors of the replayed experiences"""
+        self._flush()
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(slots, priorities)
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the preallocated columns and the sum-tree"""
+        return super().memory_bytes() + self.tree.tree.nbytes
+
+    def clear(self):
+        """Clear all experiences"""
+        super().clear()
+        self.tree.tree.fill(0.0)
+        self._pending = []
+        self.max_priority = 1.0
+
+
+REPLAY_MODES = ("uniform", "prioritized")
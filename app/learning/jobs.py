@@ -0,0 +1,325 @@
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+from app.core.entities import GameMap
+from app.core.game_engine import GameEngine, TERMINATION_RULES
+from app.learning.knowledge_base import KnowledgeBase
+from app.learning.reinforcement import QLearningAgent
+from app.learning.abstraction import AbstractionEngine
+from app.learning.reward_system import RewardSystem
+from app.learning.episode import EpisodeRunner
+
+# Training jobs run side by side, each in its own spawned process with its own Knowledge
+# Base and agent, so they use separate cores and never share state. The scheduler runs at
+# most `max_concurrent` jobs (one per core by default) and queues the rest in FIFO order.
+# Job processes report progress and their final Q-table through one shared message queue
+# that a monitor thread in the server process drains.
+
+JOB_STATUSES = ("queued", "running", "stopping", "stopped", "completed", "failed")
+# Statuses of jobs without a process; only these can be deleted
+FINISHED_STATUSES = ("stopped", "completed", "failed")
+# Completed and failed jobs kept (with their Q-tables) before the oldest are dropped
+MAX_FINISHED_JOBS = 100
+# Seconds between progress messages of a running job
+REPORT_SECONDS = 0.5
+
+
+def build_job_agent(request, q_table: Optional[Dict[str, Dict[str, float]]] = None):
+    """Isolated KB, agent and episode runner of a job. Raises ValueError on invalid settings."""
+    if request.num_workers != 1:
+        raise ValueError("Training jobs run in a single process: num_workers must be 1")
+    if request.num_incursions < 1:
+        raise ValueError("num_incursions must be at least 1")
+    if not request.initial_positions or any(p not in GameMap.valid_lion_positions for p in request.initial_positions):
+        raise ValueError("Invalid lion position")
+    if request.termination not in TERMINATION_RULES:
+        raise ValueError("Invalid termination rule")
+    if request.replay_size < 1 or request.replay_batch_size < 1:
+        raise ValueError("replay_size and replay_batch_size must be at least 1")
+
+    kb = KnowledgeBase(backend="dense")
+    if q_table:
+        kb.q_table = q_table
+    agent = QLearningAgent(kb, replay=request.replay, replay_size=request.replay_size, dyna_steps=request.dyna_steps)
+    reward_system = RewardSystem(request.reward_shaping, discount_factor=agent.gamma)
+    runner = EpisodeRunner(agent, GameEngine(termination=request.termination), reward_system)
+    return kb, agent, runner
+
+
+def run_training_job(job_id: str, spec: dict, messages, stop_event):
+    """
+    Entry point of a job process (must stay importable / picklable). Plays the incursions
+    from spec["start_index"] until the end or until `stop_event` is set, then sends the
+    Q-table and abstractions back. Counters in messages are totals over all runs of the job.
+    """
+    try:
+        random.seed(spec["seed"])
+        request = spec["request"]
+        kb, agent, runner = build_job_agent(request, spec["q_table"])
+        if spec["epsilon"] is not None:
+            agent.epsilon = spec["epsilon"]
+        counters = dict(spec["counters"])
+        last_report = time.monotonic()
+
+        for i in range(spec["start_index"], request.num_incursions):
+            if stop_event.is_set():
+                break
+            state, steps = runner.run(request, random.choice(request.initial_positions))
+            counters["current_incursion"] = i + 1
+            counters["total_steps"] += steps
+            counters["success_count" if state.status == "success" else "fail_count"] += 1
+            agent.decay_epsilon()
+            agent.learn_batch(batch_size=request.replay_batch_size)
+
+            if time.monotonic() - last_report >= REPORT_SECONDS:
+                last_report = time.monotonic()
+                messages.put(("progress", job_id, dict(counters, epsilon=agent.epsilon)))
+
+        AbstractionEngine(kb).abstract_knowledge()
+        messages.put(("finished", job_id, dict(
+            counters, epsilon=agent.epsilon, q_table=kb.export_q_table(), abstractions=list(kb.abstractions)
+        )))
+    except Exception:
+        messages.put(("failed", job_id, traceback.format_exc()))
+
+
+class TrainingJob:
+    """State of one job as seen by the scheduler; its KB lives in the job process while it runs."""
+
+    def __init__(self, job_id: str, request):
+        self.job_id = job_id
+        self.request = request
+        self.status = "queued"
+        self.current_incursion = 0
+        self.success_count = 0
+        self.fail_count = 0
+        self.total_steps = 0
+        self.epsilon: Optional[float] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        # Latest Q-table and abstractions sent back by the job process (after a stop or the end)
+        self.q_table: Optional[Dict[str, Dict[str, float]]] = None
+        self.abstractions: List[str] = []
+
+    @property
+    def counters(self) -> dict:
+        return {
+            "current_incursion": self.current_incursion,
+            "success_count": self.success_count,
+            "fail_count": self.fail_count,
+            "total_steps": self.total_steps,
+        }
+
+    def to_dict(self) -> dict:
+        finished = self.success_count + self.fail_count
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": self.current_incursion / self.request.num_incursions,
+            "current_incursion": self.current_incursion,
+            "total_incursions": self.request.num_incursions,
+            "success_count": self.success_count,
+            "fail_count": self.fail_count,
+            "success_rate": self.success_count / finished if finished else 0.0,
+            "epsilon": self.epsilon,
+            "q_table_size": len(self.q_table) if self.q_table is not None else 0,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobScheduler:
+    """
+    Creates training jobs, runs up to `max_concurrent` of them at once in spawned processes
+    and queues the rest. Stop is cooperative (the job finishes its current incursion and
+    returns its Q-table); a stopped job can be resumed from its Q-table, exploration rate
+    and counters, with a fresh replay buffer. Finished jobs stay until deleted, except that
+    only the latest `max_finished` completed or failed ones are kept. Thread-safe.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.max_finished = max_finished
+        self.lock = threading.RLock()
+        self.jobs: Dict[str, TrainingJob] = {}
+        self._queue = deque()
+        self._running = {}  # job_id -> (process, stop event)
+        # Spawned job processes do not inherit the server threads or sockets
+        self._context = multiprocessing.get_context("spawn")
+        self._messages = None
+        self._monitor = None
+
+    def submit(self, request) -> TrainingJob:
+        build_job_agent(request)  # Validate before queueing
+        job = TrainingJob(uuid.uuid4().hex[:12], request)
+        with self.lock:
+            self.jobs[job.job_id] = job
+            self._queue.append(job.job_id)
+            self._start_queued()
+        return job
+
+    def get(self, job_id: str) -> TrainingJob:
+        with self.lock:
+            if job_id not in self.jobs:
+                raise KeyError(job_id)
+            return self.jobs[job_id]
+
+    def list_jobs(self) -> List[dict]:
+        with self.lock:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def snapshot(self, job_id: str) -> dict:
+        with self.lock:
+            return self.get(job_id).to_dict()
+
+    def stop(self, job_id: str) -> TrainingJob:
+        """Dequeues a queued job or asks a running one to stop after its current incursion."""
+        with self.lock:
+            job = self.get(job_id)
+            if job.status == "queued":
+                self._queue.remove(job_id)
+                job.status = "stopped"
+            elif job.status == "running":
+                self._running[job_id][1].set()
+                job.status = "stopping"
+            else:
+                raise ValueError(f"Job {job_id} is {job.status}")
+            return job
+
+    def resume(self, job_id: str) -> TrainingJob:
+        """Queues a stopped job again; it continues from the incursion where it stopped."""
+        with self.lock:
+            job = self.get(job_id)
+            if job.status != "stopped":
+                raise ValueError(f"Job {job_id} is {job.status}")
+            if job.current_incursion >= job.request.num_incursions:
+                raise ValueError(f"Job {job_id} already completed")
+            job.status = "queued"
+            job.finished_at = None
+            self._queue.append(job_id)
+            self._start_queued()
+            return job
+
+    def delete(self, job_id: str):
+        """Forgets a stopped, completed or failed job and its result."""
+        with self.lock:
+            job = self.get(job_id)
+            if job.status not in FINISHED_STATUSES:
+                raise ValueError(f"Job {job_id} is {job.status}")
+            del self.jobs[job_id]
+
+    def result(self, job_id: str) -> dict:
+        """Knowledge Base of a job (same layout as the KB files) once it stopped or completed."""
+        with self.lock:
+            job = self.get(job_id)
+            if job.q_table is None:
+                raise ValueError(f"Job {job_id} has no result yet ({job.status})")
+            return {"q_table": job.q_table, "abstractions": list(job.abstractions)}
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> TrainingJob:
+        """Blocks until the job is no longer queued, running or stopping (for scripts and tests)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job.status in FINISHED_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} is still {job.status}")
+            time.sleep(0.05)
+
+    def _start_queued(self):
+        # Caller holds self.lock
+        while self._queue and len(self._running) < self.max_concurrent:
+            job = self.jobs[self._queue.popleft()]
+            if self._messages is None:
+                self._messages = self._context.Queue()
+                self._monitor = threading.Thread(target=self._monitor_loop, name="training-jobs", daemon=True)
+                self._monitor.start()
+            spec = {
+                "request": job.request,
+                "start_index": job.current_incursion,
+                "q_table": job.q_table,
+                "epsilon": job.epsilon,
+                "counters": job.counters,
+                "seed": random.randrange(2**31),
+            }
+            stop_event = self._context.Event()
+            process = self._context.Process(
+                target=run_training_job, args=(job.job_id, spec, self._messages, stop_event),
+                name=f"training-job-{job.job_id}", daemon=True
+            )
+            process.start()
+            self._running[job.job_id] = (process, stop_event)
+            job.status = "running"
+            job.started_at = job.started_at or time.time()
+
+    def _monitor_loop(self):
+        while True:
+            try:
+                self._handle(*self._messages.get(timeout=REPORT_SECONDS))
+            except queue.Empty:
+                pass
+            self._reap()
+
+    def _handle(self, kind: str, job_id: str, payload):
+        with self.lock:
+            job = self.jobs[job_id]
+            if kind in ("progress", "finished"):
+                for field in ("current_incursion", "success_count", "fail_count", "total_steps", "epsilon"):
+                    setattr(job, field, payload[field])
+            if kind == "progress":
+                return
+
+            if kind == "finished":
+                job.q_table = payload["q_table"]
+                job.abstractions = payload["abstractions"]
+                job.status = "completed" if job.current_incursion >= job.request.num_incursions else "stopped"
+            else:
+                job.status = "failed"
+                job.error = payload
+            job.finished_at = time.time()
+            process, _ = self._running.pop(job_id)
+            process.join()
+            self._evict_finished()
+            self._start_queued()
+
+    def _reap(self):
+        """Fails jobs whose process died without reporting (e.g. killed)."""
+        with self.lock:
+            dead = [job_id for job_id, (process, _) in self._running.items() if not process.is_alive()]
+        if not dead:
+            return
+        # A process that exited normally has already flushed its last message
+        try:
+            while True:
+                self._handle(*self._messages.get_nowait())
+        except queue.Empty:
+            pass
+        with self.lock:
+            for job_id in dead:
+                if job_id in self._running:
+                    process, _ = self._running.pop(job_id)
+                    job = self.jobs[job_id]
+                    job.status = "failed"
+                    job.error = f"Job process exited with code {process.exitcode}"
+                    job.finished_at = time.time()
+            self._evict_finished()
+            self._start_queued()
+
+    def _evict_finished(self):
+        # Caller holds self.lock. Stopped jobs can still be resumed, so only these are dropped.
+        finished = [job for job in self.jobs.values() if job.status in ("completed", "failed")]
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self.jobs[job.job_id]
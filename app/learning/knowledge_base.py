@@ -1,55 +1,259 @@
 import json
 import pickle
-from typing import Dict, List, Any, Tuple
+import os
+import uuid
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from app.core.entities import LionAction, ImpalaAction
+from app.learning.q_table import DenseQTable, NUM_STATES, ACTION_NAMES
+
+Q_TABLE_BACKENDS = ("dict", "dense")
+# File extension per save format; "npy" is the memory-mapped binary format (float32 Q-values)
+KNOWLEDGE_FORMATS = {"json": ".json", "pickle": ".pkl", "npy": ".qkb"}
+# Append-only log of the rows changed since the last full checkpoint snapshot (see checkpoint)
+DELTA_EXTENSION = ".delta"
+# Delta checkpoints written before one is compacted into a full snapshot
+DELTA_COMPACT_EVERY = 20
 
 class KnowledgeBase:
-    def __init__(self):
+    def __init__(self, backend: str = "dict"):
         # Q-Table: Key = (LionPos, ImpalaAction, LionState), Value = {Action: Q-Value}
         # We need a string representation for the key to serialize easily to JSON.
-        self.q_table: Dict[str, Dict[str, float]] = {}
+        # backend="dense" keeps the same mapping interface over a NumPy array (see DenseQTable).
+        if backend not in Q_TABLE_BACKENDS:
+            raise ValueError(f"Unknown Q-table backend: {backend}")
+        self.backend = backend
+        # Bumped on every Q-table change, so derived data (e.g. CompiledPolicy) knows when to rebuild
+        self.version = 0
+        # Delta checkpoint state: ID of the last snapshot, deltas written on top of it
+        self.checkpoint_id: Optional[str] = None
+        self._deltas_since_snapshot = 0
+        self._delta_bytes = 0
+        self._snapshot_bytes = 0
+        self._checkpoint_abstractions: List[str] = []
+        self.q_table = {}
         self.abstractions: List[str] = []
 
+    @property
+    def q_table(self):
+        return self._q_table
+
+    @q_table.setter
+    def q_table(self, data: Dict[str, Dict[str, float]]):
+        self.version += 1
+        # Replaced wholesale: the next checkpoint must be a full snapshot
+        self._needs_snapshot = True
+        if self.backend == "dense":
+            self._q_table = data if isinstance(data, DenseQTable) else DenseQTable(data)
+        else:
+            self._q_table = data
+
+    @property
+    def dense(self) -> bool:
+        return self.backend == "dense"
+
     def get_q_value(self, state_key: str, action: str) -> float:
         if state_key not in self.q_table:
             self.q_table[state_key] = {a.value: 0.0 for a in LionAction}
+            self.version += 1
         return self.q_table[state_key].get(action, 0.0)
 
     def update_q_value(self, state_key: str, action: str, value: float):
         if state_key not in self.q_table:
             self.q_table[state_key] = {a.value: 0.0 for a in LionAction}
         self.q_table[state_key][action] = value
+        self.version += 1
+
+    def mark_changed(self):
+        """Records a change made directly on the Q-table (e.g. on the dense arrays)."""
+        self.version += 1
+
+    def export_q_table(self) -> Dict[str, Dict[str, float]]:
+        """Q-table as plain dicts (JSON format), whatever the backend."""
+        if self.dense:
+            return self.q_table.to_dict()
+        return self.q_table
 
     def save(self, filename: str, format: str = "json"):
-        filepath = f"data/knowledge/{filename}"
-        data = {"q_table": self.q_table, "abstractions": self.abstractions}
+        if format not in KNOWLEDGE_FORMATS:
+            raise ValueError(f"Unknown knowledge format: {format}")
+        filepath = f"data/knowledge/{filename}{KNOWLEDGE_FORMATS[format]}"
+
+        if format == "npy":
+            from app.storage.npy_storage import NpyStorage
+            NpyStorage.save(self._export_arrays(), filepath)
+            return
+        data = {"q_table": self.export_q_table(), "abstractions": self.abstractions}
         
         if format == "json":
             from app.storage.json_storage import JsonStorage
-            JsonStorage.save(data, filepath + ".json")
+            JsonStorage.save(data, filepath)
         elif format == "pickle":
             from app.storage.pickle_storage import PickleStorage
-            PickleStorage.save(data, filepath + ".pkl")
+            PickleStorage.save(data, filepath)
 
-    def load(self, filename: str):
+    def load(self, filename: str, format: Optional[str] = None):
+        """Loads `filename` in the given format, or the first of JSON, pickle and binary that exists."""
+        if format is not None and format not in KNOWLEDGE_FORMATS:
+            raise ValueError(f"Unknown knowledge format: {format}")
         filepath_base = f"data/knowledge/{filename}"
         
-        try:
-            # Try JSON first
-            from app.storage.json_storage import JsonStorage
-            data = JsonStorage.load(filepath_base + ".json")
-            self.q_table = data["q_table"]
-            self.abstractions = data.get("abstractions", [])
-        except FileNotFoundError:
+        for candidate in ([format] if format else KNOWLEDGE_FORMATS):
+            filepath = filepath_base + KNOWLEDGE_FORMATS[candidate]
             try:
-                # Try Pickle
-                from app.storage.pickle_storage import PickleStorage
-                data = PickleStorage.load(filepath_base + ".pkl")
+                if candidate == "json":
+                    from app.storage.json_storage import JsonStorage
+                    data = JsonStorage.load(filepath)
+                elif candidate == "pickle":
+                    from app.storage.pickle_storage import PickleStorage
+                    data = PickleStorage.load(filepath)
+                else:
+                    from app.storage.npy_storage import NpyStorage
+                    data = NpyStorage.load(filepath)
+            except FileNotFoundError:
+                continue
+            if candidate == "npy":
+                self._import_arrays(data)
+            else:
                 self.q_table = data["q_table"]
                 self.abstractions = data.get("abstractions", [])
-            except FileNotFoundError:
-                print(f"Knowledge file {filename} not found.")
+            self._replay_deltas(filepath_base + DELTA_EXTENSION, data.get("checkpoint_id"))
+            return
+        print(f"Knowledge file {filename} not found.")
+
+    def checkpoint(self, filename: str, compact_every: int = DELTA_COMPACT_EVERY) -> str:
+        """
+        Incremental checkpoint to data/knowledge/<filename>.json plus <filename>.delta.
+
+        Normally appends only the rows changed since the previous checkpoint (and the
+        abstractions if they changed) to the delta log, so its cost follows the learning done
+        in between rather than the table size. The first checkpoint, the one after the table
+        was replaced, every `compact_every`-th one and any checkpoint once the log outgrows
+        the snapshot instead write a full JSON snapshot (atomically, with a new random ID)
+        and drop the log. load() only replays deltas tagged with the snapshot's ID and stops
+        at a torn last frame, so a crash at any point recovers the last complete checkpoint.
+        Returns "snapshot" or "delta".
+        """
+        return self.prepare_checkpoint(filename, compact_every)()
+
+    def prepare_checkpoint(self, filename: str, compact_every: int = DELTA_COMPACT_EVERY) -> Callable[[], str]:
+        """
+        First half of checkpoint(): copies what the checkpoint needs (the changed rows, or the
+        whole table for a snapshot) and returns the function that serializes and writes the
+        copy. Only the preparation needs the KB to be still; the write can run on another
+        thread while learning goes on. Writes must run in preparation order.
+        """
+        if not self.dense:
+            raise ValueError("Delta checkpoints need the dense Q-table backend")
+        from app.storage.delta_storage import DeltaStorage
+        filepath_base = f"data/knowledge/{filename}"
+        rows = self.q_table.take_dirty()
+
+        if (self._needs_snapshot or self._deltas_since_snapshot >= compact_every
+                or self._delta_bytes > self._snapshot_bytes):
+            from app.storage.json_storage import JsonStorage
+            self.checkpoint_id = uuid.uuid4().hex
+            self._needs_snapshot = False
+            self._deltas_since_snapshot = 0
+            self._delta_bytes = 0
+            self._checkpoint_abstractions = list(self.abstractions)
+            table, checkpoint_id, abstractions = self.q_table.copy(), self.checkpoint_id, list(self.abstractions)
+
+            def write_snapshot() -> str:
+                data = {"q_table": table.to_dict(), "abstractions": abstractions, "checkpoint_id": checkpoint_id}
+                try:
+                    # The snapshot is durable (file and rename fsynced) before the log goes
+                    JsonStorage.save(data, filepath_base + ".json", atomic=True)
+                    DeltaStorage.reset(filepath_base + DELTA_EXTENSION)
+                except OSError:
+                    self._needs_snapshot = True
+                    raise
+                self._snapshot_bytes = os.path.getsize(filepath_base + ".json")
+                return "snapshot"
+            return write_snapshot
+
+        abstractions = None
+        if self.abstractions != self._checkpoint_abstractions:
+            abstractions = self._checkpoint_abstractions = list(self.abstractions)
+        self._deltas_since_snapshot += 1
+        # Fancy indexing copies the rows
+        frame = {
+            "checkpoint_id": self.checkpoint_id, "abstractions": abstractions,
+            "states": rows, "visited": self.q_table.visited[rows], "q_values": self.q_table.values[rows],
+        }
+
+        def write_delta() -> str:
+            try:
+                self._delta_bytes += DeltaStorage.append(frame, filepath_base + DELTA_EXTENSION)
+            except OSError:
+                # These rows are no longer marked dirty: only a full snapshot can cover them now
+                self._needs_snapshot = True
+                raise
+            return "delta"
+        return write_delta
+
+    def _replay_deltas(self, filepath: str, checkpoint_id: Optional[str]):
+        """Applies the delta checkpoints written on top of the snapshot `checkpoint_id`."""
+        from app.storage.delta_storage import DeltaStorage
+        try:
+            frames = DeltaStorage.load(filepath)
+        except FileNotFoundError:
+            frames = []
+        table = self.q_table if self.dense else None
+        for frame in frames:
+            if checkpoint_id is None or frame["checkpoint_id"] != checkpoint_id:
+                continue
+            if table is not None:
+                table.values[frame["states"]] = frame["q_values"]
+                table.visited[frame["states"]] = frame["visited"]
+            else:
+                for index, visited, row in zip(frame["states"].tolist(), frame["visited"], frame["q_values"].tolist()):
+                    key = DenseQTable.key_of(index)
+                    if visited:
+                        self.q_table[key] = dict(zip(ACTION_NAMES, row))
+                    else:
+                        self.q_table.pop(key, None)
+            if frame["abstractions"] is not None:
+                self.abstractions = list(frame["abstractions"])
+        self.mark_changed()
+        self.checkpoint_id = checkpoint_id
+
+    def _export_arrays(self) -> dict:
+        # The binary format always uses the dense row layout, whatever the backend
+        # (entries that are not board states are skipped, see DenseQTable)
+        table = self.q_table if self.dense else DenseQTable(self.q_table)
+        states, values = table.to_arrays()
+        return {
+            "states": states, "q_values": values, "num_states": NUM_STATES,
+            "actions": list(ACTION_NAMES), "abstractions": list(self.abstractions),
+        }
+
+    def _import_arrays(self, data: dict):
+        if data["num_states"] != NUM_STATES:
+            raise ValueError("Binary knowledge file was written for a different state encoding")
+        columns = [data["actions"].index(action) for action in ACTION_NAMES]
+        table = DenseQTable()
+        table.load_arrays(data["states"], data["q_values"][:, columns])
+        self.q_table = table if self.dense else table.to_dict()
+        self.abstractions = list(data.get("abstractions", []))
 
     def clear(self):
         self.q_table = {}
         self.abstractions = []
+
+
+def convert_knowledge(filename: str, to_format: str, from_format: Optional[str] = None):
+    """
+    Rewrites a Knowledge Base file in another format (e.g. JSON to binary and back).
+    The binary format stores Q-values as float32 and only board states, so converting to it
+    and back rounds the values and drops any other entries.
+    """
+    if to_format not in KNOWLEDGE_FORMATS:
+        raise ValueError(f"Unknown knowledge format: {to_format}")
+    formats = [from_format] if from_format else list(KNOWLEDGE_FORMATS)
+    if any(f not in KNOWLEDGE_FORMATS for f in formats):
+        raise ValueError(f"Unknown knowledge format: {from_format}")
+    if not any(os.path.exists(f"data/knowledge/{filename}{KNOWLEDGE_FORMATS[f]}") for f in formats):
+        raise FileNotFoundError(filename)
+    kb = KnowledgeBase()
+    kb.load(filename, from_format)
+    kb.save(filename, to_format)
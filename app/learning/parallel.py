@@ -0,0 +1,112 @@
+import random
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.entities import GameMap
+from app.core.game_engine import GameEngine
+from app.core.history import HistoryRecorder
+from app.learning.knowledge_base import KnowledgeBase
+from app.learning.q_table import DenseQTable, NUM_STATES, NUM_ACTIONS, action_index
+from app.learning.reinforcement import QLearningAgent
+from app.learning.reward_system import RewardSystem
+from app.learning.episode import EpisodeRunner
+
+# Parallel training runs in rounds. Every round each worker process receives a copy of
+# the shared Q-table, plays its share of incursions with its own seed and local table,
+# and sends back its table plus how often it took each (state, action). The manager then
+# merges the tables into the shared Knowledge Base with visit-weighted averaging.
+# Tables travel as the dense `values` / `visited` arrays. Each worker runs in its own
+# process started with start_worker, which keeps its agent between rounds, so the replay
+# buffer and the Dyna-Q model keep growing across rounds; only the Q-table is replaced.
+
+# Agent, KB and episode runner of this worker process (set by start_worker)
+_worker: Optional[dict] = None
+
+
+def build_worker(agent_params: dict, request) -> dict:
+    kb = KnowledgeBase(backend="dense")
+    agent = QLearningAgent(kb, **agent_params)
+    reward_system = RewardSystem(request.reward_shaping, discount_factor=agent.gamma)
+    return {
+        "kb": kb,
+        "agent": agent,
+        "runner": EpisodeRunner(agent, GameEngine(termination=request.termination), reward_system),
+        "history_recorder": HistoryRecorder(request.history_mode, request.history_sample_every),
+    }
+
+
+def start_worker(agent_params: dict, request):
+    """Process initializer: builds the agent reused by every round run in this process."""
+    global _worker
+    _worker = build_worker(agent_params, request)
+
+
+def run_worker_round(task: dict) -> dict:
+    """
+    Entry point of a worker process for one round (must stay importable / picklable).
+    Uses the process agent from start_worker, or a fresh one when there is none.
+    """
+    random.seed(task["seed"])
+
+    worker = _worker or build_worker(task["agent_params"], task["request"])
+    kb, agent, runner = worker["kb"], worker["agent"], worker["runner"]
+    np.copyto(kb.q_table.values, task["values"])
+    np.copyto(kb.q_table.visited, task["visited"])
+    kb.mark_changed()
+    agent.epsilon = task["epsilon"]
+
+    visits: Dict[Tuple[int, str], int] = {}
+    result = {
+        "worker_id": task["worker_id"],
+        "incursions": 0,
+        "success_count": 0,
+        "fail_count": 0,
+        "total_steps": 0,
+        "position_attempts": {k: 0 for k in GameMap.valid_lion_positions.keys()},
+        "position_successes": {k: 0 for k in GameMap.valid_lion_positions.keys()},
+        "logs": [],
+    }
+
+    for episode_idx in task["episode_indices"]:
+        start_pos_idx = random.choice(task["request"].initial_positions)
+        state, steps = runner.run(task["request"], start_pos_idx, worker["history_recorder"].records(episode_idx), visits)
+        agent.decay_epsilon()
+        agent.learn_batch(batch_size=task["request"].replay_batch_size)
+
+        result["incursions"] += 1
+        result["total_steps"] += steps
+        result["position_attempts"][start_pos_idx] += 1
+        if state.status == "success":
+            result["success_count"] += 1
+            result["position_successes"][start_pos_idx] += 1
+        else:
+            result["fail_count"] += 1
+        if state.history is not None and worker["history_recorder"].saves_log(episode_idx):
+            result["logs"].append((episode_idx, state.history.to_list()))
+
+    result["values"] = kb.q_table.values.copy()
+    result["visited"] = kb.q_table.visited.copy()
+    result["visits"] = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.int64)
+    for (index, action), n in visits.items():
+        result["visits"][index, action_index(action)] = n
+    return result
+
+
+def merge_q_tables(table: DenseQTable, results: List[dict]):
+    """
+    Merges the worker tables into `table` in place with a visit-weighted average.
+    (state, action) pairs no worker visited keep the shared value; rows that only
+    exist in a worker table are added. Changed rows are marked dirty.
+    """
+    weighted = np.zeros_like(table.values)
+    counts = np.zeros(table.values.shape, dtype=np.int64)
+    added = np.zeros_like(table.visited)
+    for result in results:
+        weighted += result["visits"] * result["values"]
+        counts += result["visits"]
+        added |= result["visited"]
+    added &= ~table.visited
+
+    seen = counts > 0
+    table.values[seen] = weighted[seen] / counts[seen]
+    table.visited |= added
+    table.dirty |= added | seen.any(axis=1)
@@ -0,0 +1,263 @@
+import time
+from typing import List, Optional
+import numpy as np
+from app.core.entities import GameMap, ImpalaAction, LionState, ImpalaState
+from app.core.batch_engine import BatchGameEngine
+from app.core.encoding import (
+    GRID_SIZE, IMPALA_START, LION_STATES, IMPALA_ACTIONS, LION_ACTIONS,
+    LION_STATE_CODE, IMPALA_STATE_CODE, IMPALA_ACTION_CODE, STATUS_SUCCESS,
+)
+
+# Upper bound for (time_step - flee_start_time) + 1 while the impala flees.
+# Fleeing episodes end within a few steps, this only sizes the state encoding.
+CLOCK_LIMIT = 2 * GRID_SIZE
+
+LION_NORMAL = LION_STATE_CODE[LionState.NORMAL]
+IMPALA_NORMAL = IMPALA_STATE_CODE[ImpalaState.NORMAL]
+IMPALA_FLEEING = IMPALA_STATE_CODE[ImpalaState.FLEEING]
+
+
+class ValueIterationPlanner:
+    """
+    Exact offline planner for the hunt.
+
+    A planning state is everything the engine needs to play the next step:
+    lion cell and state, whether the impala flees, the impala column, the flee clock,
+    the position in the programmed sequence and the impala action the lion observes.
+    Reachable states are enumerated from the start positions by stepping a
+    BatchGameEngine with every lion action, then value iteration runs over the
+    resulting transition arrays using the engine rewards (+100 / -100 / -1 per step).
+
+    The Knowledge Base key (lion position, impala action, lion state) does not see the
+    impala column or the flee clock, so several planning states can share one key.
+    export() averages them weighted by how often an exploring (uniform random) lion
+    visits each one.
+    """
+
+    def __init__(self, impala_mode: str = "random", impala_sequence: Optional[List[ImpalaAction]] = None,
+                 initial_positions: Optional[List[int]] = None, discount_factor: float = 0.95,
+                 termination: str = "exact"):
+        self.gamma = discount_factor
+        self.termination = termination
+        if initial_positions is None:
+            initial_positions = list(GameMap.valid_lion_positions.keys())
+        self.start_positions = [GameMap.valid_lion_positions[p] for p in initial_positions]
+
+        # Impala model: random choice among non-flee actions, or a sequence indexed by time step
+        if impala_mode == "random":
+            self.random_choices = np.array(
+                [IMPALA_ACTION_CODE[a] for a in ImpalaAction if a != ImpalaAction.FLEE], dtype=np.int64)
+            self.sequence = None
+        else:
+            self.random_choices = None
+            if impala_mode == "programmed" and impala_sequence:
+                sequence = impala_sequence
+            else:
+                sequence = [ImpalaAction.LOOK_FRONT]
+            self.sequence = np.array([IMPALA_ACTION_CODE[a] for a in sequence], dtype=np.int64)
+        self.period = 1 if self.sequence is None else len(self.sequence)
+        self.outcomes = len(self.random_choices) if self.sequence is None else 1
+
+        # Filled by enumerate_states() / solve()
+        self.state_codes = None
+        self.rewards = None
+        self.done = None
+        self.success = None
+        self.next_states = None
+        self.q_values = None
+
+    # State encoding
+
+    def _encode(self, x, y, lion_state, fleeing, impala_y, clock, phase, impala_action):
+        code = x.astype(np.int64) * GRID_SIZE + y
+        code = code * len(LION_STATES) + lion_state
+        code = code * 2 + fleeing
+        code = code * GRID_SIZE + impala_y
+        code = code * CLOCK_LIMIT + (clock + 1)
+        code = code * self.period + phase
+        return code * len(IMPALA_ACTIONS) + impala_action
+
+    def _decode(self, code):
+        code, impala_action = np.divmod(code, len(IMPALA_ACTIONS))
+        code, phase = np.divmod(code, self.period)
+        code, clock = np.divmod(code, CLOCK_LIMIT)
+        code, impala_y = np.divmod(code, GRID_SIZE)
+        code, fleeing = np.divmod(code, 2)
+        code, lion_state = np.divmod(code, len(LION_STATES))
+        x, y = np.divmod(code, GRID_SIZE)
+        return x, y, lion_state, fleeing, impala_y, clock - 1, phase, impala_action
+
+    def _next_impala_actions(self, phase):
+        """(n, outcomes) impala action codes for the next step."""
+        if self.sequence is None:
+            return np.broadcast_to(self.random_choices, (len(phase), self.outcomes))
+        return self.sequence[phase][:, None]
+
+    def _start_codes(self):
+        starts = np.array(self.start_positions, dtype=np.int64)
+        n = len(starts)
+        zeros = np.zeros(n, dtype=np.int64)
+        first = self._next_impala_actions(zeros)
+        codes = self._encode(starts[:, 0], starts[:, 1], zeros + LION_NORMAL, zeros, zeros + IMPALA_START[1],
+                             zeros, zeros, zeros)
+        # The impala action is the last digit of the code
+        return np.unique(codes[:, None] + first)
+
+    # Model construction
+
+    def enumerate_states(self):
+        """Breadth-first enumeration of every state reachable from the start positions."""
+        num_actions = len(LION_ACTIONS)
+        frontier = self._start_codes()
+        seen = frontier
+        layers = []
+
+        while len(frontier):
+            n = len(frontier)
+            x, y, lion_state, fleeing, impala_y, clock, phase, impala_action = self._decode(frontier)
+
+            engine = BatchGameEngine(np.repeat(np.stack([x, y], axis=1), num_actions, axis=0),
+                                     termination=self.termination)
+            engine.lion_state[:] = np.repeat(lion_state, num_actions)
+            engine.impala_pos[:, 1] = np.repeat(impala_y, num_actions)
+            engine.impala_state[:] = np.repeat(np.where(fleeing == 1, IMPALA_FLEEING, IMPALA_NORMAL), num_actions)
+            engine.time_step[:] = np.repeat(phase, num_actions)
+            engine.flee_start_time[:] = np.repeat(np.where(fleeing == 1, phase - clock, -1), num_actions)
+
+            lion_actions = np.tile(np.arange(num_actions), n)
+            rewards, done = engine.step(lion_actions, np.repeat(impala_action, num_actions))
+
+            t = engine.time_step.astype(np.int64)
+            next_fleeing = (engine.impala_state == IMPALA_FLEEING).astype(np.int64)
+            next_clock = np.where(next_fleeing == 1, t - engine.flee_start_time, 0)
+            next_phase = t % self.period
+            if (next_clock + 1 >= CLOCK_LIMIT).any():
+                raise RuntimeError("Flee clock exceeded the planner encoding")
+
+            base = self._encode(engine.lion_pos[:, 0], engine.lion_pos[:, 1], engine.lion_state.astype(np.int64),
+                                next_fleeing, engine.impala_pos[:, 1].astype(np.int64), next_clock, next_phase, 0)
+            next_codes = base[:, None] + self._next_impala_actions(next_phase)
+            next_codes = np.where(done[:, None], -1, next_codes)
+
+            layers.append((
+                frontier,
+                rewards.reshape(n, num_actions),
+                done.reshape(n, num_actions),
+                (engine.status == STATUS_SUCCESS).reshape(n, num_actions),
+                next_codes.reshape(n, num_actions, self.outcomes),
+            ))
+
+            candidates = np.unique(next_codes[next_codes >= 0])
+            frontier = np.setdiff1d(candidates, seen, assume_unique=True)
+            seen = np.union1d(seen, frontier)
+
+        codes = np.concatenate([layer[0] for layer in layers])
+        order = np.argsort(codes)
+        self.state_codes = codes[order]
+        self.rewards = np.concatenate([layer[1] for layer in layers])[order]
+        self.done = np.concatenate([layer[2] for layer in layers])[order]
+        self.success = np.concatenate([layer[3] for layer in layers])[order]
+        next_codes = np.concatenate([layer[4] for layer in layers])[order]
+        self.next_states = np.where(next_codes >= 0, np.searchsorted(self.state_codes, next_codes), 0)
+        return len(self.state_codes)
+
+    # Solvers
+
+    def _expected_next(self, values: np.ndarray) -> np.ndarray:
+        """E[values(next state)] for every (state, action), 0 on terminal transitions."""
+        return np.where(self.done, 0.0, values[self.next_states].mean(axis=2))
+
+    def solve(self, tolerance: float = 1e-6, max_iterations: int = 1000) -> dict:
+        """Vectorized value iteration. Returns convergence information."""
+        start = time.perf_counter()
+        if self.state_codes is None:
+            self.enumerate_states()
+
+        values = np.zeros(len(self.state_codes))
+        residual = float("inf")
+        iterations = 0
+        while iterations < max_iterations:
+            iterations += 1
+            q = self.rewards + self.gamma * self._expected_next(values)
+            new_values = q.max(axis=1)
+            residual = float(np.abs(new_values - values).max())
+            values = new_values
+            if residual < tolerance:
+                break
+        self.q_values = self.rewards + self.gamma * self._expected_next(values)
+
+        start_idx = np.searchsorted(self.state_codes, self._start_codes())
+        return {
+            "states": int(len(self.state_codes)),
+            "iterations": iterations,
+            "converged": residual < tolerance,
+            "residual": residual,
+            "start_value": float(values[start_idx].mean()),
+            "start_success_rate": float(self.success_probability(tolerance, max_iterations)[start_idx].mean()),
+            "elapsed_seconds": time.perf_counter() - start,
+        }
+
+    def greedy_actions(self) -> np.ndarray:
+        return self.q_values.argmax(axis=1)
+
+    def success_probability(self, tolerance: float = 1e-6, max_iterations: int = 1000) -> np.ndarray:
+        """Probability that the greedy policy catches the impala, per state (undiscounted)."""
+        rows = np.arange(len(self.state_codes))
+        policy = self.greedy_actions()
+        done = self.done[rows, policy]
+        success = self.success[rows, policy].astype(np.float64)
+        nxt = self.next_states[rows, policy]
+
+        prob = np.zeros(len(self.state_codes))
+        for _ in range(max_iterations):
+            new_prob = np.where(done, success, prob[nxt].mean(axis=1))
+            if np.abs(new_prob - prob).max() < tolerance:
+                return new_prob
+            prob = new_prob
+        return prob
+
+    def visit_weights(self, tolerance: float = 1e-6, max_iterations: int = 1000) -> np.ndarray:
+        """Discounted state occupancy of a uniform random lion from the start distribution."""
+        num_states = len(self.state_codes)
+        start = np.zeros(num_states)
+        start_idx = np.searchsorted(self.state_codes, self._start_codes())
+        start[start_idx] = 1.0 / len(start_idx)
+
+        share = self.gamma / (len(LION_ACTIONS) * self.outcomes)
+        live = ~np.broadcast_to(self.done[:, :, None], self.next_states.shape)
+        sources = np.broadcast_to(np.arange(num_states)[:, None, None], self.next_states.shape)[live]
+        targets = self.next_states[live]
+
+        occupancy = start.copy()
+        for _ in range(max_iterations):
+            flow = np.bincount(targets, weights=occupancy[sources] * share, minlength=num_states)
+            new_occupancy = start + flow
+            if np.abs(new_occupancy - occupancy).max() < tolerance:
+                return new_occupancy
+            occupancy = new_occupancy
+        return occupancy
+
+    # Export
+
+    def export(self, kb):
+        """Writes the projected Q-values into kb using the agent key format."""
+        weights = self.visit_weights()
+        x, y, lion_state, _, _, _, _, impala_action = self._decode(self.state_codes)
+        key_codes = (x * GRID_SIZE + y) * len(IMPALA_ACTIONS) * len(LION_STATES) \
+            + impala_action * len(LION_STATES) + lion_state
+        keys, inverse = np.unique(key_codes, return_inverse=True)
+
+        total = np.bincount(inverse, weights=weights, minlength=len(keys))
+        projected = np.stack([
+            np.bincount(inverse, weights=weights * self.q_values[:, a], minlength=len(keys))
+            for a in range(len(LION_ACTIONS))
+        ], axis=1) / np.maximum(total, np.finfo(np.float64).tiny)[:, None]
+
+        for key_code, row in zip(keys.tolist(), projected.tolist()):
+            cell, rest = divmod(key_code, len(IMPALA_ACTIONS) * len(LION_STATES))
+            ia, ls = divmod(rest, len(LION_STATES))
+            cx, cy = divmod(cell, GRID_SIZE)
+            state_key = f"{cx},{cy}|{IMPALA_ACTIONS[ia].value}|{LION_STATES[ls].value}"
+            for action, value in zip(LION_ACTIONS, row):
+                kb.update_q_value(state_key, action.value, value)
+        return len(keys)
@@ -0,0 +1,76 @@
+import threading
+from typing import Optional, Tuple
+import numpy as np
+from app.core.entities import LionAction, LionState, ImpalaAction
+from app.core.encoding import LION_ACTIONS
+from app.learning.knowledge_base import KnowledgeBase
+from app.learning.q_table import DenseQTable, ACTION_NAMES, NUM_STATES, state_index
+
+
+class CompiledPolicy:
+    """
+    Greedy policy of a KnowledgeBase compiled into a frozen best-action array indexed by the
+    dense state index (see app.learning.q_table).
+
+    The arrays are rebuilt lazily, on the first lookup after the KB version changed, so
+    inference is an array lookup: no exploration, and reading never inserts rows into the
+    Q-table like get_q_value does. Ties and unknown states resolve to the first action,
+    like QLearningAgent.choose_action.
+    """
+
+    def __init__(self, knowledge_base: KnowledgeBase, lock: Optional[threading.RLock] = None):
+        self.kb = knowledge_base
+        # Held while reading the Q-table to rebuild (e.g. the training manager lock)
+        self.lock = lock
+        self.version = None
+        self.best_actions = np.zeros(NUM_STATES, dtype=np.int8)
+        self.known = np.zeros(NUM_STATES, dtype=bool)
+
+    def compile(self):
+        if self.lock is None:
+            self._compile()
+            return
+        with self.lock:
+            self._compile()
+
+    def _compile(self):
+        version = self.kb.version
+        q_table = self.kb.q_table
+        if isinstance(q_table, DenseQTable):
+            best_actions = np.argmax(q_table.values, axis=1).astype(np.int8)
+            known = q_table.visited.copy()
+        else:
+            values = np.zeros((NUM_STATES, len(ACTION_NAMES)))
+            known = np.zeros(NUM_STATES, dtype=bool)
+            for key, row in q_table.items():
+                try:
+                    index = DenseQTable.index_of(key)
+                except KeyError:
+                    continue
+                values[index] = [row.get(action, 0.0) for action in ACTION_NAMES]
+                known[index] = True
+            best_actions = np.argmax(values, axis=1).astype(np.int8)
+
+        # Swap both arrays at once so concurrent readers never see a half-built table
+        best_actions.setflags(write=False)
+        known.setflags(write=False)
+        self.best_actions, self.known, self.version = best_actions, known, version
+
+    def _tables(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.version != self.kb.version:
+            self.compile()
+        return self.best_actions, self.known
+
+    def action(self, lion_pos: Tuple[int, int], impala_action: ImpalaAction, lion_state: LionState) -> LionAction:
+        """Greedy action of a state."""
+        best_actions, _ = self._tables()
+        return LION_ACTIONS[best_actions[state_index(lion_pos, impala_action, lion_state)]]
+
+    def best_action(self, lion_pos: Tuple[int, int], impala_action: ImpalaAction,
+                    lion_state: LionState) -> Optional[LionAction]:
+        """Greedy action of a state, or None if the Knowledge Base has no entry for it."""
+        best_actions, known = self._tables()
+        index = state_index(lion_pos, impala_action, lion_state)
+        if not known[index]:
+            return None
+        return LION_ACTIONS[best_actions[index]]
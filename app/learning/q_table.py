@@ -0,0 +1,199 @@
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterator, Tuple
+import numpy as np
+from app.core.entities import ImpalaAction, LionState
+from app.core.encoding import (
+    GRID_SIZE, NUM_CELLS, IMPALA_ACTIONS, LION_STATES, LION_ACTIONS,
+    IMPALA_ACTION_CODE, LION_STATE_CODE, cell_index, cell_position
+)
+
+NUM_STATES = NUM_CELLS * len(IMPALA_ACTIONS) * len(LION_STATES)
+NUM_ACTIONS = len(LION_ACTIONS)
+ACTION_NAMES = tuple(a.value for a in LION_ACTIONS)
+
+_IMPALA_BY_VALUE = {a.value: i for i, a in enumerate(IMPALA_ACTIONS)}
+_LION_STATE_BY_VALUE = {s.value: i for i, s in enumerate(LION_STATES)}
+_ACTION_BY_VALUE = {name: i for i, name in enumerate(ACTION_NAMES)}
+
+
+def state_index(lion_pos: Tuple[int, int], impala_action: ImpalaAction, lion_state: LionState) -> int:
+    """Integer index of the (x, y, impala_action, lion_state) state, row of the dense table."""
+    return (cell_index(lion_pos) * len(IMPALA_ACTIONS) + IMPALA_ACTION_CODE[impala_action]) * len(LION_STATES) \
+        + LION_STATE_CODE[lion_state]
+
+
+def action_index(action: str) -> int:
+    """Column of a lion action, given as LionAction or its string value."""
+    return _ACTION_BY_VALUE[action]
+
+
+class QRow(MutableMapping):
+    """Dict-like view {action: value} over one row of a DenseQTable."""
+    __slots__ = ("_values", "_dirty", "_index")
+
+    def __init__(self, values: np.ndarray, dirty: np.ndarray = None, index: int = 0):
+        self._values = values
+        self._dirty = dirty
+        self._index = index
+
+    def __getitem__(self, action: str) -> float:
+        return float(self._values[_ACTION_BY_VALUE[action]])
+
+    def __setitem__(self, action: str, value: float):
+        self._values[_ACTION_BY_VALUE[action]] = value
+        if self._dirty is not None:
+            self._dirty[self._index] = True
+
+    def __delitem__(self, action: str):
+        raise TypeError("Q-table rows always hold every lion action")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ACTION_NAMES)
+
+    def __len__(self) -> int:
+        return NUM_ACTIONS
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class DenseQTable(MutableMapping):
+    """
+    Q-table stored as a preallocated float array of shape (NUM_STATES, NUM_ACTIONS).
+
+    A state (x, y, impala_action, lion_state) is the row
+    ((x * 19 + y) * len(ImpalaAction) + impala_action) * len(LionState) + lion_state and the
+    column is the LionAction position. `visited` marks the rows that exist in the dict sense,
+    so the table still behaves like the original {"x,y|impala_action|lion_state": {action: value}}
+    mapping (iteration, len, `in`, JSON export) while the agent works on the arrays directly.
+    `dirty` marks the rows written or created since the last take_dirty (delta checkpoints);
+    code writing `values` directly must set it too.
+    Building one from a mapping skips the keys that are not board states (older KB files
+    carry placeholder entries such as "TERMINAL"), so those never reach the arrays.
+    """
+
+    def __init__(self, data: Mapping = None):
+        self.values = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.float64)
+        self.visited = np.zeros(NUM_STATES, dtype=bool)
+        self.dirty = np.zeros(NUM_STATES, dtype=bool)
+        if data:
+            for state_key, row in data.items():
+                if not self.is_state(state_key):
+                    print(f"Skipping Q-table entry {state_key!r}: not a board state.")
+                    continue
+                self[state_key] = row
+
+    @staticmethod
+    def index_of(state_key: str) -> int:
+        """Parses "x,y|impala_action|lion_state". Raises KeyError for keys outside the board."""
+        try:
+            pos, impala_action, lion_state = state_key.split("|")
+            x, y = (int(v) for v in pos.split(","))
+            impala = _IMPALA_BY_VALUE[impala_action]
+            lion = _LION_STATE_BY_VALUE[lion_state]
+        except (ValueError, KeyError, AttributeError):
+            raise KeyError(state_key)
+        if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+            raise KeyError(state_key)
+        return (cell_index((x, y)) * len(IMPALA_ACTIONS) + impala) * len(LION_STATES) + lion
+
+    @staticmethod
+    def is_state(state_key: str) -> bool:
+        try:
+            DenseQTable.index_of(state_key)
+        except KeyError:
+            return False
+        return True
+
+    @staticmethod
+    def key_of(index: int) -> str:
+        rest, lion = divmod(int(index), len(LION_STATES))
+        cell, impala = divmod(rest, len(IMPALA_ACTIONS))
+        x, y = cell_position(cell)
+        return f"{x},{y}|{IMPALA_ACTIONS[impala].value}|{LION_STATES[lion].value}"
+
+    def row(self, index: int) -> np.ndarray:
+        """Row of a state, created (zeros) if it did not exist yet. The row counts as written."""
+        self.visited[index] = True
+        self.dirty[index] = True
+        return self.values[index]
+
+    def __getitem__(self, state_key: str) -> QRow:
+        index = self.index_of(state_key)
+        if not self.visited[index]:
+            raise KeyError(state_key)
+        return QRow(self.values[index], self.dirty, index)
+
+    def __setitem__(self, state_key: str, row: Mapping):
+        index = self.index_of(state_key)
+        values = np.zeros(NUM_ACTIONS)
+        for action, value in row.items():
+            values[_ACTION_BY_VALUE[action]] = value
+        self.values[index] = values
+        self.visited[index] = True
+        self.dirty[index] = True
+
+    def __delitem__(self, state_key: str):
+        index = self.index_of(state_key)
+        if not self.visited[index]:
+            raise KeyError(state_key)
+        self.values[index] = 0.0
+        self.visited[index] = False
+        self.dirty[index] = True
+
+    def __contains__(self, state_key) -> bool:
+        try:
+            return bool(self.visited[self.index_of(state_key)])
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        for index in np.flatnonzero(self.visited):
+            yield self.key_of(index)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.visited))
+
+    def clear(self):
+        self.values.fill(0.0)
+        self.visited.fill(False)
+        self.dirty.fill(True)
+
+    def copy(self) -> "DenseQTable":
+        """Independent copy of the values and visited rows (dirty marks start clear)."""
+        table = DenseQTable.__new__(DenseQTable)
+        table.values = self.values.copy()
+        table.visited = self.visited.copy()
+        table.dirty = np.zeros(NUM_STATES, dtype=bool)
+        return table
+
+    def take_dirty(self) -> np.ndarray:
+        """Indices of the rows changed since the previous call, which resets the marks."""
+        indices = np.flatnonzero(self.dirty)
+        self.dirty[indices] = False
+        return indices
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices of the visited states and their Q-values (the binary KB format)."""
+        indices = np.flatnonzero(self.visited)
+        return indices, self.values[indices]
+
+    def load_arrays(self, indices: np.ndarray, values: np.ndarray):
+        """Replaces the table with the given rows (inverse of to_arrays)."""
+        indices = np.asarray(indices)
+        if indices.size and (indices.min() < 0 or indices.max() >= NUM_STATES):
+            raise ValueError("State index outside the Q-table")
+        self.clear()
+        self.values[indices] = values
+        self.visited[indices] = True
+        self.dirty[indices] = True
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Plain dict-of-dicts copy, the JSON format of the Knowledge Base."""
+        return {
+            self.key_of(index): dict(zip(ACTION_NAMES, self.values[index].tolist()))
+            for index in np.flatnonzero(self.visited)
+        }
+
+    def __repr__(self):
+        return f"DenseQTable({len(self)} states)"
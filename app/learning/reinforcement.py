@@ -1,8 +1,18 @@
 import random
-from typing import Tuple
+from typing import Tuple, Union
+import numpy as np
 from app.core.entities import LionAction, LionState, ImpalaAction
+from app.core.encoding import LION_ACTIONS, LION_ACTION_CODE
 from app.learning.knowledge_base import KnowledgeBase
-from app.learning.experience_replay import ExperienceReplay
+from app.learning.experience_replay import (
+    ExperienceReplay, ArrayExperienceReplay, PrioritizedExperienceReplay, REPLAY_MODES
+)
+from app.learning.q_table import DenseQTable, NUM_STATES, NUM_ACTIONS, state_index
+from app.learning.eligibility import EligibilityTraces, TRACE_MODES
+from app.learning.dyna import DynaModel
+
+# A state is the string key with the dict backend, or the integer row with the dense backend
+State = Union[str, int]
 
 class QLearningAgent:
     def __init__(self, knowledge_base: KnowledgeBase, 
@@ -11,7 +21,11 @@ class QLearningAgent:
                  epsilon_start=1.0,  # Start with full exploration
                  epsilon_end=0.05,  # Minimum exploration
                  epsilon_decay=0.995,  # Decay rate per episode
-                 lambda_=0.8):  # Eligibility trace decay
+                 lambda_=0.8,  # Eligibility trace decay
+                 trace_mode="accumulating",  # "accumulating" or "replacing" traces
+                 replay_size=10000,  # Experiences kept for batch learning
+                 replay="uniform",  # "uniform" or "prioritized" (dense backend only)
+                 dyna_steps=0):  # Simulated backups from the learned model per real step (dense backend only)
         self.kb = knowledge_base
         self.alpha = learning_rate
         self.gamma = discount_factor
@@ -21,22 +35,90 @@ class QLearningAgent:
         self.lambda_ = lambda_
         
         # Experience replay
-        self.replay_buffer = ExperienceReplay(max_size=10000)
+        self.configure_replay(replay, replay_size)
+
+        # Dyna-Q planning
+        self.configure_dyna(dyna_steps)
         
         # Eligibility traces
-        self.eligibility_traces = {}
+        if trace_mode not in TRACE_MODES:
+            raise ValueError(f"Unknown trace mode: {trace_mode}")
+        self.trace_mode = trace_mode
+        self.reset_eligibility()
+
+    def configure_replay(self, mode: str = "uniform", max_size: int = 10000):
+        """
+        (Re)creates the replay buffer: typed ring buffer with the dense backend (seeded from
+        `random`), deque of tuples otherwise. Keeps the current buffer if nothing changes.
+        """
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        if mode == "prioritized" and not self.kb.dense:
+            raise ValueError("Prioritized replay needs the dense Q-table backend")
+        if getattr(self, "replay_mode", None) == mode and self.replay_size == max_size:
+            return
+
+        self.replay_mode = mode
+        self.replay_size = max_size
+        if mode == "prioritized":
+            self.replay_buffer = PrioritizedExperienceReplay(max_size=max_size, seed=random.getrandbits(64))
+        elif self.kb.dense:
+            self.replay_buffer = ArrayExperienceReplay(max_size=max_size, seed=random.getrandbits(64))
+        else:
+            self.replay_buffer = ExperienceReplay(max_size=max_size)
+
+    def configure_dyna(self, steps: int = 0):
+        """
+        Enables Dyna-Q with `steps` simulated backups after every real update (0 disables it).
+        The learned model is kept while planning stays enabled.
+        """
+        if steps < 0:
+            raise ValueError("dyna_steps must not be negative")
+        if steps and not self.kb.dense:
+            raise ValueError("Dyna-Q planning needs the dense Q-table backend")
+        self.dyna_steps = steps
+        if not steps:
+            self.model = None
+        elif getattr(self, "model", None) is None:
+            self.model = DynaModel(NUM_STATES, NUM_ACTIONS, seed=random.getrandbits(64))
+
+    def plan(self, steps: int = None):
+        """Dyna-Q planning: one batched Q-update over `steps` transitions simulated by the model."""
+        if self.model is None or not len(self.model):
+            return
+        self.learn_arrays(*self.model.sample(self.dyna_steps if steps is None else steps))
 
     def get_state_key(self, lion_pos: Tuple[int, int], impala_action: ImpalaAction, lion_state: LionState) -> str:
         # Key format: "x,y|impala_action|lion_state"
         return f"{lion_pos[0]},{lion_pos[1]}|{impala_action.value}|{lion_state.value}"
 
-    def choose_action(self, state_key: str, available_actions: list = None) -> LionAction:
+    def encode_state(self, lion_pos: Tuple[int, int], impala_action: ImpalaAction, lion_state: LionState) -> State:
+        """State used by the learning methods: integer row for a dense KB, string key otherwise."""
+        if self.kb.dense:
+            return state_index(lion_pos, impala_action, lion_state)
+        return self.get_state_key(lion_pos, impala_action, lion_state)
+
+    def _row(self, state: State) -> np.ndarray:
+        """Dense Q-values of a state (row is created like get_q_value does)."""
+        if isinstance(state, str):
+            state = DenseQTable.index_of(state)
+        return self.kb.q_table.row(state)
+
+    def choose_action(self, state_key: State, available_actions: list = None) -> LionAction:
         if available_actions is None:
             available_actions = list(LionAction)
 
         if random.random() < self.epsilon:
             return random.choice(available_actions)
         
+        if self.kb.dense:
+            # argmax returns the first maximum, like the loop below
+            row = self._row(state_key)
+            if len(available_actions) == len(LION_ACTIONS):
+                return LION_ACTIONS[int(np.argmax(row))]
+            codes = [LION_ACTION_CODE[a] for a in available_actions]
+            return available_actions[int(np.argmax(row[codes]))]
+        
         # Exploitation: choose best Q-value
         best_action = None
         max_q = float('-inf')
@@ -54,8 +136,17 @@ class QLearningAgent:
              
         return best_action
 
-    def learn(self, state_key: str, action: LionAction, reward: float, next_state_key: str, done: bool = False):
+    def learn(self, state_key: State, action: LionAction, reward: float, next_state_key: State, done: bool = False):
         """Standard Q-Learning update"""
+        if self.kb.dense:
+            code = LION_ACTION_CODE[action]
+            self._learn_dense(state_key, code, reward, next_state_key, done)
+            self.replay_buffer.add(state_key, action.value, reward, next_state_key, done)
+            if self.model is not None:
+                self.model.observe(state_key, code, reward, next_state_key, done)
+                self.plan()
+            return
+
         current_q = self.kb.get_q_value(state_key, action.value)
         
         # Max Q for next state
@@ -79,8 +170,18 @@ class QLearningAgent:
         # Add to replay buffer
         self.replay_buffer.add(state_key, action.value, reward, next_state_key, done)
 
-    def learn_with_traces(self, state_key: str, action: LionAction, reward: float, next_state_key: str, done: bool = False):
+    def _learn_dense(self, state: State, action: int, reward: float, next_state: State, done: bool):
+        row = self._row(state)
+        max_next_q = 0.0 if done else self._row(next_state).max()
+        row[action] += self.alpha * (reward + self.gamma * max_next_q - row[action])
+        self.kb.mark_changed()
+
+    def learn_with_traces(self, state_key: State, action: LionAction, reward: float, next_state_key: State, done: bool = False):
         """Q-Learning with eligibility traces for faster credit assignment"""
+        if self.kb.dense:
+            self._learn_with_traces_dense(state_key, action, reward, next_state_key, done)
+            return
+
         current_q = self.kb.get_q_value(state_key, action.value)
         
         # Calculate TD error
@@ -93,7 +194,10 @@ class QLearningAgent:
         
         # Update eligibility trace for current state-action
         trace_key = f"{state_key}|{action.value}"
-        self.eligibility_traces[trace_key] = self.eligibility_traces.get(trace_key, 0.0) + 1.0
+        if self.trace_mode == "replacing":
+            self.eligibility_traces[trace_key] = 1.0
+        else:
+            self.eligibility_traces[trace_key] = self.eligibility_traces.get(trace_key, 0.0) + 1.0
         
         # Update all state-actions with eligibility traces
         traces_to_remove = []
@@ -119,12 +223,42 @@ class QLearningAgent:
         # Add to replay buffer
         self.replay_buffer.add(state_key, action.value, reward, next_state_key, done)
 
+    def _learn_with_traces_dense(self, state: State, action: LionAction, reward: float, next_state: State, done: bool):
+        values = self.kb.q_table.values
+        row = self._row(state)
+        code = LION_ACTION_CODE[action]
+        max_next_q = 0.0 if done else self._row(next_state).max()
+        td_error = reward + self.gamma * max_next_q - row[code]
+
+        # Vectorized update, decay and pruning of every active trace
+        if isinstance(state, str):
+            state = DenseQTable.index_of(state)
+        self.eligibility_traces.visit(state, code)
+        self.eligibility_traces.apply(values, self.alpha * td_error, self.gamma * self.lambda_, self.kb.q_table.dirty)
+        self.kb.mark_changed()
+
+        self.replay_buffer.add(state, action.value, reward, next_state, done)
+        if self.model is not None:
+            self.model.observe(state, code, reward, next_state, done)
+            self.plan()
+
     def learn_batch(self, batch_size=32):
         """Learn from a batch of experiences from replay buffer"""
         if self.replay_buffer.size() < batch_size:
             return
         
+        if self.replay_mode == "prioritized":
+            slots, weights, *batch = self.replay_buffer.sample_prioritized(batch_size)
+            td_errors = self.learn_arrays(*batch, weights=weights)
+            self.replay_buffer.update_priorities(slots, td_errors)
+            return
+
+        if self.kb.dense:
+            self.learn_arrays(*self.replay_buffer.sample_arrays(batch_size))
+            return
+
         batch = self.replay_buffer.sample(batch_size)
+
         for state_key, action, reward, next_state_key, done in batch:
             # Use standard Q-learning for batch updates (not traces)
             current_q = self.kb.get_q_value(state_key, action)
@@ -137,9 +271,57 @@ class QLearningAgent:
             new_q = current_q + self.alpha * (reward + self.gamma * max_next_q - current_q)
             self.kb.update_q_value(state_key, action, new_q)
 
+    def learn_arrays(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                     next_states: np.ndarray, dones: np.ndarray, weights: np.ndarray = None) -> np.ndarray:
+        """
+        Q-learning update of a whole minibatch on the dense table (rows and action columns as arrays).
+        Every TD error is computed against the table before the batch; transitions that hit
+        the same (state, action) get the mean of their (weighted) TD errors, written in one
+        scatter, so the result does not depend on the order of the batch. Returns the TD errors.
+        """
+        q = self.kb.q_table
+        values = q.values
+        self.kb.mark_changed()
+        # Touched rows exist afterwards, as with get_q_value
+        q.visited[states] = True
+        q.visited[next_states[~dones]] = True
+        q.dirty[states] = True
+        q.dirty[next_states[~dones]] = True
+
+        current_q = values[states, actions]
+        max_next_q = np.where(dones, 0.0, values[next_states].max(axis=1))
+        td_errors = rewards + self.gamma * max_next_q - current_q
+
+        step = td_errors if weights is None else weights * td_errors
+        flat = states.astype(np.int64) * values.shape[1] + actions
+        order = np.argsort(flat)
+        flat = flat[order]
+        first = np.empty(flat.size, dtype=bool)
+        first[:1] = True
+        np.not_equal(flat[1:], flat[:-1], out=first[1:])
+        if first.all():
+            # No repeated (state, action): plain scatter
+            values.reshape(-1)[flat] += self.alpha * step[order]
+            return td_errors
+
+        starts = np.flatnonzero(first)
+        counts = np.diff(np.append(starts, flat.size))
+        mean_step = np.add.reduceat(step[order], starts) / counts
+        values.reshape(-1)[flat[starts]] += self.alpha * mean_step
+        return td_errors
+
     def reset_eligibility(self):
-        """Reset eligibility traces at episode start"""
-        self.eligibility_traces = {}
+        """Reset eligibility traces at episode start (reusing the store unless the backend or mode changed)"""
+        traces = getattr(self, "eligibility_traces", None)
+        if self.kb.dense:
+            if isinstance(traces, EligibilityTraces) and traces.mode == self.trace_mode:
+                traces.reset()
+            else:
+                self.eligibility_traces = EligibilityTraces(NUM_ACTIONS, mode=self.trace_mode)
+        elif isinstance(traces, dict):
+            traces.clear()
+        else:
+            self.eligibility_traces = {}
 
     def decay_epsilon(self):
         """Decay epsilon after each episode"""
@@ -1,48 +1,146 @@
-from app.core.entities import LionAction, LionState, ImpalaState
-from app.utils.geometry import calculate_distance
+from typing import Tuple
+import numpy as np
+from app.core.entities import LionAction, ImpalaState
+from app.core.encoding import (
+    GRID_SIZE, NUM_CELLS, LION_ACTION_CODE, IMPALA_STATE_CODE, STATUS_IN_PROGRESS, STATUS_SUCCESS, STATUS_FAILED
+)
+
+SHAPING_MODES = ("heuristic", "potential")
+
+SUCCESS_REWARD = 100.0
+FAIL_REWARD = -100.0
+STEP_PENALTY = -0.5
+
+IMPALA_FLEEING = IMPALA_STATE_CODE[ImpalaState.FLEEING]
+MAX_SQUARED_DISTANCE = 2 * (GRID_SIZE - 1) ** 2
+
 
 class RewardSystem:
+    """
+    Shaped rewards for training.
+
+    shaping="heuristic" (default) is the original hand-made shaping: +/-2 for getting closer or
+    farther, bonuses/penalties for hiding, attacking and advancing at given distances, -5 for
+    scaring the impala from far away and a -0.5 step penalty.
+    shaping="potential" adds gamma * phi(s') - phi(s) to the step penalty instead, with
+    phi = -potential_scale * lion/impala distance and phi = 0 at terminal states. Potential
+    based shaping does not change the optimal policy (Ng et al., 1999).
+
+    Distances and the distance-dependent action terms come from tables over (lion cell,
+    impala cell) built once and shared; calculate_rewards evaluates whole batches on arrays.
+    """
+    _distance = None
+    _action_bonus = None
+
+    def __init__(self, shaping: str = "heuristic", discount_factor: float = 0.95, potential_scale: float = 1.0):
+        if shaping not in SHAPING_MODES:
+            raise ValueError(f"Unknown reward shaping: {shaping}")
+        self.shaping = shaping
+        self.gamma = discount_factor
+        self.potential_scale = potential_scale
+        if RewardSystem._distance is None:
+            RewardSystem._distance, RewardSystem._action_bonus = self._build_tables()
+        self.distance = RewardSystem._distance
+        self.action_bonus = RewardSystem._action_bonus
+
+    @staticmethod
+    def _bonus_by_squared_distance() -> np.ndarray:
+        """Strategic action terms of the heuristic shaping, by (action, squared lion/impala distance)."""
+        distance = np.sqrt(np.arange(MAX_SQUARED_DISTANCE + 1, dtype=np.float64))
+        bonus = np.zeros((len(LION_ACTION_CODE), MAX_SQUARED_DISTANCE + 1))
+        bonus[LION_ACTION_CODE[LionAction.HIDE]] = np.where(distance > 5, 1.0, 0.0)
+        bonus[LION_ACTION_CODE[LionAction.ATTACK]] = np.where(distance <= 3, 3.0, np.where(distance > 5, -2.0, 0.0))
+        bonus[LION_ACTION_CODE[LionAction.ADVANCE]] = np.where((distance > 3) & (distance <= 6), 1.0, 0.0)
+        return bonus
+
+    @classmethod
+    def _build_tables(cls) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-cell tables over (lion cell, impala cell): distance and action terms for each action."""
+        x, y = np.divmod(np.arange(NUM_CELLS), GRID_SIZE)
+        squared = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2
+        distance = np.sqrt(squared.astype(np.float64))
+        bonus = cls._bonus_by_squared_distance()[:, squared]
+
+        # Small per squared distance lists for the scalar path (Python lists index faster than arrays)
+        cls._sqrt_list = np.sqrt(np.arange(MAX_SQUARED_DISTANCE + 1, dtype=np.float64)).tolist()
+        cls._bonus_lists = {action: cls._bonus_by_squared_distance()[code].tolist()
+                            for action, code in LION_ACTION_CODE.items()}
+
+        distance.setflags(write=False)
+        bonus.setflags(write=False)
+        return distance, bonus
+
     def calculate_reward(self, prev_state, action, new_state, done, info):
         """
         Calculate reward with shaping for faster learning.
         Includes distance-based incentives and strategic action rewards.
         """
-        reward = 0.0
-        
+        return self.step_reward(prev_state.lion.position, prev_state.impala.position, prev_state.impala.state,
+                                action, new_state)
+
+    def step_reward(self, prev_lion_pos: Tuple[int, int], prev_impala_pos: Tuple[int, int],
+                    prev_impala_state: ImpalaState, action: LionAction, new_state) -> float:
+        """Scalar reward from the positions before the step, so no copy of the previous state is needed."""
+        lion_pos, impala_pos = new_state.lion.position, new_state.impala.position
+        # Squared distances are exact integers and index the small per-distance tables
+        prev_sq = (prev_lion_pos[0] - prev_impala_pos[0]) ** 2 + (prev_lion_pos[1] - prev_impala_pos[1]) ** 2
+        new_sq = (lion_pos[0] - impala_pos[0]) ** 2 + (lion_pos[1] - impala_pos[1]) ** 2
+
+        if self.shaping == "potential":
+            prev_dist = self._sqrt_list[prev_sq]
+            # The terminal potential is 0, so a terminal step only gets -phi(s)
+            if new_state.status == "success":
+                return SUCCESS_REWARD + self.potential_scale * prev_dist
+            elif new_state.status == "failed":
+                return FAIL_REWARD + self.potential_scale * prev_dist
+            return STEP_PENALTY + self.potential_scale * (prev_dist - self.gamma * self._sqrt_list[new_sq])
+
         # Terminal rewards
         if new_state.status == "success":
-            return 100.0
+            return SUCCESS_REWARD
         elif new_state.status == "failed":
-            return -100.0
-        
+            return FAIL_REWARD
+
+        reward = 0.0
         # Distance-based reward shaping
-        prev_dist = calculate_distance(prev_state.lion.position, prev_state.impala.position)
-        new_dist = calculate_distance(new_state.lion.position, new_state.impala.position)
-        
-        # Reward for getting closer (positive reinforcement)
-        if new_dist < prev_dist:
+        if new_sq < prev_sq:
             reward += 2.0
-        elif new_dist > prev_dist:
-            reward -= 2.0  # Penalty for moving away
-        
+        elif new_sq > prev_sq:
+            reward -= 2.0
+
         # Strategic action rewards
-        if action == LionAction.HIDE and new_dist > 5:
-            reward += 1.0  # Good to hide when far
-        elif action == LionAction.ATTACK and new_dist <= 3:
-            reward += 3.0  # Good to attack when close
-        elif action == LionAction.ATTACK and new_dist > 5:
-            reward -= 2.0  # Bad to attack when too far
-        
-        # Encourage advancing when at medium distance
-        if action == LionAction.ADVANCE and 3 < new_dist <= 6:
-            reward += 1.0
-        
+        reward += self._bonus_lists[action][new_sq]
+
         # Penalty for triggering flee too early
-        if new_state.impala.state == ImpalaState.FLEEING and prev_state.impala.state != ImpalaState.FLEEING:
-            if new_dist > 5:
-                reward -= 5.0  # Big penalty for scaring impala when far
-        
+        if new_sq > 25 and new_state.impala.state == ImpalaState.FLEEING and prev_impala_state != ImpalaState.FLEEING:
+            reward -= 5.0
+
         # Step penalty (encourage efficiency)
-        reward -= 0.5
-        
-        return reward
+        return reward + STEP_PENALTY
+
+    def calculate_rewards(self, prev_lion_pos: np.ndarray, prev_impala_pos: np.ndarray, prev_impala_state: np.ndarray,
+                          lion_actions: np.ndarray, new_lion_pos: np.ndarray, new_impala_pos: np.ndarray,
+                          new_impala_state: np.ndarray, status: np.ndarray) -> np.ndarray:
+        """
+        Batched step_reward. Positions are (N, 2) arrays, states, actions and status integer
+        codes as in app.core.encoding (lion_actions are the requested actions).
+        """
+        prev_lion = prev_lion_pos[:, 0].astype(np.intp) * GRID_SIZE + prev_lion_pos[:, 1]
+        prev_impala = prev_impala_pos[:, 0].astype(np.intp) * GRID_SIZE + prev_impala_pos[:, 1]
+        new_lion = new_lion_pos[:, 0].astype(np.intp) * GRID_SIZE + new_lion_pos[:, 1]
+        new_impala = new_impala_pos[:, 0].astype(np.intp) * GRID_SIZE + new_impala_pos[:, 1]
+        prev_dist = self.distance[prev_lion, prev_impala]
+        new_dist = self.distance[new_lion, new_impala]
+
+        if self.shaping == "potential":
+            terminal = status != STATUS_IN_PROGRESS
+            reward = self.potential_scale * (prev_dist - self.gamma * np.where(terminal, 0.0, new_dist))
+            base = np.where(status == STATUS_SUCCESS, SUCCESS_REWARD, np.where(status == STATUS_FAILED, FAIL_REWARD, STEP_PENALTY))
+            return base + reward
+
+        reward = np.sign(prev_dist - new_dist) * 2.0
+        reward = reward + self.action_bonus[lion_actions.astype(np.intp), new_lion, new_impala]
+        scared = (new_impala_state == IMPALA_FLEEING) & (prev_impala_state != IMPALA_FLEEING) & (new_dist > 5)
+        reward = reward - 5.0 * scared + STEP_PENALTY
+
+        return np.where(status == STATUS_SUCCESS, SUCCESS_REWARD, np.where(status == STATUS_FAILED, FAIL_REWARD, reward))
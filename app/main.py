@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import simulation, training, hunting, knowledge, visualization, logs
+from app.api import simulation, training, hunting, knowledge, visualization, logs, metrics, jobs
 import os
 
 app = FastAPI(title="Leon Impala Simulation", version="1.0.0")
@@ -16,13 +16,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and status per router (GET /metrics)
+app.middleware("http")(metrics.track_requests)
+
 # Include Routers
 app.include_router(simulation.router, prefix="/api/simulation", tags=["Simulation"])
+app.include_router(jobs.router, prefix="/api/training/jobs", tags=["Training Jobs"])
 app.include_router(training.router, prefix="/api/training", tags=["Training"])
 app.include_router(hunting.router, prefix="/api/hunting", tags=["Hunting"])
 app.include_router(knowledge.router, prefix="/api/knowledge", tags=["Knowledge"])
 app.include_router(visualization.router, prefix="/api/visualization", tags=["Visualization"])
 app.include_router(logs.router, prefix="/api/logs", tags=["Logs"])
+app.include_router(metrics.router, tags=["Metrics"])
 
 @app.get("/")
 def read_root():
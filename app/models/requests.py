@@ -7,6 +7,29 @@ class TrainingStartRequest(BaseModel):
     initial_positions: List[int]
     impala_mode: str # "random" or "programmed"
     impala_sequence: Optional[List[ImpalaAction]] = None
+    history_mode: str = "sampled" # "off", "sampled" or "full"
+    history_sample_every: int = 100 # Record every Nth incursion when sampled
+    termination: str = "exact" # "exact" (capture oracle) or "heuristic" (original speed/distance rule)
+    num_workers: int = 1 # Worker processes; more than 1 trains in parallel and merges Q-tables
+    merge_every: int = 50 # Incursions each worker plays between Q-table merges
+    replay: str = "uniform" # Experience replay: "uniform" or "prioritized" (TD-error priorities)
+    replay_size: int = 10000 # Experiences kept in the replay buffer
+    replay_batch_size: int = 32 # Experiences replayed after each incursion
+    dyna_steps: int = 0 # Dyna-Q: simulated backups from the learned model after each real step (0 = off)
+    profile: bool = True # Time the training phases (GET /api/training/profile); False disables all timing
+    reward_shaping: str = "heuristic" # "heuristic" (original shaping) or "potential" (keeps the optimal policy)
+    checkpoint_policy: str = "every" # "every" (each checkpoint_every incursions), "interval" (each checkpoint_seconds) or "improvement"
+    checkpoint_every: int = 100 # Incursions between checkpoints ("every"), or between success-rate checks ("improvement")
+    checkpoint_seconds: float = 60.0 # Seconds between checkpoints ("interval")
+
+class TrainingSolveRequest(BaseModel):
+    initial_positions: List[int] = [1, 2, 3, 4, 5, 6, 7, 8]
+    impala_mode: str # "random" or "programmed"
+    impala_sequence: Optional[List[ImpalaAction]] = None
+    discount_factor: float = 0.95
+    termination: str = "exact" # "exact" (capture oracle) or "heuristic" (original speed/distance rule)
+    tolerance: float = 1e-6
+    max_iterations: int = 1000
 
 class HuntingStartRequest(BaseModel):
     lion_position: int # 1-8
@@ -21,10 +44,16 @@ class HuntingStepRequest(BaseModel):
 
 class KnowledgeSaveRequest(BaseModel):
     filename: str
-    format: str = "json"
+    format: str = "json" # "json", "pickle" or "npy" (memory-mapped binary, float32 Q-values)
 
 class KnowledgeLoadRequest(BaseModel):
     filename: str
+    format: Optional[str] = None # None tries JSON, pickle and binary in that order
+
+class KnowledgeConvertRequest(BaseModel):
+    filename: str
+    to_format: str # "json", "pickle" or "npy"
+    from_format: Optional[str] = None # None takes the first existing file (JSON, pickle, binary)
 
 class HuntingExplainRequest(BaseModel):
     time_step: Optional[int] = None
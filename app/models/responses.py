@@ -8,13 +8,47 @@ class SimulationStateResponse(BaseModel):
     time_step: int
     status: str
 
+class WorkerStatusResponse(BaseModel):
+    worker_id: int
+    incursions: int
+    success_count: int
+    fail_count: int
+    rounds: int # Q-table merges this worker took part in
+
 class TrainingStatusResponse(BaseModel):
-    status: str # "running", "completed", "stopped"
+    status: str # "running", "paused", "stopped"
+    progress: float
+    current_incursion: int
+    total_incursions: int
+    success_count: int
+    fail_count: int
+    workers: List[WorkerStatusResponse] = [] # Per-worker progress of parallel training
+
+class TrainingJobResponse(BaseModel):
+    job_id: str
+    status: str # "queued", "running", "stopping", "stopped", "completed" or "failed"
     progress: float
     current_incursion: int
     total_incursions: int
     success_count: int
     fail_count: int
+    success_rate: float
+    epsilon: Optional[float] = None # Exploration rate at the last progress report
+    q_table_size: int = 0 # States in the last Q-table sent back by the job
+    created_at: float # Unix timestamps
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+class TrainingSolveResponse(BaseModel):
+    states: int # Reachable planning states
+    iterations: int
+    converged: bool
+    residual: float
+    start_value: float # Optimal expected return from the start positions
+    start_success_rate: float # Catch probability of the optimal policy from the start positions
+    elapsed_seconds: float
+    q_table_size: int
 
 class HuntingStepResponse(BaseModel):
     lion: Lion
@@ -39,6 +73,11 @@ class VisualizationMapResponse(BaseModel):
 class VisionAreasResponse(BaseModel):
     triangle_points: List[List[float]] # [[x1, y1], [x2, y2], [x3, y3]]
 
+class VisionCellsResponse(BaseModel):
+    direction: str
+    lion_state: str
+    cells: List[List[int]] # [[x, y], ...] board cells where the lion would be seen
+
 class HistoryResponse(BaseModel):
     history: List[Dict[str, Any]] # List of state dicts
 
@@ -49,6 +88,29 @@ class TrainingStatisticsResponse(BaseModel):
     success_rate_by_position: Dict[int, float]
     abstractions_count: int
     q_table_size: int
+    replay_size: int = 0 # Experiences in the replay buffer
+    replay_memory_bytes: int = 0
+
+class PhaseRollingResponse(BaseModel):
+    count: int # Durations in the rolling window
+    mean_seconds: float
+    p50_seconds: float
+    p90_seconds: float
+    p99_seconds: float
+    histogram: List[int]
+
+class PhaseProfileResponse(BaseModel):
+    count: int
+    total_seconds: float
+    mean_seconds: float
+    max_seconds: float
+    histogram: List[int] # Counts per bucket of bucket_bounds_seconds, last bucket above them
+    rolling: PhaseRollingResponse
+
+class TrainingProfileResponse(BaseModel):
+    enabled: bool
+    bucket_bounds_seconds: List[float]
+    phases: Dict[str, PhaseProfileResponse]
 
 class HuntingExplainResponse(BaseModel):
     explanation: str
@@ -0,0 +1,83 @@
+import json
+import os
+import zlib
+from typing import List
+import numpy as np
+
+# Append-only log of Q-table row deltas. Each frame is
+#   MAGIC, uint32 payload length, uint32 CRC-32 of the payload, payload
+# and the payload is a uint32 header length, a JSON header (row count and metadata),
+# then the int32 row indices, the uint8 `visited` flags and the float64 rows.
+# A frame is fsynced before append returns; a crash can only leave a torn last frame,
+# which load detects (short read or bad checksum) and drops with everything after it.
+MAGIC = b"LIKD"
+STATE_DTYPE = np.dtype("<i4")
+VISITED_DTYPE = np.dtype("u1")
+Q_DTYPE = np.dtype("<f8")
+
+
+class DeltaStorage:
+    @staticmethod
+    def append(data: dict, filepath: str) -> int:
+        """
+        Appends one frame with data["states"], data["visited"] and data["q_values"];
+        every other key must be JSON-serializable. Returns the bytes written.
+        """
+        states = np.ascontiguousarray(data["states"], dtype=STATE_DTYPE)
+        visited = np.ascontiguousarray(data["visited"], dtype=VISITED_DTYPE)
+        q_values = np.ascontiguousarray(data["q_values"], dtype=Q_DTYPE)
+        metadata = {key: value for key, value in data.items() if key not in ("states", "visited", "q_values")}
+        header = json.dumps({"rows": int(states.shape[0]), "columns": int(q_values.shape[1]), "metadata": metadata})
+        header = header.encode("utf-8")
+
+        payload = b"".join([
+            np.uint32(len(header)).tobytes(), header, states.tobytes(), visited.tobytes(), q_values.tobytes()
+        ])
+        frame = MAGIC + np.array([len(payload), zlib.crc32(payload)], dtype="<u4").tobytes() + payload
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, "ab") as f:
+            f.write(frame)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(frame)
+
+    @staticmethod
+    def load(filepath: str) -> List[dict]:
+        """Complete frames in order, each as its metadata plus "states", "visited" and "q_values"."""
+        with open(filepath, "rb") as f:
+            content = f.read()
+
+        frames = []
+        offset = 0
+        prefix = len(MAGIC) + 8
+        while offset + prefix <= len(content):
+            if content[offset:offset + len(MAGIC)] != MAGIC:
+                break
+            length, crc = np.frombuffer(content, dtype="<u4", count=2, offset=offset + len(MAGIC)).tolist()
+            payload = content[offset + prefix:offset + prefix + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            offset += prefix + length
+
+            header_length = int(np.frombuffer(payload, dtype="<u4", count=1)[0])
+            header = json.loads(payload[4:4 + header_length].decode("utf-8"))
+            rows, columns = header["rows"], header["columns"]
+            position = 4 + header_length
+            frame = dict(header["metadata"])
+            frame["states"] = np.frombuffer(payload, dtype=STATE_DTYPE, count=rows, offset=position)
+            position += rows * STATE_DTYPE.itemsize
+            frame["visited"] = np.frombuffer(payload, dtype=VISITED_DTYPE, count=rows, offset=position).astype(bool)
+            position += rows * VISITED_DTYPE.itemsize
+            frame["q_values"] = np.frombuffer(payload, dtype=Q_DTYPE, count=rows * columns, offset=position)
+            frame["q_values"] = frame["q_values"].reshape(rows, columns)
+            frames.append(frame)
+        return frames
+
+    @staticmethod
+    def reset(filepath: str):
+        """Drops the log (after a full snapshot made it redundant)."""
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
@@ -3,10 +3,34 @@ import os
 
 class JsonStorage:
     @staticmethod
-    def save(data: dict, filepath: str):
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, "w") as f:
+    def save(data: dict, filepath: str, atomic: bool = False):
+        """
+        With `atomic`, writes a temporary file and renames it, so readers never see a partial
+        file. The file and the rename are fsynced before returning, so the new file survives
+        a crash once save returns (callers may then drop what it replaces).
+        """
+        directory = os.path.dirname(filepath)
+        os.makedirs(directory, exist_ok=True)
+        target = filepath + ".tmp" if atomic else filepath
+        with open(target, "w") as f:
             json.dump(data, f, indent=2)
+            if atomic:
+                f.flush()
+                os.fsync(f.fileno())
+        if atomic:
+            os.replace(target, filepath)
+            JsonStorage._fsync_directory(directory)
+
+    @staticmethod
+    def _fsync_directory(directory: str):
+        # Makes a rename durable; platforms that cannot open directories (Windows) skip it
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
 
     @staticmethod
     def load(filepath: str) -> dict:
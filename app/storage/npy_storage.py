@@ -0,0 +1,67 @@
+import json
+import os
+import numpy as np
+
+# Binary Knowledge Base file:
+#   MAGIC, uint32 header length, JSON header (metadata and array layout, padded to ALIGNMENT),
+#   int32 state index (one dense row index per stored state),
+#   float32 Q matrix (one row per stored state, little-endian, C order).
+# Both arrays are memory-mapped on load, so opening a file only parses the header. The
+# Knowledge Base copies the rows into its own writable float64 table (KnowledgeBase.load).
+MAGIC = b"LIKB\x01"
+ALIGNMENT = 64
+STATE_DTYPE = np.dtype("<i4")
+Q_DTYPE = np.dtype("<f4")
+
+
+class NpyStorage:
+    @staticmethod
+    def save(data: dict, filepath: str):
+        """
+        Writes data["states"] (1-D) and data["q_values"] (2-D, one row per state) as binary
+        arrays; every other key must be JSON-serializable and goes into the header.
+        """
+        states = np.ascontiguousarray(data["states"], dtype=STATE_DTYPE)
+        q_values = np.ascontiguousarray(data["q_values"], dtype=Q_DTYPE)
+        if q_values.ndim != 2 or q_values.shape[0] != states.shape[0]:
+            raise ValueError("q_values needs one row per state")
+        metadata = {key: value for key, value in data.items() if key not in ("states", "q_values")}
+
+        prefix = len(MAGIC) + 4
+        header = json.dumps({"rows": int(states.shape[0]), "columns": int(q_values.shape[1]), "metadata": metadata})
+        header = header.encode("utf-8")
+        header += b" " * (-(prefix + len(header)) % ALIGNMENT)
+        states_offset = prefix + len(header)
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.uint32(len(header)).tobytes())
+            f.write(header)
+            f.write(states.tobytes())
+            # Keep the Q matrix aligned too
+            f.write(b"\0" * (-(states_offset + states.nbytes) % ALIGNMENT))
+            f.write(q_values.tobytes())
+
+    @staticmethod
+    def load(filepath: str) -> dict:
+        """Header metadata plus read-only memory maps of "states" and "q_values"."""
+        with open(filepath, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{filepath} is not a binary Knowledge Base file")
+            header_length = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+            header = json.loads(f.read(header_length).decode("utf-8"))
+
+        rows, columns = header["rows"], header["columns"]
+        states_offset = len(MAGIC) + 4 + header_length
+        q_offset = states_offset + rows * STATE_DTYPE.itemsize
+        q_offset += -q_offset % ALIGNMENT
+        data = dict(header["metadata"])
+        if rows:
+            data["states"] = np.memmap(filepath, dtype=STATE_DTYPE, mode="r", offset=states_offset, shape=(rows,))
+            data["q_values"] = np.memmap(filepath, dtype=Q_DTYPE, mode="r", offset=q_offset, shape=(rows, columns))
+        else:
+            # An empty memory map is not allowed
+            data["states"] = np.zeros(0, dtype=STATE_DTYPE)
+            data["q_values"] = np.zeros((0, columns), dtype=Q_DTYPE)
+        return data
@@ -0,0 +1,63 @@
+import asyncio
+from typing import AsyncIterator, Callable, Optional
+
+
+class SnapshotBroadcaster:
+    """
+    Fans one periodically built snapshot out to any number of async subscribers.
+
+    A single producer task calls `build` every `tick` seconds while someone is subscribed,
+    so the cost does not grow with the number of subscribers. Each subscriber only ever
+    receives the latest snapshot, at most once per its own `interval`: snapshots produced
+    while a subscriber is sleeping or blocked on a slow connection are skipped (coalesced),
+    so a slow client never holds up the producer or other clients. Unchanged snapshots are
+    not resent; subscribers get None after `keepalive` seconds without news instead.
+    """
+
+    def __init__(self, build: Callable[[], dict], tick: float = 0.25, keepalive: float = 15.0):
+        self.build = build
+        self.tick = tick
+        self.keepalive = keepalive
+        self.subscribers = 0
+        self.builds = 0
+        self._latest: Optional[dict] = None
+        self._version = 0
+        self._changed: Optional[asyncio.Condition] = None
+        self._producer: Optional[asyncio.Task] = None
+
+    async def subscribe(self, interval: float) -> AsyncIterator[Optional[dict]]:
+        """Yields the latest snapshot at most every `interval` seconds (None as a keep-alive)."""
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        self.subscribers += 1
+        if self._producer is None or self._producer.done():
+            self._producer = asyncio.get_running_loop().create_task(self._produce())
+
+        seen = 0
+        try:
+            while True:
+                snapshot = None
+                async with self._changed:
+                    try:
+                        await asyncio.wait_for(self._changed.wait_for(lambda: self._version != seen), self.keepalive)
+                        seen = self._version
+                        snapshot = self._latest
+                    except asyncio.TimeoutError:
+                        pass
+                # Yield outside the lock: a slow consumer must not block the producer
+                yield snapshot
+                if snapshot is not None:
+                    await asyncio.sleep(interval)
+        finally:
+            self.subscribers -= 1
+
+    async def _produce(self):
+        while self.subscribers:
+            snapshot = self.build()
+            self.builds += 1
+            if snapshot != self._latest:
+                async with self._changed:
+                    self._latest = snapshot
+                    self._version += 1
+                    self._changed.notify_all()
+            await asyncio.sleep(self.tick)
@@ -0,0 +1,120 @@
+import threading
+from time import perf_counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, List, Sequence
+import numpy as np
+
+# Histogram bucket upper bounds in seconds: 1us to ~8.4s, doubling
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** i for i in range(24))
+
+
+class _PhaseStats:
+    """Cumulative histogram of a phase plus a ring of its last `window` durations."""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = np.zeros(len(BUCKET_BOUNDS) + 1, dtype=np.int64)  # last bucket: above the bounds
+        self.recent = np.zeros(window, dtype=np.float64)
+        self.recent_size = 0
+        self.recent_next = 0
+
+    def add(self, durations: np.ndarray):
+        if not durations.size:
+            return
+        self.count += durations.size
+        self.total += float(durations.sum())
+        self.max = max(self.max, float(durations.max()))
+        self.buckets += np.bincount(np.searchsorted(BUCKET_BOUNDS, durations), minlength=self.buckets.size)
+
+        window = self.recent.size
+        durations = durations[-window:]
+        slots = (self.recent_next + np.arange(durations.size)) % window
+        self.recent[slots] = durations
+        self.recent_next = (self.recent_next + durations.size) % window
+        self.recent_size = min(window, self.recent_size + durations.size)
+
+    def summary(self) -> dict:
+        recent = self.recent[:self.recent_size]
+        rolling = {"count": int(recent.size), "mean_seconds": 0.0, "p50_seconds": 0.0, "p90_seconds": 0.0,
+                   "p99_seconds": 0.0, "histogram": [0] * self.buckets.size}
+        if recent.size:
+            p50, p90, p99 = np.percentile(recent, [50, 90, 99])
+            rolling.update(
+                mean_seconds=float(recent.mean()), p50_seconds=float(p50), p90_seconds=float(p90),
+                p99_seconds=float(p99),
+                histogram=np.bincount(np.searchsorted(BUCKET_BOUNDS, recent), minlength=self.buckets.size).tolist(),
+            )
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "max_seconds": self.max,
+            "histogram": self.buckets.tolist(),
+            "rolling": rolling,
+        }
+
+
+class PhaseProfiler:
+    """
+    Timing histograms per training phase.
+
+    Each phase keeps a cumulative histogram over fixed log-spaced buckets (BUCKET_BOUNDS,
+    plus one overflow bucket) and a rolling window of its last `window` durations, summarized
+    on demand. Per-step phases are recorded in bulk (see record_marks) so the training loop
+    only pays for perf_counter calls; with `enabled` False nothing is timed at all.
+    Thread-safe: the training thread records while API requests read summaries.
+    """
+
+    def __init__(self, phases: Iterable[str], window: int = 10000, enabled: bool = True):
+        self.phases = tuple(phases)
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {phase: _PhaseStats(self.window) for phase in self.phases}
+
+    def record(self, phase: str, durations):
+        """Adds one duration or a sequence of durations (seconds) to a phase."""
+        if not self.enabled:
+            return
+        durations = np.atleast_1d(np.asarray(durations, dtype=np.float64))
+        with self._lock:
+            self._stats[phase].add(durations)
+
+    def record_marks(self, phases: Sequence[str], marks: List[float]):
+        """
+        Records consecutive phases from perf_counter timestamps taken at every phase boundary:
+        len(phases) + 1 marks per repetition, phase i lasting from mark i to mark i + 1.
+        An incomplete trailing repetition (a step interrupted by an exception) is dropped.
+        """
+        width = len(phases) + 1
+        marks = marks[:len(marks) - len(marks) % width]
+        if not self.enabled or not marks:
+            return
+        durations = np.diff(np.asarray(marks, dtype=np.float64).reshape(-1, width), axis=1)
+        with self._lock:
+            for column, phase in enumerate(phases):
+                self._stats[phase].add(durations[:, column])
+
+    def time(self, phase: str):
+        """Context manager timing a block (a no-op when disabled)."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(phase)
+
+    @contextmanager
+    def _timed(self, phase: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, perf_counter() - start)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {phase: stats.summary() for phase, stats in self._stats.items()}
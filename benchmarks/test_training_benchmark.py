@@ -0,0 +1,57 @@
+"""
+Training throughput benchmarks as a pytest gate
+Run with: python -m pytest benchmarks (not part of the default tests/ run)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from benchmarks.training import (
+    SCENARIOS, PHASES, BASELINE_PATH, RESULTS_PATH, DEFAULT_TOLERANCE, run_suite, compare, load_json, save_json
+)
+
+
+@pytest.fixture(scope="module")
+def results():
+    results = run_suite()
+    save_json(results, RESULTS_PATH)
+    return results
+
+
+class TestRegressionGate:
+    """Tests for the baseline comparison"""
+
+    def test_compare_flags_slowdowns_and_memory_growth(self):
+        """Only changes beyond the tolerance are regressions"""
+        def document(eps, mem):
+            return {"scenarios": {"random-learn": {"episodes_per_second": eps, "steps_per_second": eps * 10,
+                                                   "peak_memory_mb": mem}}}
+        baseline = document(1000.0, 100.0)
+        assert compare(document(800.0, 120.0), baseline, 0.25) == []
+        assert len(compare(document(700.0, 100.0), baseline, 0.25)) == 2
+        assert len(compare(document(1000.0, 130.0), baseline, 0.25)) == 1
+        assert compare({"scenarios": {"other": {}}}, baseline, 0.25) == []
+
+
+class TestTrainingThroughput:
+    """End-to-end training throughput for every impala mode and learning path"""
+
+    def test_every_scenario_reports_metrics(self, results):
+        """Each scenario reports throughput, memory and per-phase times"""
+        assert set(results["scenarios"]) == {s["name"] for s in SCENARIOS}
+        for result in results["scenarios"].values():
+            assert result["episodes_per_second"] > 0
+            assert result["steps_per_second"] > 0
+            assert set(result["phases"]) == set(PHASES)
+
+    def test_no_regression_against_baseline(self, results):
+        """Throughput and peak memory stay within the tolerance of the stored baseline"""
+        baseline = load_json(BASELINE_PATH)
+        if baseline is None:
+            pytest.skip("No stored baseline")
+        assert compare(results, baseline, DEFAULT_TOLERANCE) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
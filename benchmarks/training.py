@@ -0,0 +1,240 @@
+"""
+End-to-end training throughput benchmarks.
+
+Every scenario runs the same incursion loop as TrainingManager (episode, epsilon decay,
+replay batch, abstraction and a background checkpoint every 100 incursions) headless, with a fixed seed,
+in a fresh process so peak memory is measured per scenario. Results are written as JSON
+and compared against a stored baseline:
+
+    python -m benchmarks                      # run, write results, compare with the baseline
+    python -m benchmarks --update-baseline    # store the results as the new baseline
+    python -m pytest benchmarks               # same gate under pytest
+
+Baselines depend on the machine; refresh them with --update-baseline on the box that runs the gate.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+import multiprocessing
+
+import numpy as np
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = BENCHMARK_DIR / "baseline.json"
+RESULTS_PATH = BENCHMARK_DIR / "results" / "latest.json"
+
+DEFAULT_EPISODES = 3000
+DEFAULT_SEED = 0
+DEFAULT_TOLERANCE = 0.3
+PROGRAMMED_SEQUENCE = ["look_left", "drink", "look_right", "drink", "look_front"]
+PHASES = ("episode", "learn_batch", "abstraction", "checkpoint")
+
+
+def _scenario(impala_mode: str, path: str) -> dict:
+    return {
+        "name": f"{impala_mode}-{path}",
+        "impala_mode": impala_mode,
+        # learn_batch runs on top of one-step updates, like the training loop replays after each incursion
+        "update": "learn" if path == "learn_batch" else path,
+        "replay_batch_size": 256 if path == "learn_batch" else 0,
+    }
+
+
+SCENARIOS = [_scenario(mode, path)
+             for mode in ("random", "programmed")
+             for path in ("learn", "learn_with_traces", "learn_batch")]
+
+
+def _peak_memory_mb() -> Optional[float]:
+    """Peak resident set size of the current process."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(scenario: dict, episodes: int = DEFAULT_EPISODES, seed: int = DEFAULT_SEED) -> dict:
+    """Runs one scenario in the current process. Checkpoints go to a temporary directory."""
+    from app.core.game_engine import GameEngine
+    from app.learning.abstraction import AbstractionEngine
+    from app.learning.checkpoint import CheckpointWriter
+    from app.learning.episode import EpisodeRunner
+    from app.learning.knowledge_base import KnowledgeBase
+    from app.learning.reinforcement import QLearningAgent
+    from app.learning.reward_system import RewardSystem
+    from app.models.requests import TrainingStartRequest
+
+    random.seed(seed)
+    np.random.seed(seed)
+    request = TrainingStartRequest(
+        num_incursions=episodes,
+        initial_positions=list(range(1, 9)),
+        impala_mode=scenario["impala_mode"],
+        impala_sequence=PROGRAMMED_SEQUENCE if scenario["impala_mode"] == "programmed" else None,
+        history_mode="off",
+    )
+    kb = KnowledgeBase(backend="dense")
+    agent = QLearningAgent(kb)
+    abstraction_engine = AbstractionEngine(kb)
+    runner = EpisodeRunner(agent, GameEngine(termination=request.termination), RewardSystem(), update=scenario["update"])
+    # As in TrainingManager, incursions hold the lock the writer takes to copy the KB
+    lock = threading.RLock()
+    writer = CheckpointWriter(lambda: kb.prepare_checkpoint("knowledge_checkpoint"), lock=lock)
+
+    phases = dict.fromkeys(PHASES, 0.0)
+    steps = successes = 0
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            start = time.perf_counter()
+            for i in range(episodes):
+                with lock:
+                    t0 = time.perf_counter()
+                    state, episode_steps = runner.run(request, random.choice(request.initial_positions))
+                    agent.decay_epsilon()
+                    t1 = time.perf_counter()
+                    if scenario["replay_batch_size"]:
+                        agent.learn_batch(batch_size=scenario["replay_batch_size"])
+                    t2 = time.perf_counter()
+                    phases["episode"] += t1 - t0
+                    phases["learn_batch"] += t2 - t1
+
+                    steps += episode_steps
+                    successes += state.status == "success"
+                    if i % 100 == 0:
+                        t0 = time.perf_counter()
+                        abstraction_engine.abstract_knowledge()
+                        t1 = time.perf_counter()
+                        writer.request()
+                        t2 = time.perf_counter()
+                        phases["abstraction"] += t1 - t0
+                        phases["checkpoint"] += t2 - t1
+            # The last checkpoint counts towards the run time
+            writer.flush()
+            seconds = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "episodes": episodes,
+        "steps": steps,
+        "seconds": seconds,
+        "episodes_per_second": episodes / seconds,
+        "steps_per_second": steps / seconds,
+        "peak_memory_mb": _peak_memory_mb(),
+        "success_rate": successes / episodes,
+        "q_table_size": len(kb.q_table),
+        "phases": phases,
+    }
+
+
+def run_suite(scenarios: List[dict] = None, episodes: int = DEFAULT_EPISODES, seed: int = DEFAULT_SEED) -> dict:
+    """Runs every scenario, each in a fresh process, and returns the results document."""
+    scenarios = SCENARIOS if scenarios is None else scenarios
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for scenario in scenarios:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[scenario["name"]] = executor.submit(run_scenario, scenario, episodes, seed).result()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "episodes": episodes,
+            "seed": seed,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Regressions of `results` against `baseline`: throughput more than `tolerance` below the
+    baseline, or peak memory more than `tolerance` above it. Scenarios missing from either
+    side are skipped.
+    """
+    regressions = []
+    for name, result in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        for metric in ("episodes_per_second", "steps_per_second"):
+            if result[metric] < reference[metric] * (1 - tolerance):
+                regressions.append(f"{name}: {metric} {result[metric]:.1f} < baseline {reference[metric]:.1f}")
+        if result["peak_memory_mb"] and reference.get("peak_memory_mb") \
+                and result["peak_memory_mb"] > reference["peak_memory_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak_memory_mb {result['peak_memory_mb']:.1f} > "
+                               f"baseline {reference['peak_memory_mb']:.1f}")
+    return regressions
+
+
+def load_json(path: Path) -> Optional[dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_json(data: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'scenario':<30}{'episodes/s':>12}{'steps/s':>12}{'peak MB':>10}  phases (s)"]
+    for name, r in results["scenarios"].items():
+        phases = " ".join(f"{phase}={seconds:.2f}" for phase, seconds in r["phases"].items())
+        peak = f"{r['peak_memory_mb']:.1f}" if r["peak_memory_mb"] else "-"
+        lines.append(f"{name:<30}{r['episodes_per_second']:>12.1f}{r['steps_per_second']:>12.0f}{peak:>10}  {phases}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Training throughput benchmarks")
+    parser.add_argument("--episodes", type=int, default=DEFAULT_EPISODES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--scenario", action="append", choices=[s["name"] for s in SCENARIOS],
+                        help="Run only this scenario (repeatable)")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the baseline")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in SCENARIOS if args.scenario is None or s["name"] in args.scenario]
+    results = run_suite(scenarios, episodes=args.episodes, seed=args.seed)
+    save_json(results, args.output)
+    print(format_results(results))
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        save_json(results, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print("No baseline to compare with")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
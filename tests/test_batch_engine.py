@@ -0,0 +1,137 @@
+"""
+Parity tests for the vectorized batch engine
+Every batched episode must evolve exactly like the scalar GameEngine
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import numpy as np
+import pytest
+from app.core.entities import GameMap, LionAction, ImpalaAction, LionState, ImpalaState
+from app.core.game_engine import GameEngine, GameState
+from app.core.batch_engine import BatchGameEngine
+from app.core.encoding import LION_ACTION_CODE, IMPALA_ACTION_CODE, LION_ACTIONS, IMPALA_ACTIONS
+from app.learning.reward_system import RewardSystem
+
+
+def assert_same_episode(batch, i, state):
+    episode = batch.episode(i)
+    assert episode["lion_pos"] == tuple(state.lion.position)
+    assert episode["lion_state"] == state.lion.state
+    assert episode["impala_pos"] == tuple(state.impala.position)
+    assert episode["impala_state"] == state.impala.state
+    assert episode["flee_start_time"] == state.flee_start_time
+    assert episode["time_step"] == state.time_step
+    assert episode["status"] == state.status
+
+
+def run_parity(starts, seed, impala_choices, max_steps=60, termination="exact", reward_system=None):
+    rng = random.Random(seed)
+    engine = GameEngine(termination=termination)
+    states = [GameState(lion_start_pos=pos) for pos in starts]
+    batch = BatchGameEngine(starts, termination=termination)
+
+    for _ in range(max_steps):
+        lion_actions = [rng.choice(LION_ACTIONS) for _ in starts]
+        impala_actions = [rng.choice(impala_choices) for _ in starts]
+
+        rewards, done = batch.step(
+            np.array([LION_ACTION_CODE[a] for a in lion_actions]),
+            np.array([IMPALA_ACTION_CODE[a] for a in impala_actions]),
+            reward_system=reward_system,
+        )
+
+        for i, state in enumerate(states):
+            if state.status != "in_progress":
+                assert rewards[i] == 0.0
+                assert done[i]
+                continue
+            prev = (state.lion.position, state.impala.position, state.impala.state)
+            _, reward, is_done, _ = engine.step(state, lion_actions[i], impala_actions[i])
+            if reward_system is not None:
+                reward = reward_system.step_reward(*prev, lion_actions[i], state)
+            assert rewards[i] == reward
+            assert done[i] == is_done
+            assert_same_episode(batch, i, state)
+
+        if done.all():
+            break
+
+
+class TestBatchEngineParity:
+    """The batch engine must reproduce GameEngine.step exactly"""
+
+    @pytest.mark.parametrize("termination", ["exact", "heuristic"])
+    def test_parity_from_valid_positions(self, termination):
+        """Random lion and impala actions from every valid start position"""
+        starts = list(GameMap.valid_lion_positions.values()) * 16
+        choices = [a for a in ImpalaAction if a != ImpalaAction.FLEE]
+        for seed in range(5):
+            run_parity(starts, seed, choices, termination=termination)
+
+    @pytest.mark.parametrize("termination", ["exact", "heuristic"])
+    def test_parity_from_any_cell(self, termination):
+        """Random start cells, including a programmed FLEE impala action"""
+        rng = random.Random(42)
+        starts = [(rng.randrange(19), rng.randrange(19)) for _ in range(200)]
+        run_parity(starts, 7, list(ImpalaAction), termination=termination)
+
+    @pytest.mark.parametrize("shaping", ["heuristic", "potential"])
+    def test_parity_of_training_rewards(self, shaping):
+        """Batched shaped rewards match RewardSystem.step_reward"""
+        rng = random.Random(3)
+        starts = [(rng.randrange(19), rng.randrange(19)) for _ in range(200)]
+        reward_system = RewardSystem(shaping)
+        run_parity(starts, 11, list(ImpalaAction), reward_system=reward_system)
+
+    def test_parity_with_preset_flee(self):
+        """Episodes loaded from scalar states with the impala already fleeing"""
+        engine = GameEngine()
+        states = []
+        for col in range(0, 19, 3):
+            state = GameState(lion_start_pos=(4, col))
+            state.impala.state = ImpalaState.FLEEING
+            state.flee_start_time = 0
+            state.time_step = 1
+            states.append(state)
+
+        batch = BatchGameEngine.from_game_states(states)
+        lion = np.full(len(states), LION_ACTION_CODE[LionAction.ATTACK])
+        impala = np.full(len(states), IMPALA_ACTION_CODE[ImpalaAction.DRINK])
+        batch.step(lion, impala)
+
+        for i, state in enumerate(states):
+            engine.step(state, LionAction.ATTACK, ImpalaAction.DRINK)
+            assert_same_episode(batch, i, state)
+
+
+class TestBatchEngineBehavior:
+    """Tests for batch specific behavior"""
+
+    def test_finished_episodes_are_frozen(self):
+        """Finished episodes keep their state and get no reward"""
+        batch = BatchGameEngine([(9, 8), (0, 0)])
+        lion = np.full(2, LION_ACTION_CODE[LionAction.HIDE])
+        impala = np.full(2, IMPALA_ACTION_CODE[ImpalaAction.DRINK])
+
+        rewards, done = batch.step(lion, impala)
+        assert done[0] and not done[1]
+        assert rewards[0] == 100.0
+
+        rewards, done = batch.step(lion, impala)
+        assert rewards[0] == 0.0
+        assert batch.time_step[0] == 1
+        assert batch.time_step[1] == 2
+
+    def test_attack_persistence(self):
+        """Attacking lions keep attacking whatever action is requested"""
+        batch = BatchGameEngine([(9, 2)])
+        batch.step(np.array([LION_ACTION_CODE[LionAction.ATTACK]]), np.array([IMPALA_ACTION_CODE[ImpalaAction.DRINK]]))
+        batch.step(np.array([LION_ACTION_CODE[LionAction.HIDE]]), np.array([IMPALA_ACTION_CODE[ImpalaAction.DRINK]]))
+        assert batch.episode(0)["lion_state"] == LionState.ATTACKING
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -215,6 +215,231 @@ class TestGameMechanics:
         assert "lion_action" in last_entry
         assert "impala_action" in last_entry
 
+    def test_state_snapshot_is_independent(self):
+        """Test snapshots are not affected by later steps"""
+        engine = GameEngine()
+        state = GameState(lion_start_pos=(0, 9))
+        snap = state.snapshot()
+
+        engine.step(state, LionAction.ATTACK, ImpalaAction.DRINK)
+
+        assert snap.lion.position == (0, 9)
+        assert snap.lion.state == LionState.NORMAL
+        assert snap.impala.state == ImpalaState.NORMAL
+        assert snap.time_step == 0
+
+    def test_state_converts_to_api_models(self):
+        """Test core state converts to the pydantic models at the API boundary"""
+        state = GameState(lion_start_pos=(0, 9))
+        state.lion.state = LionState.HIDDEN
+
+        lion = state.lion.to_model()
+        impala = state.impala.to_model()
+
+        assert isinstance(lion, Lion) and isinstance(impala, Impala)
+        assert lion.position == (0, 9)
+        assert lion.state == LionState.HIDDEN
+        assert impala.position == (9, 9)
+
+    def test_lion_paths_around_waterhole(self):
+        """Test lion never steps into the waterhole while advancing"""
+        from app.core.pathing import waterhole_mask
+        blocked = waterhole_mask()
+        lion = Lion(position=(0, 9))
+
+        for _ in range(30):
+            lion.move_towards((9, 9))
+            assert not blocked[lion.position]
+            if lion.position == (9, 9):
+                break
+
+        assert lion.position == (9, 9)
+
+    def test_open_field_movement_is_straight(self):
+        """Test movement without obstacles steps to the closest neighbor"""
+        import numpy as np
+        from app.core.pathing import MovementTable
+        table = MovementTable(blocked=np.zeros((19, 19), dtype=bool))
+
+        assert table.step_towards((0, 0), (9, 9)) == (1, 1)
+        assert table.step_towards((9, 0), (9, 9)) == (9, 1)
+        assert table.step_towards((9, 9), (9, 9)) == (9, 9)
+
+
+class TestEpisodeHistory:
+    """Tests for columnar history recording"""
+
+    def test_history_entries_match_step_data(self):
+        """Test lazily built entries carry the recorded values"""
+        engine = GameEngine()
+        state = GameState(lion_start_pos=(0, 9))
+
+        engine.step(state, LionAction.HIDE, ImpalaAction.DRINK)
+        entry = state.history[0]
+
+        assert entry["time_step"] == 1
+        assert entry["lion_pos"] == (0, 9)
+        assert entry["impala_pos"] == (9, 9)
+        assert entry["lion_state"] == LionState.HIDDEN
+        assert entry["impala_state"] == ImpalaState.DRINKING
+        assert entry["lion_action"] == "hide"
+        assert entry["impala_action"] == "drink"
+        assert state.history.find(1) == entry
+        assert state.history.find(5) is None
+
+    def test_history_off(self):
+        """Test no history is kept when recording is off"""
+        engine = GameEngine()
+        state = GameState(lion_start_pos=(0, 9), record_history=False)
+
+        engine.step(state, LionAction.ADVANCE, ImpalaAction.DRINK)
+        assert state.history is None
+
+    def test_history_bounded(self):
+        """Test a bounded history keeps only the latest steps"""
+        from app.core.history import EpisodeHistory
+        history = EpisodeHistory(capacity=2, max_steps=4)
+
+        for t in range(1, 8):
+            history.record(t, (0, t), (9, 9), LionState.NORMAL, ImpalaState.NORMAL,
+                           LionAction.ADVANCE, ImpalaAction.LOOK_LEFT, "")
+
+        assert len(history) == 4
+        assert [entry["time_step"] for entry in history] == [4, 5, 6, 7]
+        assert history.find(6)["lion_pos"] == (0, 6)
+        assert history.find(2) is None
+
+    def test_recorder_modes(self):
+        """Test which episodes each recorder mode keeps"""
+        from app.core.history import HistoryRecorder
+
+        assert not any(HistoryRecorder("off").records(i) for i in range(10))
+        assert all(HistoryRecorder("full").records(i) for i in range(10))
+        sampled = HistoryRecorder("sampled", sample_every=5)
+        assert [i for i in range(12) if sampled.records(i)] == [0, 5, 10]
+
+        with pytest.raises(ValueError):
+            HistoryRecorder("sometimes")
+
+    def test_recorder_saved_logs(self):
+        """Every sampled episode gets a log; full histories log every 100th episode"""
+        from app.core.history import HistoryRecorder
+
+        assert [i for i in range(100) if HistoryRecorder("sampled", sample_every=30).saves_log(i)] == [0, 30, 60, 90]
+        assert [i for i in range(250) if HistoryRecorder("full").saves_log(i)] == [0, 100, 200]
+        assert not any(HistoryRecorder("off").saves_log(i) for i in range(200))
+
+
+class TestCaptureOracle:
+    """Tests for exact flee termination"""
+
+    @staticmethod
+    def brute_force_catchable(state, memo):
+        """Search every lion action sequence with the game rules until the impala reaches an edge"""
+        from app.utils.geometry import calculate_distance
+        engine = GameEngine(termination="heuristic")  # termination is ignored, we only read positions
+        key = (state.lion.position, state.lion.state == LionState.ATTACKING,
+               state.impala.position, state.time_step - state.flee_start_time)
+        if key in memo:
+            return memo[key]
+        memo[key] = False
+
+        actions = [LionAction.ATTACK] if state.lion.state == LionState.ATTACKING else list(LionAction)
+        result = False
+        for action in actions:
+            nxt = state.snapshot()
+            engine.step(nxt, action, ImpalaAction.FLEE)
+            if calculate_distance(nxt.lion.position, nxt.impala.position) <= 1.0:
+                result = True
+            elif nxt.impala.position[1] not in (0, 18):
+                result = TestCaptureOracle.brute_force_catchable(nxt, memo)
+            if result:
+                break
+        memo[key] = result
+        return result
+
+    def test_oracle_matches_brute_force(self):
+        """Test oracle answers agree with an exhaustive search"""
+        import random
+        from app.core.capture_oracle import CaptureOracle
+        oracle = CaptureOracle()
+        rng = random.Random(3)
+        memo = {}
+
+        answers = set()
+        for _ in range(300):
+            state = GameState(lion_start_pos=(rng.randrange(3, 16), rng.randrange(2, 17)))
+            state.lion.state = rng.choice(list(LionState))
+            state.impala.position = (9, rng.randrange(3, 16))
+            state.impala.state = ImpalaState.FLEEING
+            state.time_step = 5
+            state.flee_start_time = 5 - rng.randrange(-1, 3)
+            duration = state.time_step + 1 - state.flee_start_time
+
+            expected = self.brute_force_catchable(state, memo)
+            assert oracle.can_catch(state.lion.position, state.lion.state, state.impala.position[1], duration) == expected
+            answers.add(expected)
+
+        assert answers == {True, False}
+
+    def test_exact_termination_ends_doomed_flee(self):
+        """Test a flee the lion cannot win ends on the step it starts"""
+        engine = GameEngine()
+        state = GameState(lion_start_pos=(0, 9))
+
+        # Impala sees the lion far away and starts running
+        next_state, reward, done, info = engine.step(state, LionAction.ADVANCE, ImpalaAction.LOOK_FRONT)
+
+        assert done
+        assert next_state.status == "failed"
+        assert reward == -100.0
+
+    def test_heuristic_termination_is_kept(self):
+        """Test the old rule can still be selected"""
+        engine = GameEngine(termination="heuristic")
+        state = GameState(lion_start_pos=(0, 9))
+
+        next_state, reward, done, info = engine.step(state, LionAction.ADVANCE, ImpalaAction.LOOK_FRONT)
+
+        assert not done
+        assert next_state.impala.state == ImpalaState.FLEEING
+
+        with pytest.raises(ValueError):
+            GameEngine(termination="never")
+
+
+class TestVisionCalculator:
+    """Tests for the precomputed visibility table"""
+
+    def test_table_matches_geometry(self):
+        """Table lookups agree with the triangle computation on every cell"""
+        from app.core.vision_calculator import VisionCalculator
+        vc = VisionCalculator()
+
+        for x in range(19):
+            for y in range(19):
+                for lion_state in LionState:
+                    for impala_action in ImpalaAction:
+                        expected = vc._compute_visibility((x, y), lion_state, impala_action)
+                        assert vc.is_lion_visible((x, y), lion_state, impala_action) == expected
+
+    def test_batched_visibility(self):
+        """Batched form answers like the scalar form"""
+        import numpy as np
+        from app.core.vision_calculator import VisionCalculator
+        from app.core.encoding import LION_STATE_CODE, IMPALA_ACTION_CODE
+        vc = VisionCalculator()
+
+        xs = np.array([0, 0, 9, 18])
+        ys = np.array([9, 9, 18, 9])
+        states = np.array([LION_STATE_CODE[LionState.NORMAL], LION_STATE_CODE[LionState.HIDDEN],
+                           LION_STATE_CODE[LionState.NORMAL], LION_STATE_CODE[LionState.ATTACKING]])
+        actions = np.array([IMPALA_ACTION_CODE[ImpalaAction.LOOK_FRONT]] * 2
+                           + [IMPALA_ACTION_CODE[ImpalaAction.LOOK_RIGHT], IMPALA_ACTION_CODE[ImpalaAction.DRINK]])
+
+        visible = vc.are_lions_visible(xs, ys, states, actions)
+        assert visible.tolist() == [True, False, True, False]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
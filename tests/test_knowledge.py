@@ -9,8 +9,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pytest
 import json
 from pathlib import Path
-from app.learning.knowledge_base import KnowledgeBase
-from app.core.entities import LionAction
+from app.learning.knowledge_base import KnowledgeBase, convert_knowledge
+from app.learning.q_table import DenseQTable
+from app.core.entities import LionAction, LionState, ImpalaAction
+from app.learning.reinforcement import QLearningAgent
+from app.learning.policy import CompiledPolicy
+from app.storage.npy_storage import NpyStorage
+from app.storage.delta_storage import DeltaStorage
+import numpy as np
 
 
 class TestKnowledgeBaseBasics:
@@ -216,5 +222,277 @@ class TestKnowledgeBaseIntegration:
         assert "Test Rule 1" in kb2.abstractions
 
 
+class TestDenseQTable:
+    """Tests for the dense NumPy Q-table backend"""
+
+    def test_dense_get_set(self):
+        """The dense backend answers get/update like the dict backend"""
+        kb = KnowledgeBase(backend="dense")
+        state_key = "9,9|drink|normal"
+
+        assert kb.get_q_value(state_key, "hide") == 0.0
+        kb.update_q_value(state_key, "advance", 5.0)
+
+        assert kb.get_q_value(state_key, "advance") == 5.0
+        assert kb.q_table[state_key] == {"advance": 5.0, "hide": 0.0, "attack": 0.0}
+        assert len(kb.q_table) == 1
+
+    def test_dense_index_round_trip(self):
+        """State keys map to unique rows and back"""
+        table = DenseQTable()
+        keys = ["0,0|look_left|normal", "18,18|flee|attacking", "9,3|drink|hidden"]
+        rows = [table.index_of(key) for key in keys]
+
+        assert len(set(rows)) == len(keys)
+        assert all(0 <= row < table.values.shape[0] for row in rows)
+        assert [table.key_of(row) for row in rows] == keys
+        assert "19,0|drink|normal" not in table
+
+    def test_dense_json_export_matches_dict(self):
+        """Exported dense tables have the dict format and load back unchanged"""
+        data = {
+            "0,9|drink|normal": {"advance": 10.0, "hide": 0.0, "attack": 0.0},
+            "18,18|drink|attacking": {"advance": 0.0, "hide": 0.0, "attack": -2.0},
+        }
+        kb = KnowledgeBase(backend="dense")
+        kb.q_table = data
+
+        exported = kb.export_q_table()
+        assert exported == data
+        assert json.loads(json.dumps(exported)) == data
+
+    def test_dense_loads_shipped_knowledge(self, monkeypatch):
+        """Every shipped KB file loads through the dense backend, minus its non-state entries"""
+        monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        for filepath in sorted(Path("data/knowledge").glob("*.json")):
+            with open(filepath) as f:
+                q_table = json.load(f)["q_table"]
+            kb = KnowledgeBase(backend="dense")
+            kb.load(filepath.stem, "json")
+
+            states = {key: row for key, row in q_table.items() if DenseQTable.is_state(key)}
+            assert len(kb.q_table) == len(states)
+            assert kb.export_q_table() == states
+
+    def test_invalid_backend(self):
+        """Unknown backends are rejected"""
+        with pytest.raises(ValueError):
+            KnowledgeBase(backend="sqlite")
+
+class TestCompiledPolicy:
+    """Tests for the compiled greedy policy"""
+
+    @pytest.mark.parametrize("backend", ["dict", "dense"])
+    def test_policy_matches_greedy_agent(self, backend):
+        """The compiled policy picks the agent's greedy action"""
+        kb = KnowledgeBase(backend=backend)
+        kb.q_table = {
+            "5,9|drink|normal": {"advance": 1.0, "hide": 3.0, "attack": 2.0},
+            "6,9|look_left|hidden": {"advance": -1.0, "hide": -1.0, "attack": -2.0},
+        }
+        agent = QLearningAgent(kb, epsilon_start=0.0)
+        policy = CompiledPolicy(kb)
+
+        for pos, impala_action, lion_state in [((5, 9), ImpalaAction.DRINK, LionState.NORMAL),
+                                               ((6, 9), ImpalaAction.LOOK_LEFT, LionState.HIDDEN)]:
+            expected = agent.choose_action(agent.get_state_key(pos, impala_action, lion_state))
+            assert policy.action(pos, impala_action, lion_state) == expected
+        assert policy.best_action((0, 0), ImpalaAction.DRINK, LionState.NORMAL) is None
+        assert policy.action((0, 0), ImpalaAction.DRINK, LionState.NORMAL) == LionAction.ADVANCE
+
+    def test_lookup_does_not_mutate(self):
+        """Reading the policy inserts no rows and does not bump the version"""
+        kb = KnowledgeBase(backend="dense")
+        policy = CompiledPolicy(kb)
+        policy.action((3, 3), ImpalaAction.DRINK, LionState.NORMAL)
+        version = kb.version
+        policy.action((4, 4), ImpalaAction.LOOK_FRONT, LionState.NORMAL)
+        assert len(kb.q_table) == 0
+        assert kb.version == version
+
+    def test_rebuilt_when_knowledge_changes(self):
+        """Learning updates are picked up on the next lookup"""
+        kb = KnowledgeBase(backend="dense")
+        agent = QLearningAgent(kb)
+        policy = CompiledPolicy(kb)
+        state = agent.encode_state((8, 9), ImpalaAction.DRINK, LionState.NORMAL)
+        assert policy.action((8, 9), ImpalaAction.DRINK, LionState.NORMAL) == LionAction.ADVANCE
+
+        agent.learn(state, LionAction.ATTACK, 100.0, state, True)
+        assert policy.action((8, 9), ImpalaAction.DRINK, LionState.NORMAL) == LionAction.ATTACK
+
+
+class TestBinaryFormat:
+    """Tests for the memory-mapped binary Knowledge Base format"""
+
+    @pytest.mark.parametrize("backend", ["dict", "dense"])
+    def test_binary_round_trip(self, tmp_path, monkeypatch, backend):
+        """Saving with format="npy" and loading it back keeps states, values (float32) and abstractions"""
+        monkeypatch.chdir(tmp_path)
+        kb = KnowledgeBase(backend=backend)
+        kb.update_q_value("8,9|drink|normal", "attack", 1.5)
+        kb.update_q_value("0,0|flee|hidden", "hide", -0.1)
+        kb.abstractions = ["Rule 1"]
+        kb.save("kb", "npy")
+
+        loaded = KnowledgeBase(backend=backend)
+        loaded.load("kb", "npy")
+        assert set(loaded.q_table) == {"8,9|drink|normal", "0,0|flee|hidden"}
+        assert loaded.get_q_value("8,9|drink|normal", "attack") == 1.5
+        assert loaded.get_q_value("0,0|flee|hidden", "hide") == pytest.approx(-0.1)
+        assert loaded.abstractions == ["Rule 1"]
+
+    def test_arrays_are_memory_mapped(self, tmp_path, monkeypatch):
+        """The state index and Q matrix are read-only memory maps"""
+        monkeypatch.chdir(tmp_path)
+        kb = KnowledgeBase(backend="dense")
+        kb.update_q_value("8,9|drink|normal", "advance", 2.0)
+        kb.save("kb", "npy")
+
+        data = NpyStorage.load("data/knowledge/kb.qkb")
+        assert isinstance(data["q_values"], np.memmap)
+        assert data["q_values"].dtype == np.float32 and not data["q_values"].flags.writeable
+        assert data["states"].tolist() == [DenseQTable.index_of("8,9|drink|normal")]
+
+    def test_convert_json_and_back(self, tmp_path, monkeypatch):
+        """A JSON file converts to binary and back to the same content"""
+        monkeypatch.chdir(tmp_path)
+        kb = KnowledgeBase()
+        kb.update_q_value("5,5|look_left|normal", "hide", 0.25)
+        kb.save("kb")
+
+        convert_knowledge("kb", "npy")
+        Path("data/knowledge/kb.json").unlink()
+        convert_knowledge("kb", "json", "npy")
+        with open("data/knowledge/kb.json") as f:
+            data = json.load(f)
+        assert data["q_table"] == {"5,5|look_left|normal": {"advance": 0.0, "hide": 0.25, "attack": 0.0}}
+
+    def test_invalid_format_and_states(self, tmp_path, monkeypatch):
+        """Unknown formats raise ValueError and states outside the board are left out"""
+        monkeypatch.chdir(tmp_path)
+        kb = KnowledgeBase()
+        with pytest.raises(ValueError):
+            kb.save("kb", "yaml")
+        kb.update_q_value("not a state", "hide", 1.0)
+        kb.update_q_value("5,5|drink|normal", "hide", 1.0)
+        kb.save("kb", "npy")
+        assert NpyStorage.load("data/knowledge/kb.qkb")["states"].tolist() == [DenseQTable.index_of("5,5|drink|normal")]
+        with pytest.raises(FileNotFoundError):
+            convert_knowledge("missing", "npy")
+
+
+class TestDeltaCheckpoints:
+    """Tests for incremental checkpoints (snapshot plus append-only delta log)"""
+
+    @staticmethod
+    def _knowledge_base():
+        # Enough rows that small delta logs stay below the snapshot size
+        kb = KnowledgeBase(backend="dense")
+        for index in range(0, 2000, 10):
+            kb.q_table.row(index)
+        return kb
+
+    def test_deltas_hold_changed_rows_only(self, tmp_path, monkeypatch):
+        """After the first full snapshot, a checkpoint appends just the rows written since the last one"""
+        monkeypatch.chdir(tmp_path)
+        kb = self._knowledge_base()
+        kb.update_q_value("8,9|drink|normal", "attack", 1.0)
+        kb.update_q_value("5,5|flee|hidden", "hide", 2.0)
+        assert kb.checkpoint("ckpt") == "snapshot"
+
+        kb.update_q_value("5,5|flee|hidden", "hide", 3.0)
+        kb.abstractions = ["Rule 1"]
+        assert kb.checkpoint("ckpt") == "delta"
+        frames = DeltaStorage.load("data/knowledge/ckpt.delta")
+        assert [DenseQTable.key_of(i) for i in frames[0]["states"]] == ["5,5|flee|hidden"]
+        assert frames[0]["abstractions"] == ["Rule 1"]
+
+        for backend in ("dense", "dict"):
+            loaded = KnowledgeBase(backend=backend)
+            loaded.load("ckpt")
+            assert loaded.get_q_value("5,5|flee|hidden", "hide") == 3.0
+            assert loaded.get_q_value("8,9|drink|normal", "attack") == 1.0
+            assert loaded.abstractions == ["Rule 1"]
+
+    def test_torn_frame_is_ignored(self, tmp_path, monkeypatch):
+        """A partially written last frame is dropped and the complete ones are replayed"""
+        monkeypatch.chdir(tmp_path)
+        kb = self._knowledge_base()
+        kb.checkpoint("ckpt")
+        kb.update_q_value("8,9|drink|normal", "attack", 1.0)
+        kb.checkpoint("ckpt")
+        kb.update_q_value("8,9|drink|normal", "attack", 2.0)
+        kb.checkpoint("ckpt")
+
+        path = Path("data/knowledge/ckpt.delta")
+        path.write_bytes(path.read_bytes()[:-5])
+        loaded = KnowledgeBase(backend="dense")
+        loaded.load("ckpt")
+        assert loaded.get_q_value("8,9|drink|normal", "attack") == 1.0
+
+    def test_interrupted_snapshot_keeps_last_checkpoint(self, tmp_path, monkeypatch):
+        """A snapshot cut short leaves the previous snapshot and its delta log in charge"""
+        monkeypatch.chdir(tmp_path)
+        kb = self._knowledge_base()
+        kb.checkpoint("ckpt")
+        kb.update_q_value("8,9|drink|normal", "attack", 1.0)
+        assert kb.checkpoint("ckpt") == "delta"
+
+        def crash(data, f, **kwargs):
+            f.write('{"q_table": {')
+            raise OSError("disk full")
+        monkeypatch.setattr("app.storage.json_storage.json.dump", crash)
+        kb.update_q_value("8,9|drink|normal", "attack", 2.0)
+        with pytest.raises(OSError):
+            kb.checkpoint("ckpt", compact_every=1)
+        monkeypatch.undo()
+        monkeypatch.chdir(tmp_path)
+
+        assert Path("data/knowledge/ckpt.delta").exists()
+        loaded = KnowledgeBase(backend="dense")
+        loaded.load("ckpt")
+        assert loaded.get_q_value("8,9|drink|normal", "attack") == 1.0
+        assert kb.checkpoint("ckpt") == "snapshot"
+
+    def test_truncated_snapshot_is_rejected(self, tmp_path, monkeypatch):
+        """A damaged snapshot raises ValueError and leaves the loaded Knowledge Base as it was"""
+        monkeypatch.chdir(tmp_path)
+        kb = self._knowledge_base()
+        kb.checkpoint("ckpt")
+        path = Path("data/knowledge/ckpt.json")
+        path.write_bytes(path.read_bytes()[:len(path.read_bytes()) // 2])
+
+        loaded = KnowledgeBase(backend="dense")
+        loaded.update_q_value("5,5|drink|normal", "hide", 1.0)
+        with pytest.raises(ValueError):
+            loaded.load("ckpt")
+        assert loaded.export_q_table() == {"5,5|drink|normal": {"advance": 0.0, "hide": 1.0, "attack": 0.0}}
+
+    def test_compaction_drops_the_log(self, tmp_path, monkeypatch):
+        """Every compact_every deltas a new snapshot replaces the log, whose old frames are never replayed"""
+        monkeypatch.chdir(tmp_path)
+        kb = self._knowledge_base()
+        kb.checkpoint("ckpt", compact_every=2)
+        kinds = []
+        for value in range(1, 4):
+            kb.update_q_value("8,9|drink|normal", "attack", float(value))
+            kinds.append(kb.checkpoint("ckpt", compact_every=2))
+        assert kinds == ["delta", "delta", "snapshot"]
+        assert not Path("data/knowledge/ckpt.delta").exists()
+
+        # A log left behind by a crash before the snapshot replaced it does not apply to the new snapshot
+        DeltaStorage.append({"checkpoint_id": "stale", "abstractions": None, "states": [DenseQTable.index_of("8,9|drink|normal")],
+                             "visited": [True], "q_values": [[0.0, 0.0, -5.0]]}, "data/knowledge/ckpt.delta")
+        loaded = KnowledgeBase(backend="dense")
+        loaded.load("ckpt")
+        assert loaded.get_q_value("8,9|drink|normal", "attack") == 3.0
+
+    def test_needs_dense_backend(self):
+        """Delta checkpoints work on dense row indices"""
+        with pytest.raises(ValueError):
+            KnowledgeBase().checkpoint("ckpt")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -6,11 +6,35 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import asyncio
+import json
+import random
+import threading
+import time
 import pytest
+import numpy as np
+from fastapi import HTTPException
 from app.learning.knowledge_base import KnowledgeBase
 from app.learning.reinforcement import QLearningAgent
-from app.core.entities import LionAction, ImpalaAction, LionState, GameMap
+from app.core.entities import LionAction, ImpalaAction, LionState, ImpalaState, GameMap
 from app.core.game_engine import GameEngine, GameState
+from app.learning import parallel
+from app.learning.parallel import run_worker_round, merge_q_tables
+from app.models.requests import TrainingStartRequest
+from app.api.training import TrainingManager, TRAINING_PHASES
+from app.utils.profiler import PhaseProfiler
+from app.utils.metrics import MetricsRegistry
+from app.api.metrics import router_label
+from app.utils.broadcast import SnapshotBroadcaster
+from app.learning.episode import EpisodeRunner
+from app.learning.eligibility import EligibilityTraces
+from app.learning.experience_replay import ArrayExperienceReplay, PrioritizedExperienceReplay, SumTree
+from app.learning.q_table import DenseQTable, action_index
+from app.learning.reward_system import RewardSystem
+from app.learning.dyna import DynaModel
+from app.learning.jobs import JobScheduler
+from app.learning.checkpoint import CheckpointPolicy, CheckpointWriter
+from app.utils.geometry import calculate_distance
 
 
 class TestQLearningAgent:
@@ -263,5 +287,788 @@ class TestAgentDecisionMaking:
         assert action in [LionAction.ADVANCE, LionAction.HIDE, LionAction.ATTACK]
 
 
+class TestValueIterationPlanner:
+    """Tests for the exact dynamic-programming planner"""
+
+    def test_planner_converges(self):
+        """Test value iteration converges on the random impala model"""
+        from app.learning.planner import ValueIterationPlanner
+        planner = ValueIterationPlanner(impala_mode="random")
+
+        result = planner.solve()
+
+        assert result["converged"]
+        assert result["states"] > 0
+        assert 0.0 <= result["start_success_rate"] <= 1.0
+
+    def test_planner_policy_catches_drinking_impala(self):
+        """Test the exported greedy policy catches an impala that only drinks"""
+        from app.learning.planner import ValueIterationPlanner
+        planner = ValueIterationPlanner(impala_mode="programmed", impala_sequence=[ImpalaAction.DRINK])
+        result = planner.solve()
+        assert result["start_success_rate"] == pytest.approx(1.0)
+
+        kb = KnowledgeBase()
+        planner.export(kb)
+        agent = QLearningAgent(kb)
+        agent.epsilon = 0.0
+        engine = GameEngine()
+
+        for start_pos in GameMap.valid_lion_positions.values():
+            state = GameState(lion_start_pos=start_pos)
+            done = False
+            while not done and state.time_step < 50:
+                state_key = agent.get_state_key(state.lion.position, ImpalaAction.DRINK, state.lion.state)
+                _, _, done, _ = engine.step(state, agent.choose_action(state_key), ImpalaAction.DRINK)
+            assert state.status == "success"
+
+
+class TestParallelTraining:
+    """Tests for the parallel training workers and Q-table merging"""
+
+    @staticmethod
+    def _worker_result(rows: dict, visits: dict) -> dict:
+        table = DenseQTable(rows)
+        counts = np.zeros(table.values.shape, dtype=np.int64)
+        for (key, action), n in visits.items():
+            counts[table.index_of(key), action_index(action)] = n
+        return {"values": table.values, "visited": table.visited, "visits": counts}
+
+    def test_merge_is_visit_weighted(self):
+        """Visited pairs average the worker values by visit count, others keep the shared value"""
+        s, t = "5,5|drink|normal", "6,5|drink|normal"
+        shared = DenseQTable({s: {"advance": 1.0, "hide": 2.0}})
+        results = [
+            self._worker_result({s: {"advance": 4.0, "hide": 9.0}}, {(s, "advance"): 3}),
+            self._worker_result({s: {"advance": 8.0, "hide": 9.0}, t: {"advance": 5.0, "hide": 0.0}},
+                                {(s, "advance"): 1, (t, "advance"): 2}),
+        ]
+        shared.take_dirty()
+        merge_q_tables(shared, results)
+
+        assert shared[s]["advance"] == pytest.approx(5.0)
+        assert shared[s]["hide"] == 2.0
+        assert shared[t] == {"advance": 5.0, "hide": 0.0, "attack": 0.0}
+        assert len(shared) == 2
+        assert sorted(shared.take_dirty().tolist()) == sorted([shared.index_of(s), shared.index_of(t)])
+
+    @staticmethod
+    def _task(request, seed=3, **changes) -> dict:
+        table = DenseQTable()
+        task = {
+            "worker_id": 0, "seed": seed, "values": table.values, "visited": table.visited,
+            "agent_params": {}, "epsilon": 1.0, "request": request, "episode_indices": [0, 2, 4, 6],
+        }
+        task.update(changes)
+        return task
+
+    def test_worker_round_is_seeded(self):
+        """A worker round reports its incursions and is reproducible for a given seed"""
+        request = TrainingStartRequest(num_incursions=10, initial_positions=[1, 2, 3], impala_mode="random")
+        task = self._task(request)
+        first = run_worker_round(task)
+        second = run_worker_round(task)
+
+        assert first["incursions"] == 4
+        assert first["success_count"] + first["fail_count"] == 4
+        assert sum(first["position_attempts"].values()) == 4
+        assert np.array_equal(first["values"], second["values"])
+        assert np.array_equal(first["visited"], second["visited"])
+        assert first["visits"].sum() == first["total_steps"]
+        assert [idx for idx, _ in first["logs"]] == [0]
+
+    def test_started_worker_keeps_its_agent(self, monkeypatch):
+        """A worker process keeps its replay buffer and Dyna-Q model across rounds"""
+        request = TrainingStartRequest(num_incursions=10, initial_positions=[1, 2, 3], impala_mode="random", dyna_steps=2)
+        monkeypatch.setattr(parallel, "_worker", None)
+        parallel.start_worker({"dyna_steps": 2}, request)
+        agent = parallel._worker["agent"]
+
+        first = run_worker_round(self._task(request))
+        replayed, modelled = agent.replay_buffer.size(), len(agent.model)
+        run_worker_round(self._task(request, seed=4, values=first["values"], visited=first["visited"]))
+
+        assert agent.replay_buffer.size() > replayed
+        assert len(agent.model) >= modelled > 0
+
+
+class TestTrainingManager:
+    """Tests for the background training thread"""
+
+    def test_training_runs_in_background_thread(self, tmp_path, monkeypatch):
+        """Training runs off the caller thread and can be paused, resumed and stopped"""
+        monkeypatch.chdir(tmp_path)
+        manager = TrainingManager()
+        request = TrainingStartRequest(num_incursions=100000, initial_positions=[1, 2, 3], impala_mode="random", history_mode="off")
+
+        manager.start_training(request)
+        assert manager._thread is not threading.current_thread()
+
+        manager.pause_training()
+        time.sleep(0.1)
+        paused_at = manager.status_snapshot()["current_incursion"]
+        time.sleep(0.1)
+        snapshot = manager.status_snapshot()
+        assert snapshot["status"] == "paused"
+        assert snapshot["current_incursion"] == paused_at
+
+        manager.resume_training()
+        manager.stop_training()
+        manager._thread.join(timeout=10)
+
+        snapshot = manager.status_snapshot()
+        assert snapshot["status"] == "stopped"
+        assert snapshot["success_count"] + snapshot["fail_count"] == snapshot["current_incursion"]
+        assert snapshot["current_incursion"] < request.num_incursions
+
+    def test_logs_follow_history_sampling(self, tmp_path, monkeypatch):
+        """A log is saved for every sampled incursion, also when the sampling does not divide 100"""
+        monkeypatch.chdir(tmp_path)
+        manager = TrainingManager()
+        request = TrainingStartRequest(num_incursions=61, initial_positions=[1, 2, 3], impala_mode="random",
+                                       history_sample_every=30)
+        manager.start_training(request)
+        manager._thread.join(timeout=60)
+        manager.checkpoint_writer.flush()
+
+        episodes = sorted(json.loads(path.read_text())["episode"] for path in (tmp_path / "data" / "logs").glob("*.json"))
+        assert episodes == [0, 30, 60]
+
+
+class TestDenseBackend:
+    """The dense Q-table backend must learn exactly like the dict backend"""
+
+    def test_dense_training_matches_dict(self):
+        """Seeded incursions produce identical Q-tables with both backends"""
+        request = TrainingStartRequest(num_incursions=1, initial_positions=[1, 2, 3, 4, 5, 6, 7, 8], impala_mode="random")
+        tables = {}
+        for backend in ("dict", "dense"):
+            kb = KnowledgeBase(backend=backend)
+            agent = QLearningAgent(kb)
+            runner = EpisodeRunner(agent, GameEngine(), RewardSystem())
+            # Replay sampling uses a different generator per backend, so only online updates are compared
+            random.seed(5)
+            for _ in range(200):
+                runner.run(request, random.choice(request.initial_positions))
+                agent.decay_epsilon()
+            tables[backend] = kb.export_q_table()
+
+        assert len(tables["dense"]) > 0
+        assert tables["dense"] == tables["dict"]
+
+    def test_dense_choose_action_is_greedy(self):
+        """Exploitation picks the best action, first one on ties"""
+        kb = KnowledgeBase(backend="dense")
+        agent = QLearningAgent(kb, epsilon_start=0.0)
+        state = agent.encode_state((5, 5), ImpalaAction.DRINK, LionState.NORMAL)
+        assert isinstance(state, int)
+
+        assert agent.choose_action(state) == LionAction.ADVANCE
+        kb.update_q_value("5,5|drink|normal", "attack", 3.0)
+        assert agent.choose_action(state) == LionAction.ATTACK
+        assert agent.choose_action(state, [LionAction.ADVANCE, LionAction.HIDE]) == LionAction.ADVANCE
+
+
+class TestEligibilityTraces:
+    """Tests for the array-backed eligibility trace store"""
+
+    def test_accumulating_and_replacing(self):
+        """Revisiting a pair adds 1 to its trace, or resets it to 1 when replacing"""
+        for mode, expected in (("accumulating", 1.5), ("replacing", 1.0)):
+            traces = EligibilityTraces(num_actions=3, mode=mode)
+            values = np.zeros((4, 3))
+            traces.visit(2, 1)
+            traces.apply(values, step=0.0, decay=0.5)
+            traces.visit(2, 1)
+            assert dict(traces.items()) == {(2, 1): expected}
+
+    def test_apply_updates_decays_and_prunes(self):
+        """Active traces get step * eligibility, decay, and are dropped once below the threshold"""
+        traces = EligibilityTraces(num_actions=3, threshold=0.3)
+        values = np.zeros((4, 3))
+        traces.visit(0, 0)
+        traces.apply(values, step=2.0, decay=0.5)
+        traces.visit(1, 2)
+        traces.apply(values, step=1.0, decay=0.5)
+
+        assert values[0, 0] == 2.5
+        assert values[1, 2] == 1.0
+        assert dict(traces.items()) == {(0, 0): 0.25, (1, 2): 0.5}
+
+        traces.apply(values, step=1.0, decay=0.5)
+        assert values[0, 0] == 2.5
+        assert values[1, 2] == 1.5
+        assert dict(traces.items()) == {(1, 2): 0.25}
+
+    def test_trace_store_grows(self):
+        """The store grows past its initial capacity"""
+        traces = EligibilityTraces(num_actions=3, capacity=2)
+        values = np.zeros((10, 3))
+        for state in range(10):
+            traces.visit(state, 0)
+        traces.apply(values, step=1.0, decay=1.0)
+        assert len(traces) == 10
+        assert values[:, 0].tolist() == [1.0] * 10
+
+    def test_agent_reuses_trace_store(self):
+        """Episode resets clear the existing store; a mode change allocates a new one"""
+        agent = QLearningAgent(KnowledgeBase(backend="dense"))
+        traces = agent.eligibility_traces
+        traces.visit(4, 1)
+        agent.reset_eligibility()
+        assert agent.eligibility_traces is traces
+        assert len(traces) == 0
+
+        agent.trace_mode = "replacing"
+        agent.reset_eligibility()
+        assert agent.eligibility_traces is not traces
+        assert agent.eligibility_traces.mode == "replacing"
+
+
+class TestArrayExperienceReplay:
+    """Tests for the NumPy ring buffer used with the dense backend"""
+
+    def test_ring_buffer_overwrites_oldest(self):
+        """The buffer keeps the last max_size experiences with typed columns"""
+        buffer = ArrayExperienceReplay(max_size=3, seed=0)
+        for i in range(5):
+            buffer.add(i, LionAction.HIDE, -0.5 * i, i + 1, i == 4)
+
+        assert buffer.size() == 3
+        states, actions, rewards, next_states, dones = buffer.sample_arrays(10)
+        assert sorted(states.tolist()) == [2, 3, 4]
+        assert actions.dtype == np.int8 and rewards.dtype == np.float32
+        assert set(actions.tolist()) == {1}
+
+    def test_sample_is_uniform_and_compatible(self):
+        """Sampling returns batch_size experiences, also as ExperienceReplay style tuples"""
+        buffer = ArrayExperienceReplay(max_size=1000, seed=0)
+        for i in range(1000):
+            buffer.add(i, "advance", 1.0, i, False)
+
+        states, _, _, _, _ = buffer.sample_arrays(512)
+        assert len(states) == 512
+        assert 0.4 < (states < 500).mean() < 0.6
+        assert len(buffer.sample_arrays(2000)[0]) == 1000
+
+        state, action, reward, next_state, done = buffer.sample(1)[0]
+        assert action == "advance" and reward == 1.0 and done is False
+
+    def test_string_keys_and_memory(self):
+        """String state keys are stored as rows; memory is the size of the columns"""
+        buffer = ArrayExperienceReplay(max_size=1000000)
+        buffer.add("9,9|drink|normal", "attack", 100.0, "9,9|drink|normal", True)
+
+        assert buffer.states[0] == DenseQTable.index_of("9,9|drink|normal")
+        assert buffer.memory_bytes() == 14 * 1000000
+
+
+class TestPrioritizedReplay:
+    """Tests for the sum-tree and prioritized experience replay"""
+
+    def test_sum_tree_sums_and_find(self):
+        """Inner nodes hold the sums of their leaves; find walks the cumulative ranges"""
+        tree = SumTree(5)
+        tree.update(np.arange(5), np.array([1.0, 2.0, 3.0, 4.0, 5.0]))
+        assert tree.total() == 15.0
+
+        tree.update(np.array([4]), np.array([0.5]))
+        assert tree.total() == 10.5
+        assert tree.find(np.array([0.0, 0.99, 1.0, 5.9, 6.0, 10.4])).tolist() == [0, 0, 1, 2, 3, 4]
+
+    def test_sampling_follows_priorities(self):
+        """Experiences are drawn proportionally to (|td| + eps) ** alpha"""
+        buffer = PrioritizedExperienceReplay(max_size=4, seed=1)
+        for i in range(4):
+            buffer.add(i, "advance", 0.0, i, False)
+        td_errors = np.array([0.0, 1.0, 2.0, 5.0])
+        buffer.update_priorities(np.arange(4), td_errors)
+
+        counts = np.bincount(np.concatenate([buffer.sample_indices(100) for _ in range(100)]), minlength=4)
+        expected = (td_errors + buffer.epsilon) ** buffer.alpha
+        assert np.allclose(counts / counts.sum(), expected / expected.sum(), atol=0.02)
+
+    def test_importance_weights(self):
+        """IS weights are at most 1 and largest for the least likely experiences"""
+        buffer = PrioritizedExperienceReplay(max_size=8, seed=0)
+        for i in range(8):
+            buffer.add(i, "hide", -0.5, i, False)
+        buffer.update_priorities(np.arange(8), np.arange(8, dtype=float))
+
+        slots, weights = buffer.sample_prioritized(64)[:2]
+        assert weights.max() == 1.0
+        assert weights[np.argmin(buffer.tree.priorities(slots))] == 1.0
+
+    def test_learn_batch_updates_priorities(self):
+        """A prioritized learn_batch writes the new TD errors back as priorities"""
+        kb = KnowledgeBase(backend="dense")
+        agent = QLearningAgent(kb, replay="prioritized")
+        state = agent.encode_state((9, 7), ImpalaAction.DRINK, LionState.NORMAL)
+        for _ in range(40):
+            agent.learn(state, LionAction.ATTACK, 100.0, state, True)
+
+        agent.learn_batch(batch_size=32)
+        priorities = agent.replay_buffer.tree.priorities(np.arange(40))
+        # Q is already close to the reward, so replayed experiences drop far below the initial priority
+        assert priorities.min() < 0.5 * agent.replay_buffer.max_priority
+
+    def test_prioritized_needs_dense_backend(self):
+        """The dict backend only supports uniform replay"""
+        with pytest.raises(ValueError):
+            QLearningAgent(KnowledgeBase(), replay="prioritized")
+
+
+class TestBatchUpdate:
+    """Tests for the vectorized minibatch Q-update"""
+
+    def test_matches_single_updates_without_duplicates(self):
+        """With distinct (state, action) pairs the batch update equals one learn per transition"""
+        batch = (np.array([10, 11, 12]), np.array([0, 2, 1]), np.array([1.0, -0.5, 100.0], dtype=np.float32),
+                 np.array([20, 21, 22]), np.array([False, False, True]))
+        kb_batch, kb_single = KnowledgeBase(backend="dense"), KnowledgeBase(backend="dense")
+        for kb in (kb_batch, kb_single):
+            kb.q_table.values[20:23] = [[1.0, 2.0, 3.0], [0.0, -1.0, 4.0], [9.0, 9.0, 9.0]]
+        agent_batch, agent_single = QLearningAgent(kb_batch), QLearningAgent(kb_single)
+
+        td_errors = agent_batch.learn_arrays(*batch)
+        for s, a, r, ns, d in zip(*(col.tolist() for col in batch)):
+            agent_single._learn_dense(s, a, r, ns, d)
+
+        assert np.allclose(kb_batch.q_table.values, kb_single.q_table.values)
+        assert td_errors.tolist() == pytest.approx([1.0 + 0.95 * 3.0, -0.5 + 0.95 * 4.0, 100.0])
+        assert len(kb_batch.q_table) == len(kb_single.q_table) == 5
+
+    def test_duplicates_are_order_independent(self):
+        """Repeated (state, action) pairs get the mean TD error whatever their order"""
+        states = np.array([5, 5, 5, 6])
+        actions = np.array([1, 1, 1, 0])
+        rewards = np.array([3.0, 6.0, 0.0, 1.0], dtype=np.float32)
+        next_states = np.array([0, 0, 0, 0])
+        dones = np.ones(4, dtype=bool)
+
+        results = []
+        for order in ([0, 1, 2, 3], [3, 2, 0, 1]):
+            kb = KnowledgeBase(backend="dense")
+            agent = QLearningAgent(kb, learning_rate=0.5)
+            agent.learn_arrays(states[order], actions[order], rewards[order], next_states[order], dones[order])
+            results.append(kb.q_table.values.copy())
+
+        assert np.array_equal(results[0], results[1])
+        assert results[0][5, 1] == 0.5 * 3.0
+        assert results[0][6, 0] == 0.5
+
+    def test_large_learn_batch(self):
+        """learn_batch handles batches of thousands of experiences"""
+        kb = KnowledgeBase(backend="dense")
+        agent = QLearningAgent(kb, replay_size=10000)
+        state = agent.encode_state((9, 7), ImpalaAction.DRINK, LionState.NORMAL)
+        for _ in range(5000):
+            agent.learn(state, LionAction.ATTACK, 100.0, state, True)
+        before = kb.get_q_value("9,7|drink|normal", "attack")
+
+        agent.learn_batch(batch_size=4096)
+        assert kb.get_q_value("9,7|drink|normal", "attack") == pytest.approx(before + 0.3 * (100.0 - before))
+
+class TestRewardSystem:
+    """Tests for the table based reward computation"""
+
+    @staticmethod
+    def reference_reward(prev_state, action, new_state):
+        """Original distance based shaping"""
+        if new_state.status == "success":
+            return 100.0
+        if new_state.status == "failed":
+            return -100.0
+        prev_dist = calculate_distance(prev_state.lion.position, prev_state.impala.position)
+        new_dist = calculate_distance(new_state.lion.position, new_state.impala.position)
+        reward = 2.0 if new_dist < prev_dist else -2.0 if new_dist > prev_dist else 0.0
+        if action == LionAction.HIDE and new_dist > 5:
+            reward += 1.0
+        elif action == LionAction.ATTACK and new_dist <= 3:
+            reward += 3.0
+        elif action == LionAction.ATTACK and new_dist > 5:
+            reward -= 2.0
+        if action == LionAction.ADVANCE and 3 < new_dist <= 6:
+            reward += 1.0
+        if new_state.impala.state == ImpalaState.FLEEING and prev_state.impala.state != ImpalaState.FLEEING \
+                and new_dist > 5:
+            reward -= 5.0
+        return reward - 0.5
+
+    def test_heuristic_matches_reference(self):
+        """Table lookups give the same rewards as the distance formula"""
+        rng = random.Random(5)
+        engine = GameEngine()
+        reward_system = RewardSystem()
+        for _ in range(200):
+            state = GameState(lion_start_pos=(rng.randrange(19), rng.randrange(19)))
+            while state.status == "in_progress":
+                prev = state.snapshot()
+                action = rng.choice(list(LionAction))
+                engine.step(state, action, rng.choice(list(ImpalaAction)))
+                expected = self.reference_reward(prev, action, state)
+                assert reward_system.calculate_reward(prev, action, state, False, "") == expected
+
+    def test_potential_shaping(self):
+        """Potential based shaping adds gamma * phi(s') - phi(s), with phi = 0 at terminal states"""
+        reward_system = RewardSystem("potential", discount_factor=0.9)
+        engine = GameEngine()
+        state = GameState(lion_start_pos=(5, 9))  # distance 4 from the impala
+        engine.step(state, LionAction.ADVANCE, ImpalaAction.DRINK)
+        new_dist = calculate_distance(state.lion.position, state.impala.position)
+        assert reward_system.step_reward((5, 9), (9, 9), ImpalaState.DRINKING, LionAction.ADVANCE, state) \
+            == pytest.approx(-0.5 + 4.0 - 0.9 * new_dist)
+
+        state = GameState(lion_start_pos=(8, 9))
+        engine.step(state, LionAction.ATTACK, ImpalaAction.DRINK)
+        assert state.status == "success"
+        assert reward_system.step_reward((8, 9), (9, 9), ImpalaState.DRINKING, LionAction.ATTACK, state) \
+            == pytest.approx(100.0 + 1.0)
+
+    def test_unknown_shaping(self):
+        """Unknown shaping modes are rejected"""
+        with pytest.raises(ValueError):
+            RewardSystem("bogus")
+
+class TestDynaPlanning:
+    """Tests for the Dyna-Q model and planning updates"""
+
+    def test_model_outcome_statistics(self):
+        """Sampled transitions follow the observed outcome frequencies with mean rewards"""
+        model = DynaModel(10, 3, seed=0)
+        for _ in range(3):
+            model.observe(4, 1, 2.0, 7, False)
+        model.observe(4, 1, 6.0, 7, False)
+        model.observe(4, 1, -100.0, 9, True)
+
+        states, actions, rewards, next_states, dones = model.sample(5000)
+        assert len(model) == 1
+        assert set(states.tolist()) == {4} and set(actions.tolist()) == {1}
+        assert set(zip(rewards.tolist(), next_states.tolist(), dones.tolist())) == {(3.0, 7, False), (-100.0, 0, True)}
+        assert dones.mean() == pytest.approx(0.2, abs=0.03)
+
+    def test_model_replaces_least_seen_outcome(self):
+        """A pair keeps at most max_outcomes outcomes"""
+        model = DynaModel(10, 3, max_outcomes=2, seed=0)
+        model.observe(0, 0, 1.0, 1, False)
+        model.observe(0, 0, 1.0, 1, False)
+        model.observe(0, 0, 1.0, 2, False)
+        model.observe(0, 0, 5.0, 3, False)
+
+        _, _, rewards, next_states, _ = model.sample(1000)
+        assert set(next_states.tolist()) == {1, 3}
+        assert set(rewards.tolist()) == {1.0, 5.0}
+
+    def test_planning_propagates_values(self):
+        """Simulated backups carry the terminal reward back to earlier states"""
+        kb = KnowledgeBase(backend="dense")
+        agent = QLearningAgent(kb, dyna_steps=50)
+        first = agent.encode_state((5, 9), ImpalaAction.DRINK, LionState.NORMAL)
+        second = agent.encode_state((6, 9), ImpalaAction.DRINK, LionState.NORMAL)
+
+        agent.learn(first, LionAction.ADVANCE, 0.0, second, False)
+        agent.learn(second, LionAction.ATTACK, 100.0, second, True)
+        assert kb.get_q_value("5,9|drink|normal", "advance") > 0.0
+
+    def test_planning_needs_dense_backend(self):
+        """Dyna-Q is rejected with the dict backend"""
+        with pytest.raises(ValueError):
+            QLearningAgent(KnowledgeBase(), dyna_steps=5)
+
+class TestPhaseProfiler:
+    """Tests for the training phase profiler"""
+
+    def test_marks_become_phase_durations(self):
+        """Consecutive marks are split into per-phase durations"""
+        profiler = PhaseProfiler(("a", "b"), window=2)
+        profiler.record_marks(("a", "b"), [0.0, 1e-6, 3e-6, 10.0, 10.5, 12.0, 20.0, 20.0, 20.25])
+        summary = profiler.summary()
+
+        assert summary["a"]["count"] == 3
+        assert summary["a"]["total_seconds"] == pytest.approx(0.5 + 1e-6)
+        assert summary["b"]["max_seconds"] == pytest.approx(1.5)
+        assert sum(summary["b"]["histogram"]) == 3
+        assert summary["a"]["histogram"][0] == 2  # 1us and 0s fall in the first bucket
+        assert summary["b"]["rolling"]["count"] == 2
+        assert summary["b"]["rolling"]["mean_seconds"] == pytest.approx((1.5 + 0.25) / 2)
+
+    def test_incomplete_step_is_dropped(self):
+        """Marks of a step cut short by an exception are ignored"""
+        profiler = PhaseProfiler(("a", "b"))
+        profiler.record_marks(("a", "b"), [0.0, 1.0, 3.0, 10.0, 10.5])
+        profiler.record_marks(("a", "b"), [0.0, 1.0])
+
+        summary = profiler.summary()
+        assert summary["a"]["count"] == 1
+        assert summary["b"]["total_seconds"] == pytest.approx(2.0)
+
+    def test_disabled_profiler_records_nothing(self):
+        """With the profiler off nothing is timed"""
+        profiler = PhaseProfiler(TRAINING_PHASES, enabled=False)
+        with profiler.time("replay"):
+            pass
+        agent = QLearningAgent(KnowledgeBase(backend="dense"))
+        runner = EpisodeRunner(agent, GameEngine(), RewardSystem(), profiler=profiler)
+        request = TrainingStartRequest(num_incursions=1, initial_positions=[1], impala_mode="random")
+        runner.run(request, 1)
+        runner.flush_profile()
+        assert all(phase["count"] == 0 for phase in profiler.summary().values())
+
+    def test_runner_times_every_step(self):
+        """Each step of an incursion records every step phase"""
+        profiler = PhaseProfiler(TRAINING_PHASES)
+        agent = QLearningAgent(KnowledgeBase(backend="dense"))
+        runner = EpisodeRunner(agent, GameEngine(), RewardSystem(), profiler=profiler)
+        request = TrainingStartRequest(num_incursions=1, initial_positions=[1], impala_mode="random")
+        total = sum(runner.run(request, 1)[1] for _ in range(20))
+        runner.flush_profile()
+
+        summary = profiler.summary()
+        for phase in ("choose_action", "engine_step", "reward", "update"):
+            assert summary[phase]["count"] == total
+        assert summary["replay"]["count"] == 0
+
+class TestMetrics:
+    """Tests for the Prometheus metrics registry"""
+
+    def test_text_format(self):
+        """Counters, gauges and histograms render in the Prometheus text format"""
+        registry = MetricsRegistry()
+        counter = registry.counter("episodes_total", "Episodes", ["result"])
+        registry.gauge("epsilon", "Exploration", function=lambda: 0.25)
+        histogram = registry.histogram("save_seconds", "Saves", buckets=(0.1, 1.0))
+        counter.inc(result="success")
+        counter.inc(2, result="failed")
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(3.0)
+
+        lines = registry.render().splitlines()
+        assert "# TYPE episodes_total counter" in lines
+        assert 'episodes_total{result="failed"} 2' in lines
+        assert 'episodes_total{result="success"} 1' in lines
+        assert "epsilon 0.25" in lines
+        assert 'save_seconds_bucket{le="0.1"} 1' in lines
+        assert 'save_seconds_bucket{le="1"} 2' in lines
+        assert 'save_seconds_bucket{le="+Inf"} 3' in lines
+        assert "save_seconds_sum 3.55" in lines
+        assert "save_seconds_count 3" in lines
+
+    def test_invalid_use(self):
+        """Duplicate names, wrong labels and decreasing counters are rejected"""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests", ["router"])
+        with pytest.raises(ValueError):
+            registry.counter("requests_total", "Again")
+        with pytest.raises(ValueError):
+            counter.inc(method="GET")
+        with pytest.raises(ValueError):
+            counter.inc(-1, router="training")
+
+    def test_router_labels(self):
+        """Requests are labelled by router, with a bounded set of values"""
+        assert router_label("/api/training/status") == "training"
+        assert router_label("/api/hunting/step") == "hunting"
+        assert router_label("/api/unknown/x") == "other"
+        assert router_label("/metrics") == "other"
+
+class TestProgressStream:
+    """Tests for the coalescing snapshot broadcaster behind the SSE stream"""
+
+    def test_subscribers_share_snapshots(self):
+        """One build per tick serves every subscriber"""
+        counter = {"value": 0}
+
+        def build():
+            counter["value"] += 1
+            return {"incursion": counter["value"]}
+
+        broadcaster = SnapshotBroadcaster(build, tick=0.01)
+
+        async def take(n):
+            received = []
+            async for snapshot in broadcaster.subscribe(0.01):
+                received.append(snapshot)
+                if len(received) == n:
+                    return received
+
+        async def run():
+            return await asyncio.gather(*[take(5) for _ in range(20)])
+
+        results = asyncio.run(run())
+        assert all(len(r) == 5 for r in results)
+        assert broadcaster.builds < 20
+        assert broadcaster.subscribers == 0
+
+    def test_slow_subscriber_gets_latest(self):
+        """Snapshots produced while a subscriber sleeps are skipped, not queued"""
+        counter = {"value": 0}
+
+        def build():
+            counter["value"] += 1
+            return {"incursion": counter["value"]}
+
+        broadcaster = SnapshotBroadcaster(build, tick=0.01)
+
+        async def run():
+            received = []
+            async for snapshot in broadcaster.subscribe(0.2):
+                received.append(snapshot["incursion"])
+                if len(received) == 2:
+                    return received
+
+        first, second = asyncio.run(run())
+        assert second - first > 5
+
+    def test_keepalive_without_changes(self):
+        """An unchanged snapshot is sent once, then only keep-alives"""
+        broadcaster = SnapshotBroadcaster(lambda: {"incursion": 0}, tick=0.01, keepalive=0.05)
+
+        async def run():
+            received = []
+            async for snapshot in broadcaster.subscribe(0.01):
+                received.append(snapshot)
+                if len(received) == 3:
+                    return received
+
+        assert asyncio.run(run()) == [{"incursion": 0}, None, None]
+
+
+class TestTrainingJobs:
+    """Tests for the training job scheduler (one process and Knowledge Base per job)"""
+
+    def test_jobs_queue_beyond_capacity(self):
+        """Jobs over the concurrency cap wait in the queue, then all complete with their own table"""
+        scheduler = JobScheduler(max_concurrent=1)
+        request = TrainingStartRequest(num_incursions=20, initial_positions=[1, 2, 3], impala_mode="random")
+        first = scheduler.submit(request)
+        second = scheduler.submit(request)
+        assert (first.status, second.status) == ("running", "queued")
+
+        for job in (first, second):
+            job = scheduler.wait(job.job_id, timeout=120)
+            assert job.status == "completed"
+            assert job.success_count + job.fail_count == 20
+            assert scheduler.result(job.job_id)["q_table"]
+        assert scheduler.result(first.job_id) is not scheduler.result(second.job_id)
+
+    def test_stop_and_resume_queued_job(self):
+        """A stopped job has no result until it runs, and resuming queues it again"""
+        scheduler = JobScheduler(max_concurrent=1)
+        blocker = scheduler.submit(TrainingStartRequest(num_incursions=1000000, initial_positions=[1], impala_mode="random"))
+        job = scheduler.submit(TrainingStartRequest(num_incursions=5, initial_positions=[1], impala_mode="random"))
+
+        assert scheduler.stop(job.job_id).status == "stopped"
+        with pytest.raises(ValueError):
+            scheduler.result(job.job_id)
+        assert scheduler.resume(job.job_id).status == "queued"
+
+        assert scheduler.stop(blocker.job_id).status == "stopping"
+        blocker = scheduler.wait(blocker.job_id, timeout=120)
+        assert blocker.status == "stopped"
+        assert blocker.current_incursion < 1000000
+        assert "q_table" in scheduler.result(blocker.job_id)
+        assert scheduler.wait(job.job_id, timeout=120).status == "completed"
+
+    def test_invalid_and_unknown_jobs(self):
+        """Invalid settings are rejected before queueing and unknown IDs raise KeyError"""
+        scheduler = JobScheduler(max_concurrent=1)
+        with pytest.raises(ValueError):
+            scheduler.submit(TrainingStartRequest(num_incursions=5, initial_positions=[1], impala_mode="random", num_workers=2))
+        with pytest.raises(KeyError):
+            scheduler.snapshot("missing")
+        assert scheduler.list_jobs() == []
+
+    def test_delete_and_retention(self):
+        """Only finished jobs can be deleted, and the oldest completed ones are dropped past the cap"""
+        scheduler = JobScheduler(max_concurrent=1, max_finished=1)
+        request = TrainingStartRequest(num_incursions=5, initial_positions=[1], impala_mode="random")
+        first = scheduler.submit(request)
+        queued = scheduler.submit(request)
+        with pytest.raises(ValueError):
+            scheduler.delete(queued.job_id)
+        scheduler.stop(queued.job_id)
+        scheduler.delete(queued.job_id)
+        with pytest.raises(KeyError):
+            scheduler.delete(queued.job_id)
+
+        scheduler.wait(first.job_id, timeout=120)
+        second = scheduler.wait(scheduler.submit(request).job_id, timeout=120)
+        assert second.status == "completed"
+        assert [job["job_id"] for job in scheduler.list_jobs()] == [second.job_id]
+
+
+class TestCheckpointWriter:
+    """Tests for checkpoint policies and the background checkpoint writer"""
+
+    def test_policies(self):
+        """Fixed, time-based and improvement-based schedules"""
+        every = CheckpointPolicy("every", every=100)
+        assert [i for i in range(250) if every.due(i, i + 1)] == [0, 100, 200]
+        assert every.due(150, 250) and not every.due(101, 150)
+
+        interval = CheckpointPolicy("interval", seconds=10.0)
+        assert [interval.due(i, i + 1, now=t) for i, t in enumerate([0.0, 5.0, 10.0, 15.0])] == [True, False, True, False]
+
+        improvement = CheckpointPolicy("improvement", every=10, min_improvement=0.05)
+        rates = {0: 0.1, 10: 0.12, 20: 0.2, 30: 0.1}
+        assert [i for i, rate in rates.items() if improvement.due(i, i + 1, rate)] == [0, 20]
+
+        with pytest.raises(ValueError):
+            CheckpointPolicy("sometimes")
+
+    def test_requests_coalesce_while_writing(self):
+        """Requests made while a checkpoint is pending collapse into one"""
+        release = threading.Event()
+        prepared = []
+
+        def prepare():
+            prepared.append(len(prepared))
+            return release.wait
+        writer = CheckpointWriter(prepare)
+
+        writer.request()
+        while not prepared:
+            time.sleep(0.01)
+        for _ in range(3):
+            writer.request()
+        release.set()
+        assert writer.flush(timeout=5)
+        assert (writer.requested, writer.written, writer.coalesced) == (4, 2, 2)
+        assert prepared == [0, 1]
+
+    def test_writes_in_order_and_survive_errors(self):
+        """Queued writes run in order; a failing write is counted and the thread goes on"""
+        written = []
+
+        def fail():
+            raise OSError("disk full")
+        writer = CheckpointWriter(lambda: fail)
+        writer.submit(lambda: written.append(1))
+        writer.request()
+        writer.submit(lambda: written.append(2))
+        assert writer.flush(timeout=5)
+        assert written == [1, 2]
+        assert writer.errors == 1 and "disk full" in writer.last_error
+
+    def test_training_checkpoints_in_background(self, tmp_path, monkeypatch):
+        """Training requests checkpoints from the policy and they are on disk when it ends"""
+        monkeypatch.chdir(tmp_path)
+        manager = TrainingManager()
+        request = TrainingStartRequest(num_incursions=120, initial_positions=[1, 2, 3], impala_mode="random",
+                                       history_mode="off", checkpoint_every=50)
+        manager.start_training(request)
+        manager._thread.join(timeout=60)
+
+        assert manager.checkpoint_writer.requested == 3
+        assert manager.checkpoint_writer.errors == 0
+        checkpoint = KnowledgeBase(backend="dense")
+        checkpoint.load("knowledge_checkpoint")
+        assert 0 < len(checkpoint.q_table) <= len(manager.kb.q_table)
+
+        with pytest.raises(HTTPException):
+            manager.start_training(request.model_copy(update={"checkpoint_policy": "never"}))
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])